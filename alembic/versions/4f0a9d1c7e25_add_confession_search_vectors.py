@@ -0,0 +1,164 @@
+"""Add confession search vectors
+
+Revision ID: 4f0a9d1c7e25
+Revises: b4978629a619
+Create Date: 2026-10-17 11:02:15.530817
+
+"""
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '4f0a9d1c7e25'
+down_revision = 'b4978629a619'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('DROP INDEX IF EXISTS confession_paragraphs_text_idx')
+    op.execute('DROP INDEX IF EXISTS confession_questions_text_idx')
+    op.execute('DROP INDEX IF EXISTS confession_articles_text_idx')
+
+    op.add_column(
+        'confession_questions',
+        sa.Column(
+            'search_vector',
+            TSVECTOR(),
+            sa.Computed(
+                "to_tsvector('english', question_text || ' ' || answer_text)",
+                persisted=True,
+            ),
+        ),
+    )
+    op.add_column(
+        'confession_articles',
+        sa.Column(
+            'search_vector',
+            TSVECTOR(),
+            sa.Computed("to_tsvector('english', title || ' ' || text)", persisted=True),
+        ),
+    )
+
+    # Generated columns cannot read other tables, so the paragraph vector (which
+    # includes the chapter title) is kept up to date by triggers instead
+    op.add_column(
+        'confession_paragraphs', sa.Column('search_vector', TSVECTOR(), nullable=True)
+    )
+    op.execute(
+        '''
+        CREATE FUNCTION confession_paragraphs_search_vector_update()
+        RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := to_tsvector('english', (
+                SELECT c.chapter_title
+                FROM confession_chapters c
+                WHERE c.confess_id = NEW.confess_id
+                    AND c.chapter_number = NEW.chapter_number
+            ) || ' ' || NEW.text);
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        '''
+    )
+    op.execute(
+        '''
+        CREATE TRIGGER confession_paragraphs_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF confess_id, chapter_number, text
+        ON confession_paragraphs
+        FOR EACH ROW EXECUTE PROCEDURE confession_paragraphs_search_vector_update()
+        '''
+    )
+    op.execute(
+        '''
+        CREATE FUNCTION confession_chapters_search_vector_update()
+        RETURNS trigger AS $$
+        BEGIN
+            UPDATE confession_paragraphs p
+            SET search_vector =
+                to_tsvector('english', NEW.chapter_title || ' ' || p.text)
+            WHERE p.confess_id = NEW.confess_id
+                AND p.chapter_number = NEW.chapter_number;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        '''
+    )
+    op.execute(
+        '''
+        CREATE TRIGGER confession_chapters_search_vector_trigger
+        AFTER INSERT OR UPDATE OF confess_id, chapter_number, chapter_title
+        ON confession_chapters
+        FOR EACH ROW EXECUTE PROCEDURE confession_chapters_search_vector_update()
+        '''
+    )
+    op.execute(
+        '''
+        UPDATE confession_paragraphs p
+        SET search_vector = to_tsvector('english', c.chapter_title || ' ' || p.text)
+        FROM confession_chapters c
+        WHERE c.confess_id = p.confess_id
+            AND c.chapter_number = p.chapter_number
+        '''
+    )
+
+    op.create_index(
+        'confession_paragraphs_search_idx',
+        'confession_paragraphs',
+        ['search_vector'],
+        postgresql_using='gin',
+    )
+    op.create_index(
+        'confession_questions_search_idx',
+        'confession_questions',
+        ['search_vector'],
+        postgresql_using='gin',
+    )
+    op.create_index(
+        'confession_articles_search_idx',
+        'confession_articles',
+        ['search_vector'],
+        postgresql_using='gin',
+    )
+
+
+def downgrade():
+    op.drop_index('confession_articles_search_idx', 'confession_articles')
+    op.drop_index('confession_questions_search_idx', 'confession_questions')
+    op.drop_index('confession_paragraphs_search_idx', 'confession_paragraphs')
+
+    op.execute(
+        'DROP TRIGGER confession_chapters_search_vector_trigger '
+        'ON confession_chapters'
+    )
+    op.execute('DROP FUNCTION confession_chapters_search_vector_update()')
+    op.execute(
+        'DROP TRIGGER confession_paragraphs_search_vector_trigger '
+        'ON confession_paragraphs'
+    )
+    op.execute('DROP FUNCTION confession_paragraphs_search_vector_update()')
+
+    op.drop_column('confession_articles', 'search_vector')
+    op.drop_column('confession_questions', 'search_vector')
+    op.drop_column('confession_paragraphs', 'search_vector')
+
+    op.create_index(
+        'confession_paragraphs_text_idx',
+        'confession_paragraphs',
+        [sa.text("to_tsvector('english', text)")],
+        postgresql_using='gin',
+    )
+    op.create_index(
+        'confession_questions_text_idx',
+        'confession_questions',
+        [sa.text("to_tsvector('english', question_text || ' ' || answer_text)")],
+        postgresql_using='gin',
+    )
+    op.create_index(
+        'confession_articles_text_idx',
+        'confession_articles',
+        [sa.text("to_tsvector('english', 'text')")],
+        postgresql_using='gin',
+    )
@@ -0,0 +1,45 @@
+"""Add local verses
+
+Revision ID: 6d2e8b4f1a37
+Revises: 4f0a9d1c7e25
+Create Date: 2026-10-17 14:26:51.204718
+
+"""
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '6d2e8b4f1a37'
+down_revision = '4f0a9d1c7e25'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'local_verses',
+        sa.Column('version', sa.String(), nullable=False),
+        sa.Column('book', sa.SmallInteger(), nullable=False),
+        sa.Column('chapter', sa.SmallInteger(), nullable=False),
+        sa.Column('verse', sa.SmallInteger(), nullable=False),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column(
+            'search_vector',
+            TSVECTOR(),
+            sa.Computed("to_tsvector('english', text)", persisted=True),
+        ),
+        sa.PrimaryKeyConstraint('version', 'book', 'chapter', 'verse'),
+    )
+    op.create_index(
+        'local_verses_search_idx',
+        'local_verses',
+        ['search_vector'],
+        postgresql_using='gin',
+    )
+
+
+def downgrade():
+    op.drop_index('local_verses_search_idx', table_name='local_verses')
+    op.drop_table('local_verses')
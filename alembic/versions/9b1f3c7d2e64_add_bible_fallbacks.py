@@ -0,0 +1,28 @@
+"""Add bible fallbacks
+
+Revision ID: 9b1f3c7d2e64
+Revises: 6d2e8b4f1a37
+Create Date: 2026-10-17 16:02:37.418093
+
+"""
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '9b1f3c7d2e64'
+down_revision = '6d2e8b4f1a37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'bible_versions',
+        sa.Column('fallbacks', JSONB(), nullable=False, server_default='[]'),
+    )
+
+
+def downgrade():
+    op.drop_column('bible_versions', 'fallbacks')
@@ -0,0 +1,37 @@
+"""Add passage cache
+
+Revision ID: b4978629a619
+Revises: 85d51f96a1cd
+Create Date: 2026-10-17 09:12:40.118254
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'b4978629a619'
+down_revision = '85d51f96a1cd'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'passage_cache',
+        sa.Column('service', sa.String(), nullable=False),
+        sa.Column('service_version', sa.String(), nullable=False),
+        sa.Column('reference', sa.String(), nullable=False),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column(
+            'created_at',
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint('service', 'service_version', 'reference'),
+    )
+
+
+def downgrade():
+    op.drop_table('passage_cache')
@@ -0,0 +1,147 @@
+# Compares ApiBible's html and json content types by replaying the recorded test
+# cassettes through the service: per-passage time to decode and format each one. The
+# json bodies are the recorded html converted to the json content type's structure,
+# and both modes are checked to give the same text.
+#
+#     python -m benchmarks.apibible_content [--number N]
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Callable
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+import ujson
+import yaml
+from bs4 import BeautifulSoup, Tag
+
+from erasmus.data import VerseRange
+from erasmus.services.apibible import ApiBible
+
+_cassettes = (
+    Path(__file__).parent.parent / 'tests' / 'services' / 'cassettes' / 'test_apibible'
+)
+
+
+class Bible(object):
+    __slots__ = ('abbr', 'service_version', 'rtl')
+
+    def __init__(self, abbr: str, /) -> None:
+        self.abbr = abbr
+        self.service_version = abbr
+        self.rtl = False
+
+
+class Response(object):
+    __slots__ = ('body', 'status')
+
+    def __init__(self, body: bytes, /) -> None:
+        self.body = body
+        self.status = 200
+
+    async def __aenter__(self) -> Response:
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        pass
+
+    async def json(self, *, loads: Callable[[bytes], Any], content_type: None) -> Any:
+        # Yield to the loop the way a network read would
+        await asyncio.sleep(0)
+        return loads(self.body)
+
+
+class Session(object):
+    __slots__ = ('body',)
+
+    def __init__(self) -> None:
+        self.body = b''
+
+    def get(self, url: object, *, headers: object) -> Response:
+        return Response(self.body)
+
+
+def to_json_content(node: Tag) -> list[dict[str, Any]]:
+    items: list[dict[str, Any]] = []
+
+    for child in node.children:
+        if isinstance(child, Tag):
+            items.append(
+                {
+                    'name': 'verse' if 'v' in child['class'] else 'char',
+                    'type': 'tag',
+                    'attrs': {'style': ' '.join(child['class'])},
+                    'items': to_json_content(child),
+                }
+            )
+        else:
+            items.append({'text': str(child), 'type': 'text'})
+
+    return items
+
+
+def load_passages() -> dict[str, tuple[VerseRange, dict[str, bytes]]]:
+    passages: dict[str, tuple[VerseRange, dict[str, bytes]]] = {}
+
+    for name, verses, repeat in (
+        ('Gal 3-10-11 KJV', 'Gal 3:10-11', 1),
+        ('Mark 5-1 KJV', 'Mark 5:1', 1),
+        # About the size of a whole chapter
+        ('Gal 3-10-11 KJV', 'Gal 3:10-11', 15),
+    ):
+        path = _cassettes / f'TestApiBible.test_get_passage[{name}].yaml'
+        cassette = yaml.safe_load(path.read_text())
+        body = ujson.loads(cassette['interactions'][0]['response']['body']['string'])
+        html = body['data']['content'] * repeat
+        json_content = to_json_content(BeautifulSoup(html, 'html.parser'))
+        passages[f'{name} x{repeat}'] = (
+            VerseRange.from_string(verses),
+            {
+                mode: ujson.dumps({'data': {'content': content}, 'meta': None}).encode()
+                for mode, content in (('html', html), ('json', json_content))
+            },
+        )
+
+    return passages
+
+
+async def run(number: int) -> None:
+    session = Session()
+    services = {
+        mode: ApiBible(config={'content_type': mode}, session=session)  # type: ignore
+        for mode in ('html', 'json')
+    }
+
+    for name, (verses, bodies) in load_passages().items():
+        texts = {}
+
+        for mode, service in services.items():
+            session.body = bodies[mode]
+            texts[mode] = (await service.get_passage(Bible('KJV'), verses)).text
+
+            timings = []
+            for _ in range(number):
+                start = perf_counter()
+                await service.get_passage(Bible('KJV'), verses)
+                timings.append(perf_counter() - start)
+
+            print(
+                f'{mode:>4} {name:>20} ({len(bodies[mode]) // 1024:3} KiB): '
+                f'{min(timings) * 1000:7.3f} ms/passage'
+            )
+
+        assert texts['html'] == texts['json'], name
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=200)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.number))
+
+
+if __name__ == '__main__':
+    main()
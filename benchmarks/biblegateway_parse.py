@@ -0,0 +1,125 @@
+# Compares the BeautifulSoup tree builders BibleGateway can be configured with by
+# replaying the recorded test cassettes through the service: per-page time to
+# parse and transform each passage and search page.
+#
+#     python -m benchmarks.biblegateway_parse [--number N]
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+import yaml
+
+from erasmus.data import VerseRange
+from erasmus.services.biblegateway import BibleGateway
+
+_cassettes = (
+    Path(__file__).parent.parent
+    / 'tests'
+    / 'services'
+    / 'cassettes'
+    / 'test_biblegateway'
+)
+
+
+class Bible(object):
+    __slots__ = ('abbr', 'service_version', 'rtl')
+
+    def __init__(self, abbr: str, /) -> None:
+        self.abbr = abbr
+        self.service_version = abbr
+        self.rtl = False
+
+
+class Response(object):
+    __slots__ = ('body',)
+
+    def __init__(self, body: bytes, /) -> None:
+        self.body = body
+
+    async def __aenter__(self) -> Response:
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        pass
+
+    async def read(self) -> bytes:
+        # Yield to the loop the way a network read would
+        await asyncio.sleep(0)
+        return self.body
+
+    def get_encoding(self) -> str:
+        return 'utf-8'
+
+
+class Session(object):
+    __slots__ = ('body',)
+
+    def __init__(self) -> None:
+        self.body = b''
+
+    def get(self, url: object) -> Response:
+        return Response(self.body)
+
+
+def load_pages() -> dict[str, tuple[bytes, Callable[[BibleGateway], Awaitable[Any]]]]:
+    requests: dict[str, Callable[[BibleGateway], Awaitable[Any]]] = {
+        'Gal 3-10-11 NASB': lambda service: service.get_passage(
+            Bible('NASB'), VerseRange.from_string('Gal 3:10-11')
+        ),
+        'Mark 5-1 NASB': lambda service: service.get_passage(
+            Bible('NASB'), VerseRange.from_string('Mark 5:1')
+        ),
+        'Psalm 53-1 ESV': lambda service: service.get_passage(
+            Bible('ESV'), VerseRange.from_string('Psalm 53:1')
+        ),
+        'Melchizedek': lambda service: service.search(Bible('NASB'), ['Melchizedek']),
+        'faith': lambda service: service.search(Bible('NASB'), ['faith']),
+    }
+    pages = {}
+
+    for name, request in requests.items():
+        kind = 'search' if name in ('Melchizedek', 'faith') else 'get_passage'
+        path = _cassettes / f'TestBibleGateway.test_{kind}[{name}].yaml'
+        cassette = yaml.safe_load(path.read_text())
+        body = cassette['interactions'][0]['response']['body']['string']
+        pages[name] = (body.encode(), request)
+
+    return pages
+
+
+async def run(parser: str, number: int) -> None:
+    session = Session()
+    service = BibleGateway(config={'parser': parser}, session=session)  # type: ignore
+
+    for name, (body, request) in load_pages().items():
+        session.body = body
+        await request(service)
+
+        timings = []
+        for _ in range(number):
+            start = perf_counter()
+            await request(service)
+            timings.append(perf_counter() - start)
+
+        print(
+            f'{parser:>11} {name:>16} ({len(body) // 1024:4} KiB): '
+            f'{min(timings) * 1000:7.2f} ms/page'
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=20)
+    args = parser.parse_args()
+
+    for name in ('html.parser', 'lxml'):
+        asyncio.run(run(name, args.number))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# Compares the trie-factored book pattern with the flat alternation of every
+# book name it replaced: compile time and scan throughput of the full
+# reference regexes.
+#
+#     python -m benchmarks.book_matcher [--number N]
+from __future__ import annotations
+
+import argparse
+import re
+from functools import partial
+from time import perf_counter
+from timeit import Timer
+
+from erasmus import data
+
+from .prefilter import load_corpus
+
+_names: tuple[str, ...] = (
+    '_reference_or_bracketed_with_version_re',
+    '_bracketed_reference_with_version_re',
+    '_search_reference_re',
+)
+
+
+def get_patterns() -> dict[str, dict[str, tuple[str, int]]]:
+    trie_pattern = data._get_trie_pattern(data._book_names)
+    alternation_pattern = (
+        '(?:'
+        + '|'.join(re.escape(name) for name in dict.fromkeys(data._book_names))
+        + ')'
+    )
+
+    patterns: dict[str, dict[str, tuple[str, int]]] = {'alternation': {}, 'trie': {}}
+
+    for name in _names:
+        pattern: re.Pattern[str] = getattr(data, name)
+        patterns['trie'][name] = (pattern.pattern, pattern.flags)
+        patterns['alternation'][name] = (
+            pattern.pattern.replace(trie_pattern, alternation_pattern),
+            pattern.flags,
+        )
+
+    return patterns
+
+
+def compile_all(patterns: dict[str, tuple[str, int]]) -> list[re.Pattern[str]]:
+    re.purge()
+    return [re.compile(pattern, flags) for pattern, flags in patterns.values()]
+
+
+def scan(pattern: re.Pattern[str], messages: list[str]) -> int:
+    return sum(1 for message in messages for _ in pattern.finditer(message))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=20)
+    args = parser.parse_args()
+
+    chat = load_corpus()
+    references = [
+        f'what about [{name} 3:16-18] and {name}. 1:1 ESV?'
+        for name in dict.fromkeys(data._book_names)
+    ]
+
+    for kind, patterns in get_patterns().items():
+        timings = []
+        for _ in range(5):
+            start = perf_counter()
+            compiled = compile_all(patterns)
+            timings.append(perf_counter() - start)
+
+        print(f'{kind}: compile {min(timings) * 1000:.2f} ms')
+
+        unbracketed = compiled[_names.index('_reference_or_bracketed_with_version_re')]
+
+        for corpus_name, messages in (('chat', chat), ('references', references)):
+            best = min(
+                Timer(partial(scan, unbracketed, messages)).repeat(5, args.number)
+            )
+            per_message = best / args.number / len(messages) * 1_000_000
+            print(
+                f'{corpus_name:>14}: {per_message:8.2f} \N{MICRO SIGN}s/message, '
+                f'{len(messages) * args.number / best:10.0f} messages/s'
+            )
+
+
+if __name__ == '__main__':
+    main()
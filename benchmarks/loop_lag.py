@@ -0,0 +1,76 @@
+# Measures event loop lag while BibleGateway pages from the test cassettes are
+# parsed, with parsing inline on the loop and offloaded to a ParsePool.
+#
+#     python -m benchmarks.loop_lag [--requests N] [--concurrency N] [--parser P]
+from __future__ import annotations
+
+import argparse
+import asyncio
+from time import perf_counter
+
+from erasmus.loop_lag import LoopLagMonitor
+from erasmus.parse_pool import ParsePool
+from erasmus.services.biblegateway import BibleGateway
+
+from .biblegateway_parse import Session, load_pages
+
+
+async def run(
+    label: str,
+    parse_pool: ParsePool,
+    parser: str,
+    requests: int,
+    concurrency: int,
+) -> None:
+    pages = list(load_pages().values())
+    session = Session()
+    service = BibleGateway(
+        config={'parser': parser},
+        session=session,  # type: ignore
+        parse_pool=parse_pool,
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def request(index: int) -> None:
+        body, make_request = pages[index % len(pages)]
+
+        async with semaphore:
+            session.body = body
+            await make_request(service)
+
+    # Warm up the workers so process start-up isn't counted as lag
+    await asyncio.gather(*(request(i) for i in range(len(pages))))
+
+    monitor = LoopLagMonitor(interval=0.005, max_samples=100_000)
+    monitor.start()
+    start = perf_counter()
+
+    await asyncio.gather(*(request(i) for i in range(requests)))
+
+    elapsed = perf_counter() - start
+    monitor.stop()
+    parse_pool.close()
+
+    stats = ', '.join(f'{name} {value}' for name, value in monitor.get_stats().items())
+    print(f'{label:>10}: {requests / elapsed:6.1f} pages/s, {stats}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--parser', default='html.parser')
+    args = parser.parse_args()
+
+    for label, parse_pool in (
+        ('inline', ParsePool()),
+        ('1 worker', ParsePool(max_workers=1, min_size=0)),
+        ('2 workers', ParsePool(max_workers=2, min_size=0)),
+    ):
+        asyncio.run(
+            run(label, parse_pool, args.parser, args.requests, args.concurrency)
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+# Times looking up verse ranges in a packed corpus file and, given a database, the
+# same lookups through LocalVerse. The benchmark's verses are imported under a
+# temporary version, which is removed afterwards.
+#
+#     python -m benchmarks.packed_corpus [--db-url URL] [--number N]
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from erasmus.db.base import db
+from erasmus.db.local import LocalVerse
+from erasmus.packed_corpus import PackedCorpus, VerseRow, write
+
+_version = 'benchmark-packed-corpus'
+
+Lookup = tuple[int, tuple[int, int], tuple[int, int]]
+
+
+def make_corpus() -> list[VerseRow]:
+    rng = random.Random(0)
+    words = ['and', 'the', 'lord', 'said', 'unto', 'him', 'of', 'in', 'earth']
+
+    return [
+        (book, chapter, verse, ' '.join(rng.choices(words, k=rng.randint(8, 40))))
+        for book in range(1, 67)
+        for chapter in range(1, 26)
+        for verse in range(1, 20)
+    ]
+
+
+# Single verses, short ranges, whole chapters and ranges across chapters
+def make_lookups(number: int, /) -> list[Lookup]:
+    rng = random.Random(1)
+    lookups: list[Lookup] = []
+
+    for index in range(number):
+        book = rng.randint(1, 66)
+        chapter = rng.randint(1, 24)
+        verse = rng.randint(1, 15)
+        kind = index % 4
+
+        if kind == 0:
+            lookups.append((book, (chapter, verse), (chapter, verse)))
+        elif kind == 1:
+            lookups.append((book, (chapter, verse), (chapter, verse + 4)))
+        elif kind == 2:
+            lookups.append((book, (chapter, 1), (chapter, 19)))
+        else:
+            lookups.append((book, (chapter, verse), (chapter + 1, 5)))
+
+    return lookups
+
+
+def print_result(name: str, elapsed: float, lookups: list[Lookup], /) -> None:
+    per_lookup = elapsed / len(lookups) * 1_000_000
+    print(f'{name:>14}: {per_lookup:8.1f} \N{MICRO SIGN}s/lookup')
+
+
+async def run_database(
+    db_url: str, rows: list[VerseRow], lookups: list[Lookup]
+) -> None:
+    await db.set_bind(db_url)
+
+    try:
+        await LocalVerse.replace(_version, [(_version, *row) for row in rows])
+
+        try:
+            start = perf_counter()
+            for lookup in lookups:
+                await LocalVerse.get_range(_version, *lookup)
+            print_result('postgres', perf_counter() - start, lookups)
+        finally:
+            await LocalVerse.replace(_version, [])
+    finally:
+        await db.pop_bind().close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--db-url')
+    parser.add_argument('--number', type=int, default=10_000)
+    args = parser.parse_args()
+
+    rows = make_corpus()
+    lookups = make_lookups(args.number)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'benchmark.corpus'
+        write(rows, path)
+        print(f'{len(rows)} verses, {path.stat().st_size:,} bytes')
+
+        start = perf_counter()
+        corpus = PackedCorpus.open(path)
+        print(f'open: {(perf_counter() - start) * 1000:.2f}ms')
+
+        start = perf_counter()
+        for lookup in lookups:
+            corpus.get_range(*lookup)
+        print_result('packed corpus', perf_counter() - start, lookups)
+
+        corpus.close()
+
+    if args.db_url is not None:
+        asyncio.run(run_database(args.db_url, rows, lookups))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+# Compares scanning every chat message with the reference regexes against
+# running the cheap may_contain_reference() pre-check first.
+#
+#     python -m benchmarks.prefilter [--number N]
+from __future__ import annotations
+
+import argparse
+from functools import partial
+from pathlib import Path
+from timeit import Timer
+
+from erasmus.data import (
+    _bracketed_reference_with_version_re,
+    _reference_or_bracketed_with_version_re,
+    may_contain_reference,
+)
+
+_corpus_path = Path(__file__).resolve().parent / 'data' / 'messages.txt'
+
+
+def load_corpus() -> list[str]:
+    with _corpus_path.open() as f:
+        return [line for line in (line.rstrip('\n') for line in f) if line]
+
+
+def regex_only(corpus: list[tuple[str, bool]]) -> int:
+    found = 0
+
+    for message, only_bracketed in corpus:
+        pattern = (
+            _bracketed_reference_with_version_re
+            if only_bracketed
+            else _reference_or_bracketed_with_version_re
+        )
+        if pattern.search(message) is not None:
+            found += 1
+
+    return found
+
+
+def prefiltered(corpus: list[tuple[str, bool]]) -> int:
+    found = 0
+
+    for message, only_bracketed in corpus:
+        if not may_contain_reference(message, only_bracketed=only_bracketed):
+            continue
+
+        pattern = (
+            _bracketed_reference_with_version_re
+            if only_bracketed
+            else _reference_or_bracketed_with_version_re
+        )
+        if pattern.search(message) is not None:
+            found += 1
+
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=200)
+    args = parser.parse_args()
+
+    messages = load_corpus()
+
+    # Without a mention only bracketed references are looked up; when the bot is
+    # mentioned the much more expensive unbracketed pattern has to run
+    for mode, only_bracketed in (('not mentioned', True), ('mentioned', False)):
+        corpus = [(message, only_bracketed) for message in messages]
+        passed = sum(
+            may_contain_reference(message, only_bracketed=only_bracketed)
+            for message in messages
+        )
+
+        assert regex_only(corpus) == prefiltered(corpus)
+
+        print(f'{mode}: {passed} of {len(corpus)} messages pass the pre-check')
+
+        for name, func in (('regex only', regex_only), ('pre-check', prefiltered)):
+            best = min(Timer(partial(func, corpus)).repeat(5, args.number))
+            per_message = best / args.number / len(corpus) * 1_000_000
+            print(f'{name:>14}: {per_message:8.2f} \N{MICRO SIGN}s/message')
+
+
+if __name__ == '__main__':
+    main()
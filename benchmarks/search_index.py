@@ -0,0 +1,88 @@
+# Times building, saving and loading a SearchIndex over a Bible-sized synthetic corpus,
+# running queries the first time, and paging through their cached results.
+#
+#     python -m benchmarks.search_index [--verses N] [--number N]
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+from pathlib import Path
+from time import perf_counter
+from timeit import Timer
+
+from erasmus.search_index import SearchIndex, VerseRow
+
+_queries = [
+    ['w1'],
+    ['w12', 'w40'],
+    ['w3 w4'],
+    ['w10*'],
+    ['w2', 'w7*', 'w5 w6'],
+]
+
+
+# Word frequencies follow Zipf's law, roughly like natural text
+def make_corpus(verses: int, /) -> list[VerseRow]:
+    rng = random.Random(0)
+    words = [f'w{rank}' for rank in range(1, 12_001)]
+    weights = [1 / rank for rank in range(1, 12_001)]
+    rows: list[VerseRow] = []
+
+    for number in range(verses):
+        text = ' '.join(rng.choices(words, weights, k=rng.randint(8, 40)))
+        rows.append((number // 1000 + 1, number // 30 % 150 + 1, number % 30 + 1, text))
+
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--verses', type=int, default=31_102)
+    parser.add_argument('--number', type=int, default=1000)
+    args = parser.parse_args()
+
+    rows = make_corpus(args.verses)
+
+    start = perf_counter()
+    index = SearchIndex.build(rows)
+    print(f'build: {perf_counter() - start:.2f}s for {len(index)} verses')
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'bench.idx'
+
+        start = perf_counter()
+        index.save(path)
+        print(f'save: {perf_counter() - start:.2f}s, {path.stat().st_size:,} bytes')
+
+        start = perf_counter()
+        index = SearchIndex.load(path)
+        print(f'load: {perf_counter() - start:.2f}s')
+
+    for ranking in ('canonical', 'bm25'):
+        print(ranking)
+
+        for terms in _queries:
+            start = perf_counter()
+            _, total = index.search(terms, limit=20, ranking=ranking)
+            first = (perf_counter() - start) * 1000
+
+            # Later pages come from the cached results
+            offset = max(total - 20, 0)
+            best = min(
+                Timer(
+                    lambda: index.search(
+                        terms, limit=20, offset=offset, ranking=ranking
+                    )
+                ).repeat(5, args.number)
+            )
+            page = best / args.number * 1_000_000
+
+            print(
+                f'{" ".join(terms):>18}: {total:6} results, first {first:7.2f}ms, '
+                f'page {page:6.1f}\N{MICRO SIGN}s'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+# Measures Unbound search: the time to parse a result page with and without the
+# table strainer, and to page through every result when each page turn fetches and
+# parses the page again versus slicing the cached results. There are no recorded
+# Unbound cassettes, so the page is generated in the layout Unbound returns.
+#
+#     python -m benchmarks.unbound_search [--results N] [--number N]
+from __future__ import annotations
+
+import argparse
+import asyncio
+from time import perf_counter
+
+from erasmus.services import unbound
+from erasmus.services.unbound import Unbound
+
+_books = ('Genesis', 'Exodus', 'Psalms', 'Isaiah', 'Matthew', 'John', 'Romans')
+
+
+class Bible(object):
+    __slots__ = ('abbr', 'service_version', 'rtl')
+
+    def __init__(self, abbr: str, /) -> None:
+        self.abbr = abbr
+        self.service_version = abbr
+        self.rtl = False
+
+
+class Response(object):
+    __slots__ = ('body',)
+
+    def __init__(self, body: bytes, /) -> None:
+        self.body = body
+
+    async def __aenter__(self) -> Response:
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        pass
+
+    async def read(self) -> bytes:
+        # Yield to the loop the way a network read would
+        await asyncio.sleep(0)
+        return self.body
+
+    def get_encoding(self) -> str:
+        return 'utf-8'
+
+
+class Session(object):
+    __slots__ = ('body', 'requests')
+
+    def __init__(self, body: bytes, /) -> None:
+        self.body = body
+        self.requests = 0
+
+    def post(self, url: object) -> Response:
+        self.requests += 1
+        return Response(self.body)
+
+
+def make_page(results: int) -> bytes:
+    rows = ['<tr><td colspan="2">Search results</td></tr>']
+
+    for index in range(results):
+        if index % 10 == 0:
+            book = _books[index // 10 % len(_books)]
+            rows.append(f'<tr><td>&nbsp;</td><td>{book} {index // 10 + 1}</td></tr>')
+
+        rows.append(
+            f'<tr><td>{index % 10 + 1}.</td><td>And the faith of the servants was '
+            f'great in the land, and the word went out to all of them.</td></tr>'
+        )
+
+    rows.append(f'<tr><td colspan="2">{results} verses found</td></tr>')
+    rows.append('<tr><td colspan="2">&nbsp;</td></tr>')
+
+    nav = ''.join(
+        f'<li><a href="/page/{index}">Page {index}</a></li>' for index in range(300)
+    )
+    script = 'var x = 1;' * 2000
+
+    return (
+        '<html><head><title>Unbound Bible</title>'
+        f'<script>{script}</script></head><body>'
+        f'<div id="nav"><ul>{nav}</ul></div>'
+        '<table><tr><td><table><tr><td><table>'
+        f'{"".join(rows)}'
+        '</table></td></tr></table></td></tr></table>'
+        f'<div id="footer"><ul>{nav}</ul></div>'
+        '</body></html>'
+    ).encode()
+
+
+async def run(results: int, number: int) -> None:
+    body = make_page(results)
+    bible = Bible('kjv')
+
+    for name, strainer in (('full parse', None), ('strainer', unbound._table_strainer)):
+        unbound._table_strainer = strainer  # type: ignore
+        session = Session(body)
+        service = Unbound(config=None, session=session)  # type: ignore
+
+        timings = []
+        for _ in range(number):
+            service._searches.clear()
+            start = perf_counter()
+            await service.search(bible, ['faith'])
+            timings.append(perf_counter() - start)
+
+        print(
+            f'{name:>12} ({len(body) // 1024:4} KiB, {results} results): '
+            f'{min(timings) * 1000:7.2f} ms/page'
+        )
+
+    for name, cached in (('uncached', False), ('cached', True)):
+        session = Session(body)
+        service = Unbound(config=None, session=session)  # type: ignore
+        start = perf_counter()
+
+        for offset in range(0, results, 5):
+            if not cached:
+                service._searches.clear()
+
+            response = await service.search(bible, ['faith'], limit=5, offset=offset)
+            assert response.total == results
+
+        print(
+            f'{name:>12} paging through {results // 5} pages: '
+            f'{(perf_counter() - start) * 1000:8.2f} ms, {session.requests} requests'
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--results', type=int, default=500)
+    parser.add_argument('--number', type=int, default=10)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.results, args.number))
+
+
+if __name__ == '__main__':
+    main()
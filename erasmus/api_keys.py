@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from time import monotonic
+from typing import Any
+
+from attr import attrib, dataclass
+
+
+def _get_day() -> int:
+    return datetime.now(timezone.utc).toordinal()
+
+
+@dataclass(slots=True)
+class _Key(object):
+    key: str
+    requests: int = 0
+    requests_today: int = 0
+    day: int = 0
+    throttled: int = 0
+    cooling_until: float = 0
+
+
+# Spreads requests over several API keys in turn. A key that gets a 429 is skipped
+# until its Retry-After, or cooldown seconds, has passed; if every key is cooling
+# down the one that recovers first is used. Requests are counted per key and per UTC
+# day, which is how the provider's quotas are counted, and keys are named by their
+# position in the config so the stats don't show them.
+@dataclass(slots=True)
+class ApiKeyPool(object):
+    keys: tuple[str, ...]
+    cooldown: float = 60.0
+    _keys: list[_Key] = attrib(init=False)
+    _next: int = attrib(init=False, default=0)
+
+    def __attrs_post_init__(self, /) -> None:
+        self._keys = [_Key(key) for key in self.keys]
+
+    def __len__(self, /) -> int:
+        return len(self._keys)
+
+    def is_available(self, /) -> bool:
+        now = monotonic()
+
+        return any(key.cooling_until <= now for key in self._keys)
+
+    def get(self, /) -> str:
+        now = monotonic()
+        count = len(self._keys)
+        chosen: _Key | None = None
+
+        for offset in range(count):
+            key = self._keys[(self._next + offset) % count]
+
+            if key.cooling_until <= now:
+                chosen = key
+                self._next = (self._next + offset + 1) % count
+                break
+        else:
+            chosen = min(self._keys, key=lambda key: key.cooling_until)
+
+        if (day := _get_day()) != chosen.day:
+            chosen.day = day
+            chosen.requests_today = 0
+
+        chosen.requests += 1
+        chosen.requests_today += 1
+
+        return chosen.key
+
+    def record_throttled(self, key: str, retry_after: float | None = None, /) -> None:
+        for item in self._keys:
+            if item.key == key:
+                item.throttled += 1
+                item.cooling_until = monotonic() + (
+                    retry_after if retry_after is not None else self.cooldown
+                )
+
+    def get_stats(self, name: str, /) -> dict[str, int]:
+        now = monotonic()
+        day = _get_day()
+        stats: dict[str, int] = {}
+
+        for index, key in enumerate(self._keys, 1):
+            stats[f'{name} key {index} requests'] = key.requests
+            stats[f'{name} key {index} requests today'] = (
+                key.requests_today if key.day == day else 0
+            )
+            stats[f'{name} key {index} throttled'] = key.throttled
+
+        stats[f'{name} keys cooling down'] = sum(
+            key.cooling_until > now for key in self._keys
+        )
+
+        return stats
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any] | None, /) -> ApiKeyPool:
+        if not config:
+            return cls(())
+
+        keys: Iterable[str] = config.get('api_keys') or (config.get('api_key', ''),)
+
+        return cls(tuple(keys), cooldown=config.get('key_cooldown', 60.0))
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from collections import deque
+from time import monotonic
+from typing import Any
+
+from attr import attrib, dataclass
+
+BackendKey = tuple[str, str]
+
+
+@dataclass(slots=True)
+class _Backend(object):
+    latencies: deque[float]
+    failures: int = 0
+    opened_at: float | None = None
+
+
+# Tracks each (service, service_version) backend's recent latencies and failures.
+# A backend's hedge delay is its observed p95, or default_delay until it has
+# min_samples. After failure_threshold consecutive failures a backend is skipped
+# until recovery_time has passed; then requests are let through again, and the
+# first success closes the circuit while another failure restarts the wait.
+@dataclass(slots=True)
+class BackendHealth(object):
+    default_delay: float = 2.0
+    min_samples: int = 20
+    max_samples: int = 200
+    failure_threshold: int = 5
+    recovery_time: float = 30.0
+    _backends: dict[BackendKey, _Backend] = attrib(init=False, factory=dict)
+
+    def __get(self, key: BackendKey, /) -> _Backend:
+        if (backend := self._backends.get(key)) is None:
+            backend = self._backends[key] = _Backend(deque(maxlen=self.max_samples))
+
+        return backend
+
+    def get_hedge_delay(self, key: BackendKey, /) -> float:
+        latencies = self.__get(key).latencies
+
+        if len(latencies) < self.min_samples:
+            return self.default_delay
+
+        return sorted(latencies)[int(len(latencies) * 0.95)]
+
+    def is_available(self, key: BackendKey, /) -> bool:
+        opened_at = self.__get(key).opened_at
+
+        return opened_at is None or monotonic() - opened_at >= self.recovery_time
+
+    # Latencies are left out for requests that take longer than a single lookup,
+    # such as batches, so they don't stretch the hedge delay
+    def record_success(self, key: BackendKey, elapsed: float | None = None, /) -> None:
+        backend = self.__get(key)
+
+        if elapsed is not None:
+            backend.latencies.append(elapsed)
+
+        backend.failures = 0
+        backend.opened_at = None
+
+    def record_failure(self, key: BackendKey, /) -> None:
+        backend = self.__get(key)
+        backend.failures += 1
+
+        if backend.failures >= self.failure_threshold:
+            backend.opened_at = monotonic()
+
+    def get_stats(self, /) -> dict[str, int]:
+        return {
+            'backends unavailable': sum(
+                not self.is_available(key) for key in self._backends
+            ),
+        }
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any] | None, /) -> BackendHealth:
+        if not config:
+            return cls()
+
+        return cls(
+            default_delay=config.get('default_delay', 2.0),
+            min_samples=config.get('min_samples', 20),
+            max_samples=config.get('max_samples', 200),
+            failure_threshold=config.get('failure_threshold', 5),
+            recovery_time=config.get('recovery_time', 30.0),
+        )
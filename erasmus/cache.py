@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Final
+
+from attr import attrib, dataclass
+
+from .data import VerseRange
+from .db.cache import CachedPassage
+from .lru import LRUCache
+from .protocols import Bible
+from .services.tokens import Chapter
+
+_log: Final = logging.getLogger(__name__)
+
+PassageKey = tuple[str, str, str, int, int, int, int]
+ChapterKey = tuple[str, str, str, int]
+
+
+def get_passage_key(bible: Bible, verses: VerseRange, /) -> PassageKey:
+    end = verses.end if verses.end is not None else verses.start
+
+    return (
+        bible.service,
+        bible.service_version,
+        verses.book,
+        verses.start.chapter,
+        verses.start.verse,
+        end.chapter,
+        end.verse,
+    )
+
+
+def get_chapter_key(bible: Bible, book: str, chapter: int, /) -> ChapterKey:
+    return (bible.service, bible.service_version, book, chapter)
+
+
+def _reference(key: PassageKey, /) -> str:
+    return '{}|{}:{}-{}:{}'.format(*key[2:])
+
+
+@dataclass(slots=True)
+class PassageCache(object):
+    max_size: int = 2048
+    max_text_size: int | None = 8 * 1024 * 1024
+    ttl: float = 24 * 60 * 60
+    persist: bool = False
+    # Whether passages are sliced from cached chapters for services that support it
+    chapters: bool = False
+    max_chapters: int = 256
+    persistent_hits: int = attrib(init=False, default=0)
+    _memory: LRUCache[PassageKey, str] = attrib(init=False)
+    _chapters: LRUCache[ChapterKey, Chapter] = attrib(init=False)
+
+    def __attrs_post_init__(self, /) -> None:
+        self._memory = LRUCache(
+            max_size=self.max_size,
+            max_weight=self.max_text_size,
+            ttl=self.ttl,
+            weigher=len,
+        )
+        self._chapters = LRUCache(max_size=self.max_chapters, ttl=self.ttl)
+
+    @property
+    def hits(self, /) -> int:
+        return self._memory.hits
+
+    @property
+    def misses(self, /) -> int:
+        return self._memory.misses - self.persistent_hits
+
+    async def get(self, bible: Bible, verses: VerseRange, /) -> str | None:
+        key = get_passage_key(bible, verses)
+
+        if (text := self._memory.get(key)) is not None:
+            return text
+
+        if not self.persist:
+            return None
+
+        try:
+            cached = await CachedPassage.get_fresh(
+                key[0],
+                key[1],
+                _reference(key),
+                datetime.now(timezone.utc) - timedelta(seconds=self.ttl),
+            )
+        except Exception:
+            _log.exception('Error reading %s from the passage cache', verses)
+            return None
+
+        if cached is None:
+            return None
+
+        self.persistent_hits += 1
+        self._memory.set(key, cached.text)
+
+        return cached.text
+
+    async def set(self, bible: Bible, verses: VerseRange, text: str, /) -> None:
+        key = get_passage_key(bible, verses)
+        self._memory.set(key, text)
+
+        if not self.persist:
+            return
+
+        try:
+            await CachedPassage.store(key[0], key[1], _reference(key), text)
+        except Exception:
+            _log.exception('Error writing %s to the passage cache', verses)
+
+    def get_chapter(self, bible: Bible, book: str, chapter: int, /) -> Chapter | None:
+        return self._chapters.get(get_chapter_key(bible, book, chapter))
+
+    def set_chapter(
+        self,
+        bible: Bible,
+        book: str,
+        chapter: int,
+        value: Chapter,
+        /,
+    ) -> None:
+        self._chapters.set(get_chapter_key(bible, book, chapter), value)
+
+    async def purge(self, /) -> int:
+        count = self._memory.clear() + self._chapters.clear()
+
+        if self.persist:
+            count = max(count, await CachedPassage.purge())
+
+        return count
+
+    def get_stats(self, /) -> dict[str, int]:
+        return {
+            'cache entries': len(self._memory),
+            'cache text size': self._memory.weight,
+            'cache hits': self.hits,
+            'cache persistent hits': self.persistent_hits,
+            'cache misses': self.misses,
+            'cache evictions': self._memory.evictions,
+            'cache chapters': len(self._chapters),
+            'cache chapter hits': self._chapters.hits,
+            'cache chapter misses': self._chapters.misses,
+        }
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any] | None, /) -> PassageCache:
+        if not config:
+            return cls()
+
+        return cls(
+            max_size=config.get('max_size', 2048),
+            max_text_size=config.get('max_text_size', 8 * 1024 * 1024),
+            ttl=config.get('ttl', 24 * 60 * 60),
+            persist=config.get('persist', False),
+            chapters=config.get('chapters', False),
+            max_chapters=config.get('max_chapters', 256),
+        )
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 from typing import Any, Final, Protocol, TypeVar, cast
 
 import discord
@@ -9,7 +10,7 @@ from discord.ext import commands
 
 from ..context import Context
 from ..data import Passage, SearchResults, VerseRange, get_book, get_book_mask
-from ..db.bible import BibleVersion, GuildPref, UserPref
+from ..db.bible import BibleVersion
 from ..erasmus import Erasmus
 from ..exceptions import (
     BibleNotSupportedError,
@@ -176,6 +177,8 @@ class Bible(Cog[Context]):
         self.bot = bot
 
         self.service_manager = ServiceManager.from_config(bot.config, bot.session)
+        self.lookup_concurrency = bot.config.get('lookup_concurrency', 4)
+        self._versions_text: dict[str, str] = {}
         self._user_cooldown = commands.CooldownMapping.from_cooldown(
             8, 60.0, commands.BucketType.user
         )
@@ -186,10 +189,26 @@ class Bible(Cog[Context]):
     def __pre_inject__(self, bot: commands.Bot[Context], /) -> None:
         self.bot.loop.run_until_complete(self.__init())
 
+    # Bot.close() awaits this before unloading the cog, so services can finish
+    # sending what they have queued before the bot's session closes
+    async def close(self, /) -> None:
+        await self.service_manager.close()
+
+    # cog_unload can't wait, so unloading the extension on its own closes the
+    # services in the background
+    def cog_unload(self, /) -> None:
+        asyncio.ensure_future(self.service_manager.close())
+
     async def __init(self, /) -> None:
-        async for version in BibleVersion.get_all():
+        await BibleVersion.load_registry()
+
+        versions = [version async for version in BibleVersion.get_all()]
+
+        for version in versions:
             self.__add_bible_commands(version.command, version.name)
 
+        await self.service_manager.prepare(versions)
+
     async def lookup_from_message(
         self,
         ctx: Context,
@@ -212,26 +231,71 @@ class Bible(Cog[Context]):
             user_bible = await BibleVersion.get_for_user(
                 ctx.author.id, ctx.guild.id if ctx.guild is not None else None
             )
-
-            for i, verse_range in enumerate(verse_ranges):
-                if i > 0:
+            semaphore = asyncio.Semaphore(self.lookup_concurrency)
+            loop = asyncio.get_running_loop()
+            futures: list[asyncio.Future[Passage]] = [
+                loop.create_future() for _ in verse_ranges
+            ]
+            groups: dict[str, tuple[BibleVersion, list[int]]] = {}
+
+            async def get_bible(verse_range: VerseRange, /) -> BibleVersion:
+                if verse_range.version is not None and (
+                    bible := await BibleVersion.get_by_abbr(verse_range.version)
+                ):
+                    return bible
+
+                return user_bible
+
+            # Group the references by version, so each version's passages can be
+            # fetched in one call. Every reference after the first is charged to the
+            # cooldown here, before anything is fetched.
+            for index, verse_range in enumerate(verse_ranges):
+                if index > 0:
                     bucket.update_rate_limit()
 
-                bible: BibleVersion | None = None
+                if isinstance(verse_range, Exception):
+                    futures[index].set_exception(verse_range)
+                    continue
 
                 try:
-                    if isinstance(verse_range, Exception):
-                        raise verse_range
-
-                    if verse_range.version is not None:
-                        bible = await BibleVersion.get_by_abbr(verse_range.version)
+                    bible = await get_bible(verse_range)
+                except Exception as error:
+                    futures[index].set_exception(error)
+                    continue
 
-                    if bible is None:
-                        bible = user_bible
+                groups.setdefault(bible.command, (bible, []))[1].append(index)
 
-                    await self.__lookup(ctx, bible, verse_range)
-                except Exception as exc:
-                    await self.bot.on_command_error(ctx, exc)
+            async def get_passages(bible: BibleVersion, indexes: list[int], /) -> None:
+                try:
+                    results = await self.__get_passages(
+                        bible,
+                        [cast(VerseRange, verse_ranges[i]) for i in indexes],
+                        semaphore,
+                    )
+                except Exception as error:
+                    results = [error] * len(indexes)
+
+                for index, result in zip(indexes, results):
+                    if isinstance(result, Exception):
+                        futures[index].set_exception(result)
+                    else:
+                        futures[index].set_result(result)
+
+            # Fetch every version's passages concurrently, but reply in message order
+            tasks = [
+                asyncio.ensure_future(get_passages(bible, indexes))
+                for bible, indexes in groups.values()
+            ]
+
+            try:
+                for future in futures:
+                    try:
+                        await ctx.send_passage(await future)
+                    except Exception as exc:
+                        await self.bot.on_command_error(ctx, exc)
+            finally:
+                for task in tasks:
+                    task.cancel()
 
     async def cog_command_error(self, ctx: Context, error: Exception, /) -> None:
         if (
@@ -274,12 +338,12 @@ class Bible(Cog[Context]):
         elif isinstance(error, ServiceTimeout):
             if isinstance(error, ServiceLookupTimeout):
                 message = (
-                    f'The request timed out looking up {error.verses} in '
-                    + error.bible.name
+                    f'The request timed out after {error.timeout:.1f}s looking up '
+                    f'{error.verses} in {error.bible.name}'
                 )
             elif isinstance(error, ServiceSearchTimeout):
                 message = (
-                    f'The request timed out searching for '
+                    f'The request timed out after {error.timeout:.1f}s searching for '
                     f'"{" ".join(error.terms)}" in {error.bible.name}'
                 )
         else:
@@ -317,19 +381,21 @@ class Bible(Cog[Context]):
     )
     @commands.cooldown(rate=2, per=30.0, type=commands.BucketType.channel)
     async def versions(self, ctx: Context, /) -> None:
-        lines = ['I support the following Bible versions:', '']
+        if (output := self._versions_text.get(ctx.prefix)) is None:
+            lines = ['I support the following Bible versions:', '']
 
-        lines += [
-            f'  `{ctx.prefix}{version.command}`: {version.name}'
-            async for version in BibleVersion.get_all(ordered=True)
-        ]
+            lines += [
+                f'  `{ctx.prefix}{version.command}`: {version.name}'
+                async for version in BibleVersion.get_all(ordered=True)
+            ]
 
-        lines.append(
-            "\nYou can search any version by prefixing the version command with 's' "
-            f'(ex. `{ctx.prefix}sesv terms...`)'
-        )
+            lines.append(
+                "\nYou can search any version by prefixing the version command with "
+                f"'s' (ex. `{ctx.prefix}sesv terms...`)"
+            )
+
+            output = self._versions_text[ctx.prefix] = '\n'.join(lines)
 
-        output = '\n'.join(lines)
         await ctx.send_embed(f'\n{output}\n')
 
     @commands.command(brief='Set your preferred version', help=_setversion_help)
@@ -347,10 +413,7 @@ class Bible(Cog[Context]):
     @commands.command(brief='Delete your preferred version', help=_unsetversion_help)
     @commands.cooldown(rate=2, per=60.0, type=commands.BucketType.user)
     async def unsetversion(self, ctx: Context, /) -> None:
-        user_prefs = await UserPref.get(ctx.author.id)
-
-        if user_prefs is not None:
-            await user_prefs.delete()
+        if await BibleVersion.unset_for_user(ctx.author.id):
             await ctx.send_embed('Preferred version deleted')
         else:
             await ctx.send_embed('Preferred version already deleted')
@@ -380,8 +443,7 @@ class Bible(Cog[Context]):
     async def unsetguildversion(self, ctx: Context, /) -> None:
         assert ctx.guild is not None
 
-        if (guild_prefs := await GuildPref.get(ctx.guild.id)) is not None:
-            await guild_prefs.delete()
+        if await BibleVersion.unset_for_guild(ctx.guild.id):
             await ctx.send_embed('Guild version deleted')
         else:
             await ctx.send_embed('Guild version already deleted')
@@ -416,7 +478,7 @@ class Bible(Cog[Context]):
 
                 book_mask = book_mask | get_book_mask(get_book(book))
 
-            await BibleVersion.create(
+            version = await BibleVersion.create(
                 command=command,
                 name=name,
                 abbr=abbr,
@@ -428,6 +490,8 @@ class Bible(Cog[Context]):
         except UniqueViolationError:
             await ctx.send_error(f'`{command}` already exists')
         else:
+            version.register()
+            self._versions_text.clear()
             self.__add_bible_commands(command, name)
             await ctx.send_embed(f'Added `{command}` as "{name}"')
 
@@ -437,6 +501,8 @@ class Bible(Cog[Context]):
     async def delete_bible(self, ctx: Context, command: str, /) -> None:
         version = await BibleVersion.get_by_command(command)
         await version.delete()
+        version.unregister()
+        self._versions_text.clear()
 
         self.__remove_bible_commands(command)
 
@@ -456,6 +522,7 @@ class Bible(Cog[Context]):
         version = await BibleVersion.get_by_command(command)
 
         try:
+            # apply() updates the registered instance in place
             await version.update(
                 service=service, service_version=service_version
             ).apply()
@@ -464,6 +531,50 @@ class Bible(Cog[Context]):
         else:
             await ctx.send_embed(f'Updated `{command}`')
 
+    @commands.command(name='fallbackbible')
+    @checks.dm_only()
+    @commands.is_owner()
+    async def fallback_bible(
+        self, ctx: Context, command: str, /, *backends: str
+    ) -> None:
+        fallbacks: list[list[str]] = []
+
+        for backend in backends:
+            service, _, service_version = backend.partition(':')
+
+            if service not in self.service_manager or not service_version:
+                await ctx.send_error(f'`{backend}` is not a valid service:version')
+                return
+
+            fallbacks.append([service, service_version])
+
+        version = await BibleVersion.get_by_command(command)
+
+        try:
+            await version.update(fallbacks=fallbacks).apply()
+        except Exception:
+            await ctx.send_error(f'Error updating `{command}`')
+        else:
+            await ctx.send_embed(f'Updated fallbacks for `{command}`')
+
+    @commands.command(name='purgecache')
+    @checks.dm_only()
+    @commands.is_owner()
+    async def purge_cache(self, ctx: Context, /) -> None:
+        count = await self.service_manager.cache.purge()
+
+        await ctx.send_embed(f'Purged {count} cached passages')
+
+    @commands.command(name='servicestats', hidden=True)
+    @commands.is_owner()
+    async def service_stats(self, ctx: Context, /) -> None:
+        lines = [
+            f'{name}: {value}'
+            for name, value in self.service_manager.get_stats().items()
+        ]
+
+        await ctx.send(formatting.code_block('\n'.join(lines)))
+
     async def __version_lookup(self, ctx: Context, /, *, reference: VerseRange) -> None:
         bible = await BibleVersion.get_by_command(cast(str, ctx.invoked_with))
 
@@ -475,23 +586,52 @@ class Bible(Cog[Context]):
 
         await self.__search(ctx, bible, *terms)
 
-    async def __lookup(
+    async def __get_passage(
         self,
-        ctx: Context,
         bible: BibleVersion,
         reference: VerseRange,
         /,
-    ) -> None:
+    ) -> Passage:
         if not (bible.books & reference.book_mask):
             raise BookNotInVersionError(reference.book, bible.name)
 
-        if reference is not None:
-            passage = await self.service_manager.get_passage(
-                cast(Any, bible), reference
-            )
-            await ctx.send_passage(passage)
-        else:
-            await ctx.send_error(f'I do not understand the request `${reference}`')
+        return await self.service_manager.get_passage(cast(Any, bible), reference)
+
+    async def __get_passages(
+        self,
+        bible: BibleVersion,
+        references: list[VerseRange],
+        semaphore: asyncio.Semaphore,
+        /,
+    ) -> list[Passage | Exception]:
+        results: list[Passage | Exception] = []
+        indexes: list[int] = []
+
+        for reference in references:
+            if bible.books & reference.book_mask:
+                indexes.append(len(results))
+            results.append(BookNotInVersionError(reference.book, bible.name))
+
+        passages = await self.service_manager.get_passages(
+            cast(Any, bible),
+            [references[index] for index in indexes],
+            semaphore=semaphore,
+        )
+
+        for index, passage in zip(indexes, passages):
+            results[index] = passage
+
+        return results
+
+    async def __lookup(
+        self,
+        ctx: Context,
+        bible: BibleVersion,
+        reference: VerseRange,
+        /,
+    ) -> None:
+        passage = await self.__get_passage(bible, reference)
+        await ctx.send_passage(passage)
 
     async def __search(self, ctx: Context, bible: BibleVersion, /, *terms: str) -> None:
         if not terms:
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 from collections.abc import AsyncIterator, Callable, Sequence
 from re import Match
 from typing import Any, Final, Optional, Union, cast
 
-from botus_receptus import Cog, re
+from botus_receptus import Cog, formatting, re
 from botus_receptus.formatting import (
     EmbedPaginator,
     bold,
@@ -14,6 +16,7 @@ from botus_receptus.formatting import (
 )
 from discord.ext import commands
 
+from ..confession_corpus import ConfessionCorpus, CorpusConfession, get_schema_version
 from ..context import Context
 from ..db.confession import Article
 from ..db.confession import Confession as ConfessionRecord
@@ -21,7 +24,9 @@ from ..db.confession import ConfessionTypeEnum, NumberingTypeEnum, Paragraph, Qu
 from ..erasmus import Erasmus
 from ..exceptions import InvalidConfessionError, NoSectionError, NoSectionsError
 from ..format import int_to_roman, roman_to_int
-from ..menu_pages import EmbedPageSource, MenuPages, TotalListPageSource
+from ..menu_pages import EmbedPageSource, MenuPages
+
+_log: Final = logging.getLogger(__name__)
 
 _pluralize_match: Final = pluralizer('match', 'es')
 
@@ -113,36 +118,78 @@ Examples:
 
 
 ConfessionSearchResult = Union[Paragraph, Article, Question]
+AnyConfession = Union[ConfessionRecord, CorpusConfession]
 
 
-class ConfessionSearchSource(
-    TotalListPageSource[ConfessionSearchResult],
-    EmbedPageSource[list[ConfessionSearchResult]],
-):
+class ConfessionSearchSource(EmbedPageSource[list[ConfessionSearchResult]]):
     entry_text_string: str
+    max_pages: int
+    total: int
 
     def __init__(
         self,
-        entries: list[ConfessionSearchResult],
+        confession: AnyConfession,
+        terms: Sequence[str],
         /,
         *,
         per_page: int,
-        type: ConfessionTypeEnum,
     ) -> None:
-        super().__init__(entries, per_page=per_page)
+        self.confession = confession
+        self.terms = terms
+        self.per_page = per_page
+        self.cache: dict[int, list[ConfessionSearchResult]] = {}
 
-        if type == ConfessionTypeEnum.CHAPTERS:
+        if confession.type == ConfessionTypeEnum.CHAPTERS:
             self.entry_text_string = (
                 '**{entry.chapter_number}.{entry.paragraph_number}**. '
                 '{entry.chapter.chapter_title}'
             )
-        elif type == ConfessionTypeEnum.ARTICLES:
+        elif confession.type == ConfessionTypeEnum.ARTICLES:
             self.entry_text_string = '**{entry.article_number}**. {entry.title}'
-        elif type == ConfessionTypeEnum.QA:
+        elif confession.type == ConfessionTypeEnum.QA:
             self.entry_text_string = (
                 '**{entry.question_number}**. {entry.question_text}'
             )
 
+    async def prepare(self, /) -> None:
+        await super().prepare()
+
+        self.total = await self.confession.search_count(self.terms)
+        max_pages, left_over = divmod(self.total, self.per_page)
+
+        if left_over:
+            max_pages += 1
+
+        self.max_pages = max_pages
+
+    def get_max_pages(self, /) -> int:
+        return self.max_pages
+
+    def get_total(self, /) -> int:
+        return self.total
+
+    def is_paginating(self, /) -> bool:
+        return self.total > self.per_page
+
+    async def get_page(self, page_number: int, /) -> list[ConfessionSearchResult]:
+        if page_number in self.cache:
+            return self.cache[page_number]
+
+        # Continue from the previous page when it has been seen, which lets the
+        # database skip straight to it instead of counting off rows
+        if previous := self.cache.get(page_number - 1):
+            entries = await self.confession.search(
+                self.terms, limit=self.per_page, after=previous[-1]
+            )
+        else:
+            entries = await self.confession.search(
+                self.terms, limit=self.per_page, offset=page_number * self.per_page
+            )
+
+        self.cache[page_number] = entries
+
+        return entries
+
     async def set_page_text(self, entries: list[ConfessionSearchResult], /) -> None:
         lines: list[str] = []
 
@@ -153,9 +200,50 @@ class ConfessionSearchSource(
 
 
 class Confession(Cog[Context]):
+    corpus: ConfessionCorpus | None
+    _corpus_check: asyncio.Task[None] | None
+
     def __init__(self, bot: Erasmus, /) -> None:
         self.bot = bot
 
+        corpus_config = bot.config.get('confession_corpus') or {}
+        self.corpus_enabled: bool = corpus_config.get('enabled', False)
+        self.corpus_check_interval: float = corpus_config.get('check_interval', 600)
+        self.corpus = None
+        self._corpus_check = None
+
+    def __pre_inject__(self, bot: commands.Bot[Context], /) -> None:
+        if self.corpus_enabled:
+            self.bot.loop.run_until_complete(self.__load_corpus())
+            self._corpus_check = self.bot.loop.create_task(self.__check_corpus())
+
+    def cog_unload(self, /) -> None:
+        if self._corpus_check is not None:
+            self._corpus_check.cancel()
+
+    async def __load_corpus(self, /) -> None:
+        try:
+            self.corpus = await ConfessionCorpus.load()
+        except Exception:
+            _log.exception('Failed to load the confession corpus')
+
+    # The corpus is only reloaded when a migration has changed the schema version
+    async def __check_corpus(self, /) -> None:
+        while True:
+            await asyncio.sleep(self.corpus_check_interval)
+
+            try:
+                version = await get_schema_version()
+            except Exception:
+                _log.exception('Failed to check the confession schema version')
+                continue
+
+            if self.corpus is None or self.corpus.schema_version != version:
+                await self.__load_corpus()
+
+    def __get_source(self, /) -> Any:
+        return self.corpus if self.corpus is not None else ConfessionRecord
+
     async def cog_command_error(self, ctx: Context, error: Exception, /) -> None:
         if (
             isinstance(
@@ -194,7 +282,7 @@ class Confession(Cog[Context]):
             await self.list(ctx)
             return
 
-        row = await ConfessionRecord.get_by_command(confession)
+        row: AnyConfession = await self.__get_source().get_by_command(confession)
 
         if len(args) == 0:
             await self.list_contents(ctx, row)
@@ -210,7 +298,7 @@ class Confession(Cog[Context]):
         paginator = EmbedPaginator()
         paginator.add_line('I support the following confessions:', empty=True)
 
-        async for conf in ConfessionRecord.get_all():
+        async for conf in self.__get_source().get_all():
             paginator.add_line(f'  `{conf.command}`: {conf.name}')
 
         for page in paginator:
@@ -219,7 +307,7 @@ class Confession(Cog[Context]):
     async def list_contents(
         self,
         ctx: Context,
-        confession: ConfessionRecord,
+        confession: AnyConfession,
         /,
     ) -> None:
         if (
@@ -233,7 +321,7 @@ class Confession(Cog[Context]):
     async def list_sections(
         self,
         ctx: Context,
-        confession: ConfessionRecord,
+        confession: AnyConfession,
         /,
     ) -> None:
         paginator = EmbedPaginator()
@@ -267,7 +355,7 @@ class Confession(Cog[Context]):
     async def list_questions(
         self,
         ctx: Context,
-        confession: ConfessionRecord,
+        confession: AnyConfession,
         /,
     ) -> None:
         count = await confession.get_question_count()
@@ -276,22 +364,9 @@ class Confession(Cog[Context]):
         await ctx.send_embed(f'`{confession.name}` has {question_str}')
 
     async def search(
-        self, ctx: Context, confession: ConfessionRecord, /, *terms: str
+        self, ctx: Context, confession: AnyConfession, /, *terms: str
     ) -> None:
-        if confession.type == ConfessionTypeEnum.CHAPTERS:
-            search_func: Callable[
-                [Sequence[str]], AsyncIterator[ConfessionSearchResult]
-            ] = confession.search_paragraphs
-        elif confession.type == ConfessionTypeEnum.ARTICLES:
-            search_func = confession.search_articles
-        else:  # ConfessionTypeEnum.QA
-            search_func = confession.search_questions
-
-        source = ConfessionSearchSource(
-            [result async for result in search_func(terms)],
-            type=confession.type,
-            per_page=20,
-        )
+        source = ConfessionSearchSource(confession, terms, per_page=20)
         menu = MenuPages(source, 'I found 0 results')
 
         await menu.start(ctx)
@@ -299,7 +374,7 @@ class Confession(Cog[Context]):
     async def show_item(
         self,
         ctx: Context,
-        confession: ConfessionRecord,
+        confession: AnyConfession,
         match: Match[str],
         /,
     ) -> None:
@@ -365,6 +440,17 @@ class Confession(Cog[Context]):
             await ctx.send_embed(page, title=title)
             title = None
 
+    @commands.command(name='confessstats', hidden=True)
+    @commands.is_owner()
+    async def confess_stats(self, ctx: Context, /) -> None:
+        if self.corpus is None:
+            await ctx.send_embed('The confession corpus is not loaded')
+            return
+
+        lines = [f'{name}: {value}' for name, value in self.corpus.get_stats().items()]
+
+        await ctx.send(formatting.code_block('\n'.join(lines)))
+
 
 def setup(bot: Erasmus, /) -> None:
     bot.add_cog(Confession(bot))
@@ -32,13 +32,18 @@ class Misc(Cog[Context]):
     @commands.command(hidden=True)
     @commands.is_owner()
     async def stats(self, ctx: Context, /) -> None:
-        await ctx.send(
-            formatting.code_block(
-                f'''Servers: {len(self.bot.guilds)}
-Users: {len(self.bot.users)}'''
-            )
+        lines = [
+            f'Servers: {len(self.bot.guilds)}',
+            f'Users: {len(self.bot.users)}',
+            f'Messages: {self.bot.message_stats["received"]}',
+            f'Messages skipped by pre-check: {self.bot.message_stats["skipped"]}',
+        ]
+        lines.extend(
+            f'{name}: {value}' for name, value in self.bot.loop_lag.get_stats().items()
         )
 
+        await ctx.send(formatting.code_block('\n'.join(lines)))
+
 
 def setup(bot: Erasmus, /) -> None:
     bot.add_cog(Misc(bot))
@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import logging
+import sys
+from collections.abc import AsyncIterator, Iterable, Sequence
+from typing import Any, Final, cast
+
+import attr
+from attr import attrib, dataclass
+
+from .db.base import db
+from .db.confession import (
+    Article,
+    Chapter,
+    Confession,
+    ConfessionNumberingType,
+    ConfessionType,
+    ConfessionTypeEnum,
+    NumberingTypeEnum,
+    Paragraph,
+    Question,
+    SearchResult,
+)
+from .exceptions import InvalidConfessionError, NoSectionError, NoSectionsError
+
+_log: Final = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class CorpusChapter(object):
+    chapter_number: int
+    chapter_title: str
+
+
+@dataclass(slots=True)
+class CorpusParagraph(object):
+    chapter_number: int
+    paragraph_number: int
+    text: str
+    chapter: CorpusChapter
+
+
+@dataclass(slots=True)
+class CorpusQuestion(object):
+    question_number: int
+    question_text: str
+    answer_text: str
+
+
+@dataclass(slots=True)
+class CorpusArticle(object):
+    article_number: int
+    title: str
+    text: str
+
+
+# Serves the same lookups as the Confession model from memory. Searching still
+# goes through the database, which holds the full-text indexes.
+@dataclass(slots=True)
+class CorpusConfession(object):
+    record: Confession
+    chapters: list[CorpusChapter] = attrib(factory=list)
+    paragraphs: dict[tuple[int, int], CorpusParagraph] = attrib(factory=dict)
+    questions: dict[int, CorpusQuestion] = attrib(factory=dict)
+    articles: dict[int, CorpusArticle] = attrib(factory=dict)
+
+    @property
+    def id(self, /) -> int:
+        return cast(int, self.record.id)
+
+    @property
+    def command(self, /) -> str:
+        return cast(str, self.record.command)
+
+    @property
+    def name(self, /) -> str:
+        return cast(str, self.record.name)
+
+    @property
+    def type(self, /) -> ConfessionTypeEnum:
+        return self.record.type
+
+    @property
+    def numbering(self, /) -> NumberingTypeEnum:
+        return self.record.numbering
+
+    async def get_chapters(self, /) -> AsyncIterator[CorpusChapter]:
+        if not self.chapters:
+            raise NoSectionsError(self.name, 'chapters')
+
+        for chapter in self.chapters:
+            yield chapter
+
+    async def get_paragraph(self, chapter: int, paragraph: int, /) -> CorpusParagraph:
+        if (result := self.paragraphs.get((chapter, paragraph))) is None:
+            raise NoSectionError(self.name, f'{chapter}.{paragraph}', 'paragraph')
+
+        return result
+
+    async def get_questions(self, /) -> AsyncIterator[CorpusQuestion]:
+        for question in self.questions.values():
+            yield question
+
+    async def get_question_count(self, /) -> int:
+        return len(self.questions)
+
+    async def get_question(self, question_number: int, /) -> CorpusQuestion:
+        if (question := self.questions.get(question_number)) is None:
+            raise NoSectionError(self.name, f'{question_number}', 'question')
+
+        return question
+
+    async def get_articles(self, /) -> AsyncIterator[CorpusArticle]:
+        if not self.articles:
+            raise NoSectionsError(self.name, 'articles')
+
+        for article in self.articles.values():
+            yield article
+
+    async def get_article(self, article_number: int, /) -> CorpusArticle:
+        if (article := self.articles.get(article_number)) is None:
+            raise NoSectionError(self.name, f'{article_number}', 'article')
+
+        return article
+
+    async def search(
+        self,
+        terms: Sequence[str],
+        /,
+        *,
+        limit: int,
+        after: SearchResult | None = None,
+        offset: int = 0,
+    ) -> list[SearchResult]:
+        return await self.record.search(terms, limit=limit, after=after, offset=offset)
+
+    async def search_count(self, terms: Sequence[str], /) -> int:
+        return await self.record.search_count(terms)
+
+
+@dataclass(slots=True)
+class ConfessionCorpus(object):
+    schema_version: str | None
+    confessions: dict[str, CorpusConfession]
+
+    def __len__(self, /) -> int:
+        return len(self.confessions)
+
+    async def get_all(self, /) -> AsyncIterator[CorpusConfession]:
+        for confession in self.confessions.values():
+            yield confession
+
+    async def get_by_command(self, command: str, /) -> CorpusConfession:
+        if (confession := self.confessions.get(command.lower())) is None:
+            raise InvalidConfessionError(command)
+
+        return confession
+
+    def get_memory_usage(self, /) -> int:
+        return _get_size(self.confessions, set())
+
+    def get_stats(self, /) -> dict[str, int | str | None]:
+        return {
+            'schema version': self.schema_version,
+            'confessions': len(self.confessions),
+            'chapters': sum(len(c.chapters) for c in self.confessions.values()),
+            'paragraphs': sum(len(c.paragraphs) for c in self.confessions.values()),
+            'questions': sum(len(c.questions) for c in self.confessions.values()),
+            'articles': sum(len(c.articles) for c in self.confessions.values()),
+            'memory usage': self.get_memory_usage(),
+        }
+
+    @classmethod
+    async def load(cls, /) -> ConfessionCorpus:
+        schema_version = await get_schema_version()
+
+        # Only the columns that are served from memory are selected, which
+        # leaves out the search vectors
+        async with db.transaction():
+            records = (
+                await Confession.load(
+                    type=ConfessionType, numbering=ConfessionNumberingType
+                )
+                .query.order_by(db.asc(Confession.command))
+                .gino.all()
+            )
+            chapter_rows = await db.all(
+                db.select(
+                    [Chapter.confess_id, Chapter.chapter_number, Chapter.chapter_title]
+                ).order_by(Chapter.confess_id, Chapter.chapter_number)
+            )
+            paragraph_rows = await db.all(
+                db.select(
+                    [
+                        Paragraph.confess_id,
+                        Paragraph.chapter_number,
+                        Paragraph.paragraph_number,
+                        Paragraph.text,
+                    ]
+                ).order_by(
+                    Paragraph.confess_id,
+                    Paragraph.chapter_number,
+                    Paragraph.paragraph_number,
+                )
+            )
+            question_rows = await db.all(
+                db.select(
+                    [
+                        Question.confess_id,
+                        Question.question_number,
+                        Question.question_text,
+                        Question.answer_text,
+                    ]
+                ).order_by(Question.confess_id, Question.question_number)
+            )
+            article_rows = await db.all(
+                db.select(
+                    [
+                        Article.confess_id,
+                        Article.article_number,
+                        Article.title,
+                        Article.text,
+                    ]
+                ).order_by(Article.confess_id, Article.article_number)
+            )
+
+        corpus = cls.from_rows(
+            schema_version,
+            records,
+            chapter_rows,
+            paragraph_rows,
+            question_rows,
+            article_rows,
+        )
+
+        _log.info(
+            'Loaded %d confessions into memory (%d bytes)',
+            len(corpus),
+            corpus.get_memory_usage(),
+        )
+
+        return corpus
+
+    @classmethod
+    def from_rows(
+        cls,
+        schema_version: str | None,
+        records: Iterable[Confession],
+        chapter_rows: Iterable[Sequence[Any]],
+        paragraph_rows: Iterable[Sequence[Any]],
+        question_rows: Iterable[Sequence[Any]],
+        article_rows: Iterable[Sequence[Any]],
+        /,
+    ) -> ConfessionCorpus:
+        by_id = {record.id: CorpusConfession(record) for record in records}
+        chapters: dict[tuple[int, int], CorpusChapter] = {}
+
+        for confess_id, chapter_number, chapter_title in chapter_rows:
+            if (confession := by_id.get(confess_id)) is None:
+                continue
+
+            chapter = CorpusChapter(chapter_number, chapter_title)
+            chapters[confess_id, chapter_number] = chapter
+            confession.chapters.append(chapter)
+
+        for confess_id, chapter_number, paragraph_number, text in paragraph_rows:
+            if (confession := by_id.get(confess_id)) is None or (
+                chapter := chapters.get((confess_id, chapter_number))
+            ) is None:
+                continue
+
+            confession.paragraphs[chapter_number, paragraph_number] = CorpusParagraph(
+                chapter_number, paragraph_number, text, chapter
+            )
+
+        for confess_id, question_number, question_text, answer_text in question_rows:
+            if (confession := by_id.get(confess_id)) is not None:
+                confession.questions[question_number] = CorpusQuestion(
+                    question_number, question_text, answer_text
+                )
+
+        for confess_id, article_number, title, text in article_rows:
+            if (confession := by_id.get(confess_id)) is not None:
+                confession.articles[article_number] = CorpusArticle(
+                    article_number, title, text
+                )
+
+        return cls(
+            schema_version,
+            {
+                confession.command: confession
+                for confession in sorted(by_id.values(), key=lambda c: c.command)
+            },
+        )
+
+
+async def get_schema_version() -> str | None:
+    return cast(
+        'str | None',
+        await db.scalar(db.text('SELECT version_num FROM alembic_version')),
+    )
+
+
+# Approximates the memory held by the corpus records. The Confession models
+# are not counted since they would be loaded for every command without the corpus.
+def _get_size(obj: object, seen: set[int], /) -> int:
+    if id(obj) in seen or isinstance(obj, (Confession, int)):
+        return 0
+
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+
+    if isinstance(obj, dict):
+        size += sum(
+            _get_size(key, seen) + _get_size(value, seen) for key, value in obj.items()
+        )
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_get_size(item, seen) for item in obj)
+    elif attr.has(type(obj)):
+        size += sum(
+            _get_size(getattr(obj, field.name), seen)
+            for field in attr.fields(type(obj))
+        )
+
+    return size
@@ -5,3 +5,9 @@ from botus_receptus import Config as BaseConfig
 
 class Config(BaseConfig):
     services: dict[str, Any]
+    passage_cache: dict[str, Any]
+    confession_corpus: dict[str, Any]
+    parse_pool: dict[str, Any]
+    hedging: dict[str, Any]
+    timeouts: dict[str, Any]
+    lookup_concurrency: int
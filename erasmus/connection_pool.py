@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Iterable
+from types import SimpleNamespace
+from typing import Any, Final
+
+import aiohttp
+from attr import attrib, dataclass
+from yarl import URL
+
+_log: Final = logging.getLogger(__name__)
+
+
+# HTTP connection settings for one service. A service whose config has a
+# connections table gets its own session with these limits instead of sharing the
+# bot's session, so a burst against one upstream can't starve the others. Time spent
+# waiting for a free connection is traced, and warm() opens connections to the
+# service's hosts ahead of the first lookup.
+@dataclass(slots=True)
+class ConnectionPool(object):
+    limit: int = 100
+    limit_per_host: int = 0
+    keepalive_timeout: float = 15
+    ttl_dns_cache: int | None = 10
+    warm_connections: int = 1
+    warm_timeout: float = 5
+    urls: tuple[str, ...] = ()
+    session: aiohttp.ClientSession | None = attrib(init=False, default=None)
+    waits: int = attrib(init=False, default=0)
+    wait_time: float = attrib(init=False, default=0)
+    max_wait_time: float = attrib(init=False, default=0)
+    connections: int = attrib(init=False, default=0)
+
+    def create_session(self, /) -> aiohttp.ClientSession:
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_queued_start.append(self.__on_queued_start)
+        trace_config.on_connection_queued_end.append(self.__on_queued_end)
+        trace_config.on_connection_create_end.append(self.__on_create_end)
+
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                use_dns_cache=self.ttl_dns_cache != 0,
+                ttl_dns_cache=self.ttl_dns_cache,
+            ),
+            trace_configs=[trace_config],
+        )
+
+        return self.session
+
+    async def __on_queued_start(
+        self,
+        session: aiohttp.ClientSession,
+        context: SimpleNamespace,
+        params: Any,
+        /,
+    ) -> None:
+        context.queued_at = asyncio.get_running_loop().time()
+
+    async def __on_queued_end(
+        self,
+        session: aiohttp.ClientSession,
+        context: SimpleNamespace,
+        params: Any,
+        /,
+    ) -> None:
+        wait_time = asyncio.get_running_loop().time() - context.queued_at
+        self.waits += 1
+        self.wait_time += wait_time
+        self.max_wait_time = max(self.max_wait_time, wait_time)
+
+    async def __on_create_end(
+        self,
+        session: aiohttp.ClientSession,
+        context: SimpleNamespace,
+        params: Any,
+        /,
+    ) -> None:
+        self.connections += 1
+
+    # Opens warm_connections connections to each host at once and leaves them in
+    # the pool; failures are logged, since the first lookup will just connect itself.
+    # Each request gives up after warm_timeout, so a slow host can't hold up startup.
+    async def warm(self, /) -> None:
+        if self.session is None:
+            return
+
+        timeout = aiohttp.ClientTimeout(total=self.warm_timeout)
+
+        async def connect(url: URL, /) -> None:
+            assert self.session is not None
+
+            try:
+                async with self.session.head(
+                    url, allow_redirects=False, timeout=timeout
+                ):
+                    pass
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                _log.warning('Could not connect to %s: %s', url, error)
+
+        await asyncio.gather(
+            *(
+                connect(URL(url).origin())
+                for url in self.urls
+                for _ in range(self.warm_connections)
+            )
+        )
+
+    async def close(self, /) -> None:
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    def get_stats(self, name: str, /) -> dict[str, int]:
+        return {
+            f'{name} connections opened': self.connections,
+            f'{name} pool waits': self.waits,
+            f'{name} pool wait ms': round(self.wait_time * 1000),
+            f'{name} pool max wait ms': round(self.max_wait_time * 1000),
+        }
+
+    @classmethod
+    def from_config(
+        cls,
+        config: dict[str, Any] | None,
+        urls: Iterable[str] = (),
+        /,
+    ) -> ConnectionPool | None:
+        if config is None:
+            return None
+
+        return cls(
+            limit=config.get('limit', 100),
+            limit_per_host=config.get('limit_per_host', 0),
+            keepalive_timeout=config.get('keepalive_timeout', 15),
+            ttl_dns_cache=config.get('ttl_dns_cache', 10),
+            warm_connections=config.get('warm_connections', 1),
+            warm_timeout=config.get('warm_timeout', 5),
+            urls=tuple(urls),
+        )
@@ -1,13 +1,12 @@
 from __future__ import annotations
 
-from itertools import chain
+from collections.abc import Iterable
 from pathlib import Path
-from re import Match, Pattern
-from typing import TYPE_CHECKING, Final, TypedDict
+from re import Match, Pattern, escape
+from typing import TYPE_CHECKING, Any, Final, TypedDict
 
 from attr import attrib, dataclass
 from botus_receptus import re
-from more_itertools import unique_everseen
 
 from .exceptions import BookNotUnderstoodError, ReferenceNotUnderstoodError
 from .json import load
@@ -26,23 +25,46 @@ class BookDict(TypedDict):
 with (Path(__file__).resolve().parent / 'data' / 'books.json').open() as f:
     _books_data: Final[list[BookDict]] = load(f)
 
+
+def _get_trie_pattern(words: Iterable[str], /) -> str:
+    # Factor the words into a prefix trie so the regex engine only follows the branch
+    # matching the next character instead of trying every word in turn. Keys are
+    # lowercased because every pattern using this is case-insensitive.
+    trie: dict[str, Any] = {}
+
+    for word in words:
+        node = trie
+        for char in word.lower():
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def get_pattern(node: dict[str, Any], /) -> str:
+        branches = [
+            escape(char) + get_pattern(child) for char, child in node.items() if char
+        ]
+
+        if not branches:
+            return ''
+
+        pattern = branches[0] if len(branches) == 1 else re.group('|'.join(branches))
+
+        if '' in node:
+            # Greedy, so longer words are tried before the shorter words they extend
+            pattern = re.optional(re.group(pattern))
+
+        return pattern
+
+    return get_pattern(trie)
+
+
+_book_names: Final = [
+    name for book in _books_data for name in [book['name'], book['osis']] + book['alt']
+]
+
 # Inspired by
 # https://github.com/TehShrike/verse-reference-regex/blob/master/create-regex.js
 _book_re: Final = re.compile(
-    re.named_group('book')(
-        re.either(
-            *re.escape_all(
-                unique_everseen(
-                    chain.from_iterable(
-                        [
-                            [book['name'], book['osis']] + book['alt']
-                            for book in _books_data
-                        ]
-                    )
-                )
-            )
-        )
-    ),
+    re.named_group('book')(_get_trie_pattern(_book_names)),
     re.optional(re.DOT),
 )
 
@@ -122,13 +144,104 @@ _search_reference_re: Final = re.compile(
     re.START, _reference_re, re.END, flags=re.IGNORECASE
 )
 
+# Every reference contains "chapter:verse", so this is a cheap test that rules out
+# the vast majority of messages before running the reference regexes over them
+_possible_reference_re: Final = re.compile(re.DIGIT, _colon, re.DIGIT)
+
+# Books by their USFM codes, which ApiBible and USFM files identify books by
+_usfm_code_map: Final[dict[str, str]] = {
+    'Genesis': 'GEN',
+    'Exodus': 'EXO',
+    'Leviticus': 'LEV',
+    'Numbers': 'NUM',
+    'Deuteronomy': 'DEU',
+    'Joshua': 'JOS',
+    'Judges': 'JDG',
+    'Ruth': 'RUT',
+    '1 Samuel': '1SA',
+    '2 Samuel': '2SA',
+    '1 Kings': '1KI',
+    '2 Kings': '2KI',
+    '1 Chronicles': '1CH',
+    '2 Chronicles': '2CH',
+    'Ezra': 'EZR',
+    'Nehemiah': 'NEH',
+    'Esther': 'EST',
+    'Job': 'JOB',
+    'Psalm': 'PSA',
+    'Proverbs': 'PRO',
+    'Ecclesiastes': 'ECC',
+    'Song of Solomon': 'SNG',
+    'Isaiah': 'ISA',
+    'Jeremiah': 'JER',
+    'Lamentations': 'LAM',
+    'Ezekiel': 'EZK',
+    'Daniel': 'DAN',
+    'Hosea': 'HOS',
+    'Joel': 'JOL',
+    'Amos': 'AMO',
+    'Obadiah': 'OBA',
+    'Jonah': 'JON',
+    'Micah': 'MIC',
+    'Nahum': 'NAM',
+    'Habakkuk': 'HAB',
+    'Zephaniah': 'ZEP',
+    'Haggai': 'HAG',
+    'Zechariah': 'ZEC',
+    'Malachi': 'MAL',
+    '1 Esdras': '1ES',
+    '2 Esdras': '2ES',
+    'Tobit': 'TOB',
+    'Judith': 'JDT',
+    'Additions to Esther': 'ESG',
+    'Wisdom': 'WIS',
+    'Sirach': 'SIR',
+    'Baruch': 'BAR',
+    'Prayer of Azariah': 'S3Y',
+    'Susanna': 'SUS',
+    'Bel and the Dragon': 'BEL',
+    'Prayer of Manasseh': 'MAN',
+    '1 Maccabees': '1MA',
+    '2 Maccabees': '2MA',
+    'Matthew': 'MAT',
+    'Mark': 'MRK',
+    'Luke': 'LUK',
+    'John': 'JHN',
+    'Acts': 'ACT',
+    'Romans': 'ROM',
+    '1 Corinthians': '1CO',
+    '2 Corinthians': '2CO',
+    'Galatians': 'GAL',
+    'Ephesians': 'EPH',
+    'Philippians': 'PHP',
+    'Colossians': 'COL',
+    '1 Thessalonians': '1TH',
+    '2 Thessalonians': '2TH',
+    '1 Timothy': '1TI',
+    '2 Timothy': '2TI',
+    'Titus': 'TIT',
+    'Philemon': 'PHM',
+    'Hebrews': 'HEB',
+    'James': 'JAS',
+    '1 Peter': '1PE',
+    '2 Peter': '2PE',
+    '1 John': '1JN',
+    '2 John': '2JN',
+    '3 John': '3JN',
+    'Jude': 'JUD',
+    'Revelation': 'REV',
+}
+_usfm_book_map: Final = {code: book for book, code in _usfm_code_map.items()}
+
 _book_input_map: Final[dict[str, str]] = {}
 _book_mask_map: Final[dict[str, int]] = {}
+_book_number_map: Final[dict[str, int]] = {}
 
-for _book in _books_data:
+for _number, _book in enumerate(_books_data, 1):
     for input_string in [_book['name'], _book['osis']] + _book['alt']:
         _book_input_map[input_string.lower()] = _book['name']
     _book_mask_map[_book['name']] = _book['section']
+    _book_number_map[_book['name']] = _number
 
 
 def get_book(book_name_or_abbr: str, /) -> str:
@@ -144,6 +257,30 @@ def get_book_mask(book_name: str, /) -> int:
     return _book_mask_map.get(book_name, 0)
 
 
+# The book's position in canonical order, starting at 1
+def get_book_number(book_name: str, /) -> int:
+    return _book_number_map[book_name]
+
+
+def get_book_name(book_number: int, /) -> str:
+    return _books_data[book_number - 1]['name']
+
+
+def get_usfm_code(book_name: str, /) -> str:
+    return _usfm_code_map[book_name]
+
+
+def get_usfm_book(code: str, /) -> str | None:
+    return _usfm_book_map.get(code)
+
+
+def may_contain_reference(string: str, /, *, only_bracketed: bool = False) -> bool:
+    if (only_bracketed and '[' not in string) or ':' not in string:
+        return False
+
+    return _possible_reference_re.search(string) is not None
+
+
 @dataclass(slots=True)
 class Verse(object):
     chapter: int
@@ -220,6 +357,9 @@ class VerseRange(object):
         ranges: list[VerseRange | Exception] = []
         lookup_pattern: Pattern[str]
 
+        if not may_contain_reference(string, only_bracketed=only_bracketed):
+            return ranges
+
         if only_bracketed:
             lookup_pattern = _bracketed_reference_with_version_re
         else:
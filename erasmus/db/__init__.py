@@ -1,5 +1,6 @@
 from .base import Base, db  # noqa
 from .bible import BibleVersion, UserPref  # noqa
+from .cache import CachedPassage  # noqa
 from .confession import (  # noqa
     Article,
     Chapter,
@@ -11,12 +12,14 @@ from .confession import (  # noqa
     Paragraph,
     Question,
 )
+from .local import LocalVerse  # noqa
 
 __all__ = (
     'db',
     'Base',
     'BibleVersion',
     'UserPref',
+    'CachedPassage',
     'ConfessionTypeEnum',
     'ConfessionType',
     'NumberingTypeEnum',
@@ -26,4 +29,5 @@ __all__ = (
     'Question',
     'Article',
     'Confession',
+    'LocalVerse',
 )
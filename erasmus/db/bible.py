@@ -1,11 +1,14 @@
 from __future__ import annotations
 
-from collections.abc import AsyncIterator
-from typing import cast
+from collections.abc import AsyncIterator, Iterable
+from typing import Any, Final, cast
 
+from attr import attrib, dataclass
 from botus_receptus.gino import Snowflake
+from sqlalchemy.dialects.postgresql import JSONB
 
 from ..exceptions import InvalidVersionError
+from ..lru import LRUCache
 from ..protocols import Bible
 from .base import Base, db
 
@@ -21,6 +24,7 @@ class BibleVersion(Base):
     service_version = db.Column(db.String, nullable=False)
     rtl = db.Column(db.Boolean)
     books = db.Column(db.BigInteger, nullable=False)
+    fallbacks = db.Column(JSONB, nullable=False, server_default='[]')
 
     def as_bible(self, /) -> Bible:
         return cast(Bible, self)
@@ -29,14 +33,49 @@ class BibleVersion(Base):
         await UserPref.create_or_update(
             set_=('bible_id',), user_id=user_id, bible_id=self.id
         )
+        _user_prefs.set(user_id, self.id)
 
     async def set_for_guild(self, guild_id: int, /) -> None:
         await GuildPref.create_or_update(
             set_=('bible_id',), guild_id=guild_id, bible_id=self.id
         )
+        _guild_prefs.set(guild_id, self.id)
+
+    @staticmethod
+    async def unset_for_user(user_id: int, /) -> bool:
+        status, _ = await UserPref.delete.where(
+            UserPref.user_id == user_id
+        ).gino.status()
+        _user_prefs.set(user_id, None)
+
+        return status != 'DELETE 0'
+
+    @staticmethod
+    async def unset_for_guild(guild_id: int, /) -> bool:
+        status, _ = await GuildPref.delete.where(
+            GuildPref.guild_id == guild_id
+        ).gino.status()
+        _guild_prefs.set(guild_id, None)
+
+        return status != 'DELETE 0'
+
+    @staticmethod
+    async def load_registry() -> None:
+        _registry.replace(await BibleVersion.query.gino.all())
+
+    def register(self, /) -> None:
+        _registry.add(self)
+
+    def unregister(self, /) -> None:
+        _registry.remove(self)
 
     @staticmethod
     async def get_all(*, ordered: bool = False) -> AsyncIterator[BibleVersion]:
+        if _registry.loaded:
+            for version in _registry.get_all(ordered=ordered):
+                yield version
+            return
+
         query = BibleVersion.query
 
         if ordered:
@@ -48,9 +87,12 @@ class BibleVersion(Base):
 
     @staticmethod
     async def get_by_command(command: str, /) -> BibleVersion:
-        bible = await BibleVersion.query.where(
-            BibleVersion.command == command
-        ).gino.first()
+        if _registry.loaded:
+            bible = _registry.by_command.get(command)
+        else:
+            bible = await BibleVersion.query.where(
+                BibleVersion.command == command
+            ).gino.first()
 
         if not bible:
             raise InvalidVersionError(command)
@@ -59,34 +101,122 @@ class BibleVersion(Base):
 
     @staticmethod
     async def get_by_abbr(abbr: str, /) -> BibleVersion | None:
+        if _registry.loaded:
+            return _registry.by_lower_command.get(abbr.lower())
+
         return await BibleVersion.query.where(
             BibleVersion.command.ilike(abbr)
         ).gino.first()
 
+    @staticmethod
+    async def get_by_id(bible_id: int, /) -> BibleVersion | None:
+        if _registry.loaded:
+            return _registry.by_id.get(bible_id)
+
+        return await BibleVersion.get(bible_id)
+
     @staticmethod
     async def get_for_user(user_id: int, guild_id: int | None, /) -> BibleVersion:
-        user_pref = (
-            await UserPref.load(bible_version=BibleVersion)
-            .query.where(UserPref.user_id == user_id)
-            .gino.first()
+        user_bible_id = _user_prefs.get(user_id, _missing)
+        guild_bible_id = (
+            _guild_prefs.get(guild_id, _missing) if guild_id is not None else None
         )
 
-        if user_pref is not None and user_pref.bible_version is not None:
-            return user_pref.bible_version
+        # Resolve every preference that isn't cached in one round trip. Missing
+        # preferences are cached as None so they don't cost a query per lookup.
+        columns: list[Any] = []
+
+        if user_bible_id is _missing:
+            columns.append(
+                db.select([UserPref.bible_id])
+                .where(UserPref.user_id == user_id)
+                .as_scalar()
+                .label('user_bible_id')
+            )
 
-        if guild_id is not None:
-            guild_pref = (
-                await GuildPref.load(bible_version=BibleVersion)
-                .query.where(GuildPref.guild_id == guild_id)
-                .gino.first()
+        if guild_bible_id is _missing:
+            columns.append(
+                db.select([GuildPref.bible_id])
+                .where(GuildPref.guild_id == guild_id)
+                .as_scalar()
+                .label('guild_bible_id')
             )
 
-            if guild_pref is not None and guild_pref.bible_version is not None:
-                return guild_pref.bible_version
+        if columns:
+            row = await db.select(columns).gino.first()
+
+            # A preference set or unset while the query ran is newer than the
+            # row, so it's kept instead of being overwritten
+            if user_bible_id is _missing:
+                user_bible_id = _user_prefs.setdefault(user_id, row['user_bible_id'])
+
+            if guild_bible_id is _missing:
+                assert guild_id is not None
+                guild_bible_id = _guild_prefs.setdefault(
+                    guild_id, row['guild_bible_id']
+                )
+
+        for bible_id in (user_bible_id, guild_bible_id):
+            if bible_id is not None and (
+                version := await BibleVersion.get_by_id(bible_id)
+            ):
+                return version
 
         return await BibleVersion.get_by_command('bsb')
 
 
+@dataclass(slots=True)
+class _Registry(object):
+    loaded: bool = False
+    by_id: dict[int, BibleVersion] = attrib(factory=dict)
+    by_command: dict[str, BibleVersion] = attrib(factory=dict)
+    by_lower_command: dict[str, BibleVersion] = attrib(factory=dict)
+    _ordered: list[BibleVersion] | None = attrib(init=False, default=None)
+
+    def replace(self, versions: Iterable[BibleVersion], /) -> None:
+        self.by_id.clear()
+        self.by_command.clear()
+        self.by_lower_command.clear()
+        self._ordered = None
+
+        for version in versions:
+            self.add(version)
+
+        self.loaded = True
+
+    def add(self, version: BibleVersion, /) -> None:
+        self.by_id[version.id] = version
+        self.by_command[version.command] = version
+        self.by_lower_command[version.command.lower()] = version
+        self._ordered = None
+
+    def remove(self, version: BibleVersion, /) -> None:
+        self.by_id.pop(version.id, None)
+        self.by_command.pop(version.command, None)
+
+        if self.by_lower_command.get(version.command.lower()) is version:
+            del self.by_lower_command[version.command.lower()]
+
+        self._ordered = None
+
+    def get_all(self, /, *, ordered: bool = False) -> list[BibleVersion]:
+        if not ordered:
+            return list(self.by_command.values())
+
+        if self._ordered is None:
+            self._ordered = sorted(
+                self.by_command.values(), key=lambda version: version.command
+            )
+
+        return self._ordered
+
+
+_registry: Final = _Registry()
+_missing: Final[Any] = object()
+_user_prefs: Final[LRUCache[int, int | None]] = LRUCache(max_size=50_000, ttl=60 * 60)
+_guild_prefs: Final[LRUCache[int, int | None]] = LRUCache(max_size=10_000, ttl=60 * 60)
+
+
 class UserPref(Base):
     __tablename__ = 'user_prefs'
 
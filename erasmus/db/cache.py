@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from .base import Base, db
+
+
+class CachedPassage(Base):
+    __tablename__ = 'passage_cache'
+
+    service = db.Column(db.String, primary_key=True)
+    service_version = db.Column(db.String, primary_key=True)
+    reference = db.Column(db.String, primary_key=True)
+    text = db.Column(db.Text, nullable=False)
+    created_at = db.Column(
+        db.DateTime(timezone=True), nullable=False, server_default=db.func.now()
+    )
+
+    @staticmethod
+    async def get_fresh(
+        service: str,
+        service_version: str,
+        reference: str,
+        since: datetime,
+        /,
+    ) -> CachedPassage | None:
+        return await (
+            CachedPassage.query.where(CachedPassage.service == service)
+            .where(CachedPassage.service_version == service_version)
+            .where(CachedPassage.reference == reference)
+            .where(CachedPassage.created_at > since)
+            .gino.first()
+        )
+
+    @staticmethod
+    async def store(
+        service: str,
+        service_version: str,
+        reference: str,
+        text: str,
+        /,
+    ) -> None:
+        await CachedPassage.create_or_update(
+            set_=('text', 'created_at'),
+            service=service,
+            service_version=service_version,
+            reference=reference,
+            text=text,
+            created_at=datetime.now(timezone.utc),
+        )
+
+    @staticmethod
+    async def purge() -> int:
+        status, _ = await CachedPassage.delete.gino.status()
+
+        return int(status.split()[-1])
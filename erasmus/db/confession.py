@@ -2,12 +2,18 @@ from __future__ import annotations
 
 from collections.abc import AsyncIterator, Sequence
 from enum import Enum
-from typing import Any, cast
+from typing import Any, Union, cast
+
+from sqlalchemy.dialects.postgresql import TSVECTOR
 
 from ..exceptions import InvalidConfessionError, NoSectionError, NoSectionsError
 from .base import Base, db
 
 
+def _search_matches(search_vector: Any, terms: Sequence[str], /) -> Any:
+    return search_vector.match(' & '.join(terms), postgresql_regconfig='english')
+
+
 class ConfessionTypeEnum(Enum):
     ARTICLES = 'ARTICLES'
     CHAPTERS = 'CHAPTERS'
@@ -58,6 +64,8 @@ class Paragraph(Base):
     chapter_number = db.Column(db.Integer, nullable=False)
     paragraph_number = db.Column(db.Integer, nullable=False)
     text = db.Column(db.Text, nullable=False)
+    # Maintained by triggers since it includes the chapter title
+    search_vector = db.Column(TSVECTOR)
 
 
 class Question(Base):
@@ -68,6 +76,13 @@ class Question(Base):
     question_number = db.Column(db.Integer, nullable=False)
     question_text = db.Column(db.Text, nullable=False)
     answer_text = db.Column(db.Text, nullable=False)
+    search_vector = db.Column(
+        TSVECTOR,
+        db.Computed(
+            "to_tsvector('english', question_text || ' ' || answer_text)",
+            persisted=True,
+        ),
+    )
 
 
 class Article(Base):
@@ -78,6 +93,13 @@ class Article(Base):
     article_number = db.Column(db.Integer, nullable=False)
     title = db.Column(db.Text, nullable=False)
     text = db.Column(db.Text, nullable=False)
+    search_vector = db.Column(
+        TSVECTOR,
+        db.Computed("to_tsvector('english', title || ' ' || text)", persisted=True),
+    )
+
+
+SearchResult = Union[Paragraph, Article, Question]
 
 
 class Confession(Base):
@@ -130,30 +152,36 @@ class Confession(Base):
 
         return result
 
-    async def search_paragraphs(
+    def search_paragraphs_query(
         self,
         terms: Sequence[str],
         /,
-    ) -> AsyncIterator[Paragraph]:
-        loader = Paragraph.load(
-            chapter=Chapter.on(
-                db.and_(
-                    Paragraph.chapter_number == Chapter.chapter_number,
-                    Paragraph.confess_id == Chapter.confess_id,
+        *,
+        after: Paragraph | None = None,
+    ) -> Any:
+        query = (
+            Paragraph.load(
+                chapter=Chapter.on(
+                    db.and_(
+                        Paragraph.chapter_number == Chapter.chapter_number,
+                        Paragraph.confess_id == Chapter.confess_id,
+                    )
                 )
             )
+            .query.where(Paragraph.confess_id == self.id)
+            .where(_search_matches(Paragraph.search_vector, terms))
+            .order_by(
+                db.asc(Paragraph.chapter_number), db.asc(Paragraph.paragraph_number)
+            )
         )
-        async with db.transaction():
-            async for paragraph in loader.query.where(
-                Paragraph.confess_id == self.id
-            ).where(
-                db.func.to_tsvector(
-                    'english', Chapter.chapter_title + db.text("' '") + Paragraph.text
-                ).match(' & '.join(terms))
-            ).order_by(
-                db.asc(Paragraph.chapter_number)
-            ).gino.iterate():
-                yield paragraph
+
+        if after is not None:
+            query = query.where(
+                db.tuple_(Paragraph.chapter_number, Paragraph.paragraph_number)
+                > db.tuple_(after.chapter_number, after.paragraph_number)
+            )
+
+        return query
 
     async def get_questions(self, /) -> AsyncIterator[Question]:
         async with db.transaction():
@@ -184,23 +212,23 @@ class Confession(Base):
 
         return question
 
-    async def search_questions(
+    def search_questions_query(
         self,
         terms: Sequence[str],
         /,
-    ) -> AsyncIterator[Question]:
-        async with db.transaction():
-            async for question in Question.query.where(
-                Question.confess_id == self.id
-            ).where(
-                db.func.to_tsvector(
-                    'english',
-                    Question.question_text + db.text("' '") + Question.answer_text,
-                ).match(' & '.join(terms))
-            ).order_by(
-                db.asc(Question.question_number)
-            ).gino.iterate():
-                yield question
+        *,
+        after: Question | None = None,
+    ) -> Any:
+        query = (
+            Question.query.where(Question.confess_id == self.id)
+            .where(_search_matches(Question.search_vector, terms))
+            .order_by(db.asc(Question.question_number))
+        )
+
+        if after is not None:
+            query = query.where(Question.question_number > after.question_number)
+
+        return query
 
     async def get_articles(self, /) -> AsyncIterator[Article]:
         count = 0
@@ -226,18 +254,80 @@ class Confession(Base):
 
         return article
 
-    async def search_articles(self, terms: Sequence[str], /) -> AsyncIterator[Article]:
-        async with db.transaction():
-            async for article in Article.query.where(
-                Article.confess_id == self.id
-            ).where(
-                db.func.to_tsvector(
-                    'english', Article.title + db.text("' '") + Article.text
-                ).match(' & '.join(terms))
-            ).order_by(
-                db.asc(Article.article_number)
-            ).gino.iterate():
-                yield article
+    def search_articles_query(
+        self,
+        terms: Sequence[str],
+        /,
+        *,
+        after: Article | None = None,
+    ) -> Any:
+        query = (
+            Article.query.where(Article.confess_id == self.id)
+            .where(_search_matches(Article.search_vector, terms))
+            .order_by(db.asc(Article.article_number))
+        )
+
+        if after is not None:
+            query = query.where(Article.article_number > after.article_number)
+
+        return query
+
+    def search_query(
+        self,
+        terms: Sequence[str],
+        /,
+        *,
+        after: SearchResult | None = None,
+    ) -> Any:
+        if self.type == ConfessionTypeEnum.CHAPTERS:
+            return self.search_paragraphs_query(
+                terms, after=cast('Paragraph | None', after)
+            )
+        elif self.type == ConfessionTypeEnum.ARTICLES:
+            return self.search_articles_query(
+                terms, after=cast('Article | None', after)
+            )
+        else:  # ConfessionTypeEnum.QA
+            return self.search_questions_query(
+                terms, after=cast('Question | None', after)
+            )
+
+    # Pages are fetched by keyset on the canonical order when the last result of
+    # the previous page is known, and by offset otherwise
+    async def search(
+        self,
+        terms: Sequence[str],
+        /,
+        *,
+        limit: int,
+        after: SearchResult | None = None,
+        offset: int = 0,
+    ) -> list[SearchResult]:
+        query = self.search_query(terms, after=after).limit(limit)
+
+        if after is None and offset > 0:
+            query = query.offset(offset)
+
+        return cast('list[SearchResult]', await query.gino.all())
+
+    def search_count_query(self, terms: Sequence[str], /) -> Any:
+        model: Any
+
+        if self.type == ConfessionTypeEnum.CHAPTERS:
+            model = Paragraph
+        elif self.type == ConfessionTypeEnum.ARTICLES:
+            model = Article
+        else:  # ConfessionTypeEnum.QA
+            model = Question
+
+        return (
+            db.select([db.func.count(model.id)])
+            .where(model.confess_id == self.id)
+            .where(_search_matches(model.search_vector, terms))
+        )
+
+    async def search_count(self, terms: Sequence[str], /) -> int:
+        return cast(int, await db.scalar(self.search_count_query(terms)))
 
     @property
     def type(self, /) -> ConfessionTypeEnum:
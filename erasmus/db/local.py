@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from typing import Any, Final, cast
+
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+from .base import Base, db
+
+# The columns the importer copies, in order
+COPY_COLUMNS: Final = ('version', 'book', 'chapter', 'verse', 'text')
+
+
+class LocalVerse(Base):
+    __tablename__ = 'local_verses'
+
+    # The primary key doubles as the index a range of verses is read from
+    version = db.Column(db.String, primary_key=True)
+    book = db.Column(db.SmallInteger, primary_key=True)
+    chapter = db.Column(db.SmallInteger, primary_key=True)
+    verse = db.Column(db.SmallInteger, primary_key=True)
+    text = db.Column(db.Text, nullable=False)
+    search_vector = db.Column(
+        TSVECTOR, db.Computed("to_tsvector('english', text)", persisted=True)
+    )
+
+    @staticmethod
+    def range_query(
+        version: str,
+        book: int,
+        start: tuple[int, int],
+        end: tuple[int, int],
+        /,
+    ) -> Any:
+        return (
+            db.select([LocalVerse.chapter, LocalVerse.verse, LocalVerse.text])
+            .where(LocalVerse.version == version)
+            .where(LocalVerse.book == book)
+            .where(db.tuple_(LocalVerse.chapter, LocalVerse.verse) >= db.tuple_(*start))
+            .where(db.tuple_(LocalVerse.chapter, LocalVerse.verse) <= db.tuple_(*end))
+            .order_by(LocalVerse.chapter, LocalVerse.verse)
+        )
+
+    @staticmethod
+    async def get_range(
+        version: str,
+        book: int,
+        start: tuple[int, int],
+        end: tuple[int, int],
+        /,
+    ) -> list[tuple[int, int, str]]:
+        return cast(
+            'list[tuple[int, int, str]]',
+            await db.all(LocalVerse.range_query(version, book, start, end)),
+        )
+
+    @staticmethod
+    def version_query(version: str, /) -> Any:
+        return (
+            db.select(
+                [LocalVerse.book, LocalVerse.chapter, LocalVerse.verse, LocalVerse.text]
+            )
+            .where(LocalVerse.version == version)
+            .order_by(LocalVerse.book, LocalVerse.chapter, LocalVerse.verse)
+        )
+
+    @staticmethod
+    async def get_version(version: str, /) -> list[tuple[int, int, int, str]]:
+        return cast(
+            'list[tuple[int, int, int, str]]',
+            await db.all(LocalVerse.version_query(version)),
+        )
+
+    @staticmethod
+    def search_query(version: str, terms: Sequence[str], /) -> Any:
+        return (
+            db.select(
+                [LocalVerse.book, LocalVerse.chapter, LocalVerse.verse, LocalVerse.text]
+            )
+            .where(LocalVerse.version == version)
+            .where(
+                LocalVerse.search_vector.match(
+                    ' & '.join(terms), postgresql_regconfig='english'
+                )
+            )
+            .order_by(LocalVerse.book, LocalVerse.chapter, LocalVerse.verse)
+        )
+
+    @staticmethod
+    async def search(
+        version: str,
+        terms: Sequence[str],
+        /,
+        *,
+        limit: int,
+        offset: int = 0,
+    ) -> tuple[list[tuple[int, int, int, str]], int]:
+        query = LocalVerse.search_query(version, terms)
+
+        async with db.transaction():
+            rows = await db.all(query.limit(limit).offset(offset))
+            total = await db.scalar(
+                db.select([db.func.count()]).select_from(query.order_by(None).alias())
+            )
+
+        return cast('list[tuple[int, int, int, str]]', rows), cast(int, total)
+
+    # Replaces the version's verses in one transaction, loading them with COPY
+    @staticmethod
+    async def replace(version: str, records: Iterable[Sequence[Any]], /) -> int:
+        async with db.acquire() as conn:
+            async with conn.transaction():
+                await conn.status(
+                    LocalVerse.delete.where(LocalVerse.version == version)
+                )
+                status = await conn.raw_connection.copy_records_to_table(
+                    LocalVerse.__tablename__, records=records, columns=COPY_COLUMNS
+                )
+
+        return int(status.split()[-1])
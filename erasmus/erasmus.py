@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import logging
 import re
+from collections import Counter
 from typing import Any, Final, cast
 
 import discord
@@ -13,9 +14,11 @@ from discord.ext import commands, menus
 
 from .config import Config
 from .context import Context
+from .data import may_contain_reference
 from .db import db
 from .exceptions import ErasmusError
 from .help import HelpCommand
+from .loop_lag import LoopLagMonitor
 
 _log: Final = logging.getLogger(__name__)
 
@@ -42,6 +45,8 @@ class Erasmus(
     abc.OnCommandError[Context],
 ):
     config: Config
+    message_stats: Counter[str]
+    loop_lag: LoopLagMonitor
 
     context_cls = Context
     db = db
@@ -67,6 +72,9 @@ class Erasmus(
         )
         super().__init__(config, *args, **kwargs)
 
+        self.message_stats = Counter()
+        self.loop_lag = LoopLagMonitor()
+
         for extension in _extensions:
             try:
                 self.load_extension(f'erasmus.cogs.{extension}')
@@ -80,6 +88,12 @@ class Erasmus(
         await self.process_commands(message)
 
     async def process_commands(self, message: discord.Message, /) -> None:
+        self.message_stats['received'] += 1
+
+        if not await self.__may_need_context(message):
+            self.message_stats['skipped'] += 1
+            return
+
         ctx = await self.get_context(message)
 
         if ctx.command is None:
@@ -88,8 +102,21 @@ class Erasmus(
 
         await self.invoke(ctx)
 
+    async def __may_need_context(self, message: discord.Message, /) -> bool:
+        prefix = await self.get_prefix(message)
+
+        if message.content.startswith(
+            (prefix,) if isinstance(prefix, str) else tuple(prefix)
+        ):
+            return True
+
+        return may_contain_reference(
+            message.content, only_bracketed=not self.user.mentioned_in(message)
+        )
+
     async def on_ready(self, /) -> None:
         await super().on_ready()
+        self.loop_lag.start()
         await self.change_presence(
             activity=discord.Game(name=f'| {self.default_prefix}help')
         )
@@ -97,6 +124,12 @@ class Erasmus(
         user = self.user
         _log.info('Erasmus ready. Logged in as %s %s', user.name, user.id)
 
+    async def close(self, /) -> None:
+        if (bible := self.cogs.get('Bible')) is not None:
+            await bible.close()
+
+        await super().close()
+
     async def on_command_error(self, ctx: Context, exc: Exception, /) -> None:
         if (
             isinstance(
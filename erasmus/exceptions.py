@@ -22,6 +22,14 @@ class BibleNotSupportedError(ErasmusError):
         self.version = version
 
 
+# Raised by a service's get_chapter when it can't fetch chapters for a version
+class ChaptersNotSupportedError(ErasmusError):
+    bible: Bible
+
+    def __init__(self, bible: Bible, /) -> None:
+        self.bible = bible
+
+
 class BookNotUnderstoodError(ErasmusError):
     book: str
 
@@ -54,24 +62,26 @@ class ServiceNotSupportedError(ErasmusError):
 
 class ServiceTimeout(ErasmusError):
     bible: Bible
+    timeout: float
 
-    def __init__(self, bible: Bible, /) -> None:
+    def __init__(self, bible: Bible, timeout: float, /) -> None:
         self.bible = bible
+        self.timeout = timeout
 
 
 class ServiceLookupTimeout(ServiceTimeout):
     verses: VerseRange
 
-    def __init__(self, bible: Bible, verses: VerseRange, /) -> None:
-        super().__init__(bible)
+    def __init__(self, bible: Bible, verses: VerseRange, timeout: float, /) -> None:
+        super().__init__(bible, timeout)
         self.verses = verses
 
 
 class ServiceSearchTimeout(ServiceTimeout):
     terms: list[str]
 
-    def __init__(self, bible: Bible, terms: list[str], /) -> None:
-        super().__init__(bible)
+    def __init__(self, bible: Bible, terms: list[str], timeout: float, /) -> None:
+        super().__init__(bible, timeout)
         self.terms = terms
 
 
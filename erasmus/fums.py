@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Final
+
+import aiohttp
+from attr import attrib, dataclass
+
+_log: Final = logging.getLogger(__name__)
+
+
+# Reports views to api.bible's Fair Use Management System in the background. A
+# passage is returned as soon as its data is parsed and the FUMS URL goes on a
+# queue; concurrency workers send them, retrying failures and server errors with
+# backoff. When the queue is full new reports are dropped rather than held, and
+# close() waits up to timeout for the queue to drain.
+@dataclass(slots=True)
+class FumsReporter(object):
+    session: aiohttp.ClientSession
+    max_queue: int = 1000
+    concurrency: int = 4
+    retries: int = 2
+    retry_delay: float = 1.0
+    timeout: float = 10.0
+    sent: int = attrib(init=False, default=0)
+    failed: int = attrib(init=False, default=0)
+    dropped: int = attrib(init=False, default=0)
+    send_time: float = attrib(init=False, default=0)
+    max_send_time: float = attrib(init=False, default=0)
+    _queue: asyncio.Queue[str] | None = attrib(init=False, default=None)
+    _workers: list[asyncio.Task[None]] = attrib(init=False, factory=list)
+
+    # The queue and workers are created on first use, so they belong to the loop
+    # that is running the lookups
+    def report(self, url: str, /) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(self.max_queue)
+            self._workers = [
+                asyncio.ensure_future(self.__work(self._queue))
+                for _ in range(self.concurrency)
+            ]
+
+        try:
+            self._queue.put_nowait(url)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def __work(self, queue: asyncio.Queue[str], /) -> None:
+        while True:
+            url = await queue.get()
+
+            try:
+                await self.__send(url)
+            except Exception:
+                _log.exception('Error reporting FUMS view')
+                self.failed += 1
+            finally:
+                queue.task_done()
+
+    async def __send(self, url: str, /) -> None:
+        loop = asyncio.get_running_loop()
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+
+            started_at = loop.time()
+
+            try:
+                async with self.session.get(
+                    url, timeout=aiohttp.ClientTimeout(total=self.timeout)
+                ) as response:
+                    await response.read()
+
+                    if response.status >= 500:
+                        continue
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                _log.debug('Could not report FUMS view: %r', error)
+                continue
+
+            send_time = loop.time() - started_at
+            self.sent += 1
+            self.send_time += send_time
+            self.max_send_time = max(self.max_send_time, send_time)
+            return
+
+        self.failed += 1
+
+    async def close(self, /) -> None:
+        if self._queue is None:
+            return
+
+        try:
+            await asyncio.wait_for(self._queue.join(), self.timeout)
+        except asyncio.TimeoutError:
+            _log.warning('Dropping %d FUMS reports at shutdown', self._queue.qsize())
+
+        for worker in self._workers:
+            worker.cancel()
+
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._queue = None
+        self._workers = []
+
+    def get_stats(self, /) -> dict[str, int]:
+        return {
+            'fums queue depth': self._queue.qsize() if self._queue is not None else 0,
+            'fums sent': self.sent,
+            'fums failed': self.failed,
+            'fums dropped': self.dropped,
+            'fums send ms': round(self.send_time * 1000),
+            'fums max send ms': round(self.max_send_time * 1000),
+        }
+
+    @classmethod
+    def from_config(
+        cls,
+        session: aiohttp.ClientSession,
+        config: dict[str, Any] | None,
+        /,
+    ) -> FumsReporter:
+        if not config:
+            return cls(session)
+
+        return cls(
+            session,
+            max_queue=config.get('max_queue', 1000),
+            concurrency=config.get('concurrency', 4),
+            retries=config.get('retries', 2),
+            retry_delay=config.get('retry_delay', 1.0),
+            timeout=config.get('timeout', 10.0),
+        )
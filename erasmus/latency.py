@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Any, Final
+
+from attr import attrib, dataclass
+
+# Bucket upper bounds grow by 25% from 10ms to about three minutes, so a quantile
+# read from the histogram is never more than 25% over the real one
+_bounds: Final = tuple(0.01 * 1.25 ** index for index in range(45))
+
+LatencyKey = tuple[str, str]
+
+
+# A histogram of recent latencies in constant space. Once it holds max_count
+# samples every bucket is halved, so older samples fade out and the quantiles follow
+# the service's current behaviour.
+@dataclass(slots=True)
+class LatencyHistogram(object):
+    max_count: int = 1000
+    counts: list[float] = attrib(init=False, factory=lambda: [0.0] * len(_bounds))
+    count: float = attrib(init=False, default=0.0)
+
+    def add(self, elapsed: float, /) -> None:
+        self.counts[min(bisect_left(_bounds, elapsed), len(_bounds) - 1)] += 1
+        self.count += 1
+
+        if self.count >= self.max_count:
+            self.counts = [count / 2 for count in self.counts]
+            self.count /= 2
+
+    def get_quantile(self, quantile: float, /) -> float:
+        target = self.count * quantile
+        seen = 0.0
+
+        for bound, count in zip(_bounds, self.counts):
+            seen += count
+
+            if seen >= target:
+                return bound
+
+        return _bounds[-1]
+
+
+@dataclass(slots=True, frozen=True)
+class _Bounds(object):
+    floor: float
+    ceiling: float
+
+
+# Derives each (service, operation) timeout from its latency histogram: the
+# quantile times multiplier, kept between floor and ceiling, which can be set per
+# service. Until an operation has min_samples the caller's default is used.
+@dataclass(slots=True)
+class AdaptiveTimeouts(object):
+    floor: float = 2.0
+    ceiling: float = 20.0
+    quantile: float = 0.99
+    multiplier: float = 2.0
+    min_samples: int = 50
+    services: dict[str, _Bounds] = attrib(factory=dict)
+    _histograms: dict[LatencyKey, LatencyHistogram] = attrib(init=False, factory=dict)
+
+    def get(self, service: str, operation: str, default: float, /) -> float:
+        histogram = self._histograms.get((service, operation))
+
+        if histogram is None or histogram.count < self.min_samples:
+            return default
+
+        bounds = self.services.get(service)
+        floor = bounds.floor if bounds is not None else self.floor
+        ceiling = bounds.ceiling if bounds is not None else self.ceiling
+        timeout = histogram.get_quantile(self.quantile) * self.multiplier
+
+        return min(max(timeout, floor), ceiling)
+
+    # Timed out requests should be recorded with the timeout they hit, so a service
+    # that slows down raises its own timeout
+    def record(self, service: str, operation: str, elapsed: float, /) -> None:
+        if (histogram := self._histograms.get((service, operation))) is None:
+            histogram = self._histograms[service, operation] = LatencyHistogram()
+
+        histogram.add(elapsed)
+
+    def get_stats(self, default: float, /) -> dict[str, int]:
+        stats: dict[str, int] = {}
+
+        for (service, operation), histogram in self._histograms.items():
+            stats[f'{service} {operation} p{self.quantile * 100:g} ms'] = round(
+                histogram.get_quantile(self.quantile) * 1000
+            )
+            stats[f'{service} {operation} timeout ms'] = round(
+                self.get(service, operation, default) * 1000
+            )
+
+        return stats
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any] | None, /) -> AdaptiveTimeouts:
+        if not config:
+            return cls()
+
+        floor = config.get('floor', 2.0)
+        ceiling = config.get('ceiling', 20.0)
+
+        return cls(
+            floor=floor,
+            ceiling=ceiling,
+            quantile=config.get('quantile', 0.99),
+            multiplier=config.get('multiplier', 2.0),
+            min_samples=config.get('min_samples', 50),
+            services={
+                name: _Bounds(
+                    section.get('floor', floor), section.get('ceiling', ceiling)
+                )
+                for name, section in config.get('services', {}).items()
+            },
+        )
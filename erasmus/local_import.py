@@ -0,0 +1,308 @@
+# Imports a Bible version from OSIS or USFM files into the local_verses table, for
+# versions served by the Local service:
+#
+#     erasmus-import [--config config.toml] VERSION FILE [FILE ...]
+#
+# The version's existing verses are replaced, so a version can be re-imported. When
+# services.Local.index_dir or services.Local.corpus_dir is configured, the version's
+# search index or packed corpus is rebuilt too. A packed corpus can also be built
+# without a database:
+#
+#     erasmus-pack OUTPUT FILE [FILE ...]
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import xml.etree.ElementTree as ElementTree
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Final
+
+from botus_receptus import re
+from botus_receptus.config import load
+
+from .data import get_book, get_book_number, get_usfm_book
+from .db.base import db
+from .db.local import LocalVerse
+from .exceptions import BookNotUnderstoodError
+from .packed_corpus import get_corpus_path, write
+from .search_index import SearchIndex, get_index_path
+
+_log: Final = logging.getLogger(__name__)
+
+VerseRecord = tuple[int, int, int, str]
+
+# OSIS elements whose text isn't part of the verse
+_osis_skipped: Final = {'note', 'title', 'reference', 'milestone'}
+
+_any_digits: Final = re.any_number_of(re.DIGIT)
+_usfm_marker_re: Final = re.compile(
+    re.capture(
+        r'\\', re.optional(r'\+'), re.one_or_more('[a-z0-9]'), re.optional(r'\*')
+    )
+)
+_usfm_note_re: Final = re.compile(
+    r'\\',
+    re.named_group('marker')(re.either('f', 'fe', 'x', 'ef', 'ex')),
+    re.WHITESPACE,
+    '.*?',
+    r'\\(?P=marker)\*',
+    flags=re.DOTALL,
+)
+# Word attributes such as \w grace|strong="H2580"\w*
+_usfm_attributes_re: Final = re.compile(r'\|', re.any_number_of(r'[^\\]'))
+# Markers whose text, up to the next marker, is a heading, title or introduction
+_usfm_skipped_re: Final = re.compile(
+    re.either(
+        'id',
+        'ide',
+        'h',
+        re.combine('toc', re.optional('a'), _any_digits),
+        re.combine('mt', re.optional('e'), _any_digits),
+        re.combine('ms', _any_digits),
+        'mr',
+        re.combine('s', _any_digits),
+        'sr',
+        'r',
+        'd',
+        'sp',
+        'rem',
+        'sts',
+        'cl',
+        'cp',
+        'ca',
+        'va',
+        'vp',
+        'usfm',
+        # Introduction markers, but not \it
+        re.combine('i(?!t$)', re.any_number_of('[a-z]'), _any_digits),
+    ),
+    re.END,
+)
+_number_re: Final = re.compile(re.named_group('number')(re.one_or_more(re.DIGIT)))
+_postgres_re: Final = re.compile(re.START, 'postgres://')
+
+
+def _get_book_number(book: str, /) -> int | None:
+    try:
+        return get_book_number(get_book(book))
+    except BookNotUnderstoodError:
+        return None
+
+
+def _get_number(text: str, /) -> int | None:
+    if (match := _number_re.match(text.strip())) is None:
+        return None
+
+    return int(match.group('number'))
+
+
+# Handles both container verses (<verse osisID="Gen.1.1">...</verse>) and milestone
+# verses (<verse sID="Gen.1.1" osisID="Gen.1.1"/>...<verse eID="Gen.1.1"/>)
+def parse_osis(text: str, /) -> Iterator[VerseRecord]:
+    current: tuple[int, int, int] | None = None
+    parts: list[str] = []
+    records: list[VerseRecord] = []
+
+    def start(osis_id: str, /) -> None:
+        nonlocal current
+
+        finish()
+
+        # Combined verses list every verse they cover; the first one is kept
+        book, _, rest = osis_id.split()[0].partition('.')
+        chapter, _, verse = rest.partition('.')
+
+        if (number := _get_book_number(book)) is None:
+            _log.warning('Skipping verse in unknown book: %s', osis_id)
+        elif chapter.isdigit() and verse.isdigit():
+            current = (number, int(chapter), int(verse))
+
+    def finish() -> None:
+        nonlocal current
+
+        if current is not None:
+            records.append((*current, ' '.join(''.join(parts).split())))
+
+        current = None
+        parts.clear()
+
+    def walk(element: ElementTree.Element, /) -> None:
+        tag = element.tag.rpartition('}')[2]
+
+        if tag == 'verse':
+            if 'eID' in element.attrib:
+                finish()
+            elif 'sID' in element.attrib:
+                start(element.get('osisID') or element.get('sID') or '')
+            elif 'osisID' in element.attrib:
+                start(element.get('osisID', ''))
+                add(element.text)
+
+                for child in element:
+                    walk(child)
+
+                finish()
+        elif tag not in _osis_skipped:
+            add(element.text)
+
+            for child in element:
+                walk(child)
+
+        add(element.tail)
+
+    def add(text: str | None, /) -> None:
+        if current is not None and text:
+            parts.append(text)
+
+    walk(ElementTree.fromstring(text))
+    finish()
+
+    return iter(records)
+
+
+def parse_usfm(text: str, /) -> Iterator[VerseRecord]:
+    text = _usfm_attributes_re.sub('', _usfm_note_re.sub('', text))
+    pieces = _usfm_marker_re.split(text)
+
+    book: int | None = None
+    chapter: int | None = None
+    verse: int | None = None
+    parts: list[str] = []
+
+    def finish() -> Iterator[VerseRecord]:
+        if book is not None and chapter is not None and verse is not None:
+            yield (book, chapter, verse, ' '.join(''.join(parts).split()))
+
+        parts.clear()
+
+    # Pieces alternate between text and markers, starting with text
+    for index in range(1, len(pieces), 2):
+        marker = pieces[index][1:].lstrip('+')
+        content = pieces[index + 1]
+
+        if marker == 'id':
+            yield from finish()
+            code = content.split()[0] if content.split() else ''
+            book = get_book_number(name) if (name := get_usfm_book(code)) else None
+            chapter = verse = None
+
+            if book is None:
+                _log.warning('Skipping unknown book: %s', code)
+        elif marker == 'c':
+            yield from finish()
+            chapter = _get_number(content)
+            verse = None
+        elif marker == 'v':
+            yield from finish()
+            verse = _get_number(content)
+            parts.append(content.strip().partition(' ')[2])
+        elif _usfm_skipped_re.match(marker) is None and verse is not None:
+            parts.append(content)
+
+    yield from finish()
+
+
+def read_file(path: Path, /) -> Iterator[VerseRecord]:
+    text = path.read_text(encoding='utf-8-sig')
+
+    if path.suffix.lower() in ('.xml', '.osis') or text.lstrip().startswith('<'):
+        return parse_osis(text)
+
+    return parse_usfm(text)
+
+
+# Later files override earlier ones for the same verse
+def get_verses(paths: Iterable[Path], /) -> list[VerseRecord]:
+    verses: dict[tuple[int, int, int], str] = {}
+
+    for path in paths:
+        for book, chapter, verse, text in read_file(path):
+            if text:
+                verses[book, chapter, verse] = text
+
+    return [(*key, text) for key, text in sorted(verses.items())]
+
+
+def get_records(
+    version: str,
+    paths: Iterable[Path],
+    /,
+) -> list[tuple[str, int, int, int, str]]:
+    return [(version, *verse) for verse in get_verses(paths)]
+
+
+async def import_version(
+    version: str,
+    paths: Iterable[Path],
+    db_url: str,
+    /,
+    *,
+    index_dir: str | None = None,
+    corpus_dir: str | None = None,
+) -> int:
+    records = get_records(version, paths)
+
+    await db.set_bind(db_url)
+
+    try:
+        count = await LocalVerse.replace(version, records)
+    finally:
+        await db.pop_bind().close()
+
+    if index_dir is not None:
+        index = SearchIndex.build(record[1:] for record in records)
+        index.save(get_index_path(index_dir, version))
+
+    if corpus_dir is not None:
+        write((record[1:] for record in records), get_corpus_path(corpus_dir, version))
+
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Import a Bible version from OSIS or USFM files'
+    )
+    parser.add_argument('--config', type=Path, default=Path('config.toml'))
+    parser.add_argument('version', help='the service version to give addbible')
+    parser.add_argument('paths', nargs='+', type=Path, metavar='file')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    config = load(args.config)
+    db_url = _postgres_re.sub('postgresql://', config['db_url'])
+    local_config = config.get('services', {}).get('Local', {})
+    count = asyncio.run(
+        import_version(
+            args.version,
+            args.paths,
+            db_url,
+            index_dir=local_config.get('index_dir'),
+            corpus_dir=local_config.get('corpus_dir'),
+        )
+    )
+
+    _log.info('Imported %d verses into %s', count, args.version)
+
+
+def pack_main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Build a packed corpus file from OSIS or USFM files'
+    )
+    parser.add_argument('output', type=Path)
+    parser.add_argument('paths', nargs='+', type=Path, metavar='file')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    verses = get_verses(args.paths)
+    write(verses, args.output)
+
+    _log.info('Packed %d verses into %s', len(verses), args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from time import monotonic
+
+from attr import attrib, dataclass
+
+
+# Measures how late the event loop wakes a task that sleeps for a fixed interval.
+# Anything running synchronously on the loop (such as parsing a page) shows up as
+# lag in every guild's commands and in the gateway heartbeat.
+@dataclass(slots=True)
+class LoopLagMonitor(object):
+    interval: float = 0.25
+    max_samples: int = 2400
+    max_lag: float = attrib(init=False, default=0.0)
+    _samples: deque[float] = attrib(init=False)
+    _task: asyncio.Task[None] | None = attrib(init=False, default=None)
+
+    def __attrs_post_init__(self, /) -> None:
+        self._samples = deque(maxlen=self.max_samples)
+
+    @property
+    def running(self, /) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, /) -> None:
+        if not self.running:
+            self._task = asyncio.ensure_future(self.__run())
+
+    def stop(self, /) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def record(self, lag: float, /) -> None:
+        self._samples.append(lag)
+
+        if lag > self.max_lag:
+            self.max_lag = lag
+
+    async def __run(self, /) -> None:
+        while True:
+            start = monotonic()
+            await asyncio.sleep(self.interval)
+            self.record(max(monotonic() - start - self.interval, 0.0))
+
+    def get_stats(self, /) -> dict[str, float]:
+        samples = sorted(self._samples)
+
+        if not samples:
+            return {}
+
+        return {
+            'loop lag mean ms': round(sum(samples) / len(samples) * 1000, 2),
+            'loop lag p99 ms': round(samples[int(len(samples) * 0.99)] * 1000, 2),
+            'loop lag max ms': round(self.max_lag * 1000, 2),
+        }
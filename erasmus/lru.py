@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from time import monotonic
+from typing import Any, Generic, TypeVar, overload
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+D = TypeVar('D')
+
+
+class LRUCache(Generic[K, V]):
+    __slots__ = (
+        'max_size',
+        'max_weight',
+        'ttl',
+        'weigher',
+        'weight',
+        'hits',
+        'misses',
+        'evictions',
+        '_entries',
+    )
+
+    max_size: int
+    max_weight: int | None
+    ttl: float | None
+    weigher: Callable[[V], int] | None
+    weight: int
+    hits: int
+    misses: int
+    evictions: int
+    _entries: OrderedDict[K, tuple[float | None, int, V]]
+
+    def __init__(
+        self,
+        /,
+        *,
+        max_size: int = 1024,
+        max_weight: int | None = None,
+        ttl: float | None = None,
+        weigher: Callable[[V], int] | None = None,
+    ) -> None:
+        self.max_size = max_size
+        self.max_weight = max_weight
+        self.ttl = ttl
+        self.weigher = weigher
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __len__(self, /) -> int:
+        return len(self._entries)
+
+    @overload
+    def get(self, key: K, /) -> V | None:
+        ...
+
+    @overload
+    def get(self, key: K, default: D, /) -> V | D:
+        ...
+
+    def get(self, key: K, default: Any = None, /) -> Any:
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            expires, _, value = entry
+
+            if expires is None or expires > monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+            self.__remove(key)
+
+        self.misses += 1
+        return default
+
+    def set(self, key: K, value: V, /) -> None:
+        if key in self._entries:
+            self.__remove(key)
+
+        weight = self.weigher(value) if self.weigher is not None else 0
+
+        if self.max_weight is not None and weight > self.max_weight:
+            return
+
+        expires = monotonic() + self.ttl if self.ttl is not None else None
+        self._entries[key] = (expires, weight, value)
+        self.weight += weight
+
+        while len(self._entries) > self.max_size or (
+            self.max_weight is not None and self.weight > self.max_weight
+        ):
+            self.__remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    # Caches the value unless the key already has a live entry, and returns whichever
+    # value is cached, so a value read before a newer set() can't replace it
+    def setdefault(self, key: K, value: V, /) -> V:
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            expires, _, current = entry
+
+            if expires is None or expires > monotonic():
+                return current
+
+        self.set(key, value)
+
+        return value
+
+    def discard(self, key: K, /) -> None:
+        if key in self._entries:
+            self.__remove(key)
+
+    def clear(self, /) -> int:
+        count = len(self._entries)
+        self._entries.clear()
+        self.weight = 0
+
+        return count
+
+    def __remove(self, key: K, /) -> None:
+        _, weight, _ = self._entries.pop(key)
+        self.weight -= weight
@@ -0,0 +1,180 @@
+# A version's verses packed into one file that is read through mmap, so looking up
+# a range of verses is a few offset reads and a slice of the file, and every bot
+# process on a host shares the same pages through the OS page cache.
+#
+# All integers are little-endian uint32s:
+#
+#     header    magic, format version, book count, chapter count, slot count
+#     books     book count + 1 indexes into chapters; book n (1-based) has the
+#               chapters from books[n - 1] to books[n]
+#     chapters  chapter count + 1 indexes into slots; the chapter's verse n is slot
+#               chapters[i] + n - 1
+#     slots     slot count + 1 offsets into the text; a missing verse has an empty
+#               span
+#     text      every verse's UTF-8 text, in canonical order
+from __future__ import annotations
+
+import mmap
+import struct
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Final, cast
+
+from attr import dataclass
+
+MAGIC: Final = b'ERPC'
+FORMAT_VERSION: Final = 1
+
+VerseRow = tuple[int, int, int, str]
+
+_header: Final = struct.Struct('<4s4I')
+_uint: Final = struct.Struct('<I')
+
+
+def get_corpus_path(corpus_dir: str | Path, version: str, /) -> Path:
+    return Path(corpus_dir) / f'{version}.corpus'
+
+
+@dataclass(slots=True)
+class PackedCorpus(object):
+    data: mmap.mmap | bytes
+    book_count: int
+    _books_start: int
+    _chapters_start: int
+    _slots_start: int
+    _text_start: int
+
+    def close(self, /) -> None:
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def __read(self, start: int, index: int, /) -> int:
+        return cast(int, _uint.unpack_from(self.data, start + index * 4)[0])
+
+    # Returns the verses in the range that exist, in the same form as
+    # LocalVerse.get_range
+    def get_range(
+        self,
+        book: int,
+        start: tuple[int, int],
+        end: tuple[int, int],
+        /,
+    ) -> list[tuple[int, int, str]]:
+        if not 1 <= book <= self.book_count:
+            return []
+
+        first_chapter = self.__read(self._books_start, book - 1)
+        chapter_count = self.__read(self._books_start, book) - first_chapter
+        rows: list[tuple[int, int, str]] = []
+
+        for chapter in range(max(start[0], 1), min(end[0], chapter_count) + 1):
+            first_slot = self.__read(self._chapters_start, first_chapter + chapter - 1)
+            verse_count = (
+                self.__read(self._chapters_start, first_chapter + chapter) - first_slot
+            )
+            first_verse = start[1] if chapter == start[0] else 1
+            last_verse = end[1] if chapter == end[0] else verse_count
+
+            for verse in range(max(first_verse, 1), min(last_verse, verse_count) + 1):
+                slot = first_slot + verse - 1
+                text_start, text_end = struct.unpack_from(
+                    '<2I', self.data, self._slots_start + slot * 4
+                )
+
+                if text_start != text_end:
+                    text = self.data[
+                        self._text_start + text_start : self._text_start + text_end
+                    ]
+                    rows.append((chapter, verse, str(text, 'utf-8')))
+
+        return rows
+
+    @classmethod
+    def from_bytes(cls, data: mmap.mmap | bytes, /) -> PackedCorpus:
+        if len(data) < _header.size:
+            raise ValueError('File is too short')
+
+        magic, version, book_count, chapter_count, slot_count = _header.unpack_from(
+            data
+        )
+
+        if magic != MAGIC:
+            raise ValueError('Not a packed corpus')
+
+        if version != FORMAT_VERSION:
+            raise ValueError(f'Unsupported format version {version}')
+
+        books_start = _header.size
+        chapters_start = books_start + (book_count + 1) * 4
+        slots_start = chapters_start + (chapter_count + 1) * 4
+        text_start = slots_start + (slot_count + 1) * 4
+
+        if len(data) < text_start:
+            raise ValueError('File is truncated')
+
+        return cls(
+            data, book_count, books_start, chapters_start, slots_start, text_start
+        )
+
+    # Raises ValueError when the file isn't a packed corpus in this format
+    @classmethod
+    def open(cls, path: Path, /) -> PackedCorpus:
+        with path.open('rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            return cls.from_bytes(data)
+        except ValueError:
+            data.close()
+            raise
+
+
+def pack(rows: Iterable[VerseRow], /) -> bytes:
+    verses: dict[int, dict[int, dict[int, str]]] = {}
+
+    for book, chapter, verse, text in rows:
+        if book >= 1 and chapter >= 1 and verse >= 1:
+            verses.setdefault(book, {}).setdefault(chapter, {})[verse] = text
+
+    book_count = max(verses, default=0)
+    books: list[int] = [0]
+    chapters: list[int] = [0]
+    slots: list[int] = [0]
+    blob = bytearray()
+
+    for book in range(1, book_count + 1):
+        book_verses = verses.get(book, {})
+
+        for chapter in range(1, max(book_verses, default=0) + 1):
+            chapter_verses = book_verses.get(chapter, {})
+
+            for verse in range(1, max(chapter_verses, default=0) + 1):
+                blob += chapter_verses.get(verse, '').encode('utf-8')
+                slots.append(len(blob))
+
+            chapters.append(len(slots) - 1)
+
+        books.append(len(chapters) - 1)
+
+    header = _header.pack(
+        MAGIC, FORMAT_VERSION, book_count, len(chapters) - 1, len(slots) - 1
+    )
+
+    return b''.join(
+        (
+            header,
+            struct.pack(f'<{len(books)}I', *books),
+            struct.pack(f'<{len(chapters)}I', *chapters),
+            struct.pack(f'<{len(slots)}I', *slots),
+            blob,
+        )
+    )
+
+
+# Writes to a temporary file and renames it, so processes that have the old file
+# mapped keep reading it until they reopen
+def write(rows: Iterable[VerseRow], path: Path, /) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = path.with_suffix('.tmp')
+    temporary_path.write_bytes(pack(rows))
+    temporary_path.replace(path)
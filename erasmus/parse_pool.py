@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, TypeVar
+
+from attr import attrib, dataclass
+
+T = TypeVar('T')
+
+
+# Runs parsers in worker processes so large pages don't block the event loop. The
+# parsers must be module-level functions taking the raw payload first, with
+# picklable arguments and results. Payloads smaller than min_size are parsed
+# inline, where the round trip to a worker would cost more than the parse.
+@dataclass(slots=True)
+class ParsePool(object):
+    max_workers: int = 0
+    min_size: int = 32 * 1024
+    offloaded: int = attrib(init=False, default=0)
+    inline: int = attrib(init=False, default=0)
+    _executor: ProcessPoolExecutor | None = attrib(init=False, default=None)
+
+    @property
+    def enabled(self, /) -> bool:
+        return self.max_workers > 0
+
+    async def run(
+        self,
+        func: Callable[..., T],
+        payload: bytes | str,
+        /,
+        *args: Any,
+    ) -> T:
+        if not self.enabled or len(payload) < self.min_size:
+            self.inline += 1
+            return func(payload, *args)
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+        self.offloaded += 1
+
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, partial(func, payload, *args)
+        )
+
+    def close(self, /) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self, /) -> dict[str, int]:
+        return {
+            'parse workers': self.max_workers,
+            'parses offloaded': self.offloaded,
+            'parses inline': self.inline,
+        }
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any] | None, /) -> ParsePool:
+        if not config:
+            return cls()
+
+        return cls(
+            max_workers=config.get('max_workers', 0),
+            min_size=config.get('min_size', 32 * 1024),
+        )
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
-from typing import Protocol
+import asyncio
+from collections.abc import Iterable, Sequence
+from typing import TYPE_CHECKING, Protocol
 
 from .data import Passage, SearchResults, VerseRange
 
+if TYPE_CHECKING:
+    from .services.tokens import Chapter
+
 
 class Bible(Protocol):
     command: str
@@ -13,12 +18,42 @@ class Bible(Protocol):
     service_version: str
     rtl: bool | None
     books: int
+    # [service, service_version] pairs to fall back to, in order
+    fallbacks: Sequence[Sequence[str]]
 
 
 class Service(Protocol):
+    async def prepare(self, bibles: Iterable[Bible], /) -> None:
+        ...
+
+    async def close(self, /) -> None:
+        ...
+
+    def get_stats(self, /) -> dict[str, int]:
+        ...
+
     async def get_passage(self, bible: Bible, verses: VerseRange, /) -> Passage:
         ...
 
+    async def get_passages(
+        self,
+        bible: Bible,
+        ranges: Sequence[VerseRange],
+        /,
+        *,
+        semaphore: asyncio.Semaphore | None = None,
+    ) -> list[Passage | Exception]:
+        ...
+
+    def supports_batch(self, bible: Bible, /) -> bool:
+        ...
+
+    def supports_chapters(self, bible: Bible, /) -> bool:
+        ...
+
+    async def get_chapter(self, bible: Bible, book: str, chapter: int, /) -> Chapter:
+        ...
+
     async def search(
         self,
         bible: Bible,
@@ -0,0 +1,485 @@
+# An index file holds a version's verses and postings as packed arrays. Integers
+# are little-endian, uint16 for the per-verse columns and term frequencies and
+# uint32 otherwise:
+#
+#     header      magic, format version, verse count, term count
+#     verses      the books, chapters, verse numbers and word counts of every verse
+#     texts       verse count + 1 offsets into the texts' UTF-8, then the UTF-8
+#     vocabulary  term count + 1 offsets into the terms' UTF-8, then the UTF-8
+#     postings    term count + 1 indexes into the docs, freqs and offsets arrays,
+#                 term count + 1 offsets into the positions, then docs, freqs,
+#                 offsets and the varint positions of every term in order
+from __future__ import annotations
+
+import math
+import re
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+from itertools import accumulate
+from pathlib import Path
+from typing import Final, Literal, Union
+
+from attr import attrib, dataclass
+
+from .lru import LRUCache
+
+MAGIC: Final = b'ERSI'
+# Bumped whenever the file layout changes so stale indexes get rebuilt
+FORMAT_VERSION: Final = 2
+
+Ranking = Literal['canonical', 'bm25']
+VerseRow = tuple[int, int, int, str]
+
+_word_re: Final = re.compile(r'\w+')
+_header: Final = struct.Struct('<4s3I')
+_k1: Final = 1.2
+_b: Final = 0.75
+
+
+def tokenize(text: str, /) -> list[str]:
+    return _word_re.findall(text.lower())
+
+
+def _encode_varints(numbers: Iterable[int], /) -> bytes:
+    data = bytearray()
+
+    for number in numbers:
+        while number >= 0x80:
+            data.append((number & 0x7F) | 0x80)
+            number >>= 7
+        data.append(number)
+
+    return bytes(data)
+
+
+def _decode_varints(data: bytes, /) -> list[int]:
+    # Positions are delta-encoded, and in the common case every delta fits in a byte
+    if data.isascii():
+        return list(accumulate(data))
+
+    numbers: list[int] = []
+    position = 0
+    value = 0
+
+    while position < len(data):
+        delta, position = _read_varint(data, position)
+        value += delta
+        numbers.append(value)
+
+    return numbers
+
+
+def _read_varint(data: bytes, position: int, /) -> tuple[int, int]:
+    shift = 0
+    result = 0
+
+    while True:
+        byte = data[position]
+        position += 1
+        result |= (byte & 0x7F) << shift
+
+        if byte < 0x80:
+            return result, position
+
+        shift += 7
+
+
+# One term's postings. Verse ids and term frequencies are plain arrays so queries
+# can intersect them without decoding; positions stay delta-encoded as varints and
+# are only decoded for the verses a phrase query needs to check.
+@dataclass(slots=True)
+class _Postings(object):
+    docs: array[int]
+    freqs: array[int]
+    offsets: array[int]
+    positions: bytes
+
+    def get_positions(self, index: int, /) -> list[int]:
+        end = (
+            self.offsets[index + 1]
+            if index + 1 < len(self.offsets)
+            else len(self.positions)
+        )
+
+        return _decode_varints(self.positions[self.offsets[index] : end])
+
+
+@dataclass(slots=True, frozen=True)
+class _Word(object):
+    word: str
+
+
+@dataclass(slots=True, frozen=True)
+class _Prefix(object):
+    prefix: str
+
+
+@dataclass(slots=True, frozen=True)
+class _Phrase(object):
+    words: tuple[str, ...]
+
+
+_Clause = Union[_Word, _Prefix, _Phrase]
+
+
+# Terms with spaces (quoted on the command line) are phrases and terms ending in "*"
+# match every word they start. Every clause has to match.
+def parse_query(terms: Sequence[str], /) -> list[_Clause]:
+    clauses: list[_Clause] = []
+
+    for term in terms:
+        words = tokenize(term)
+
+        if not words:
+            continue
+
+        if len(words) > 1:
+            clauses.append(_Phrase(tuple(words)))
+        elif term.rstrip().endswith('*'):
+            clauses.append(_Prefix(words[0]))
+        else:
+            clauses.append(_Word(words[0]))
+
+    return clauses
+
+
+# An in-memory inverted index over one version's verses with positional postings.
+# Verse ids are positions in canonical order, so canonical ranking is id order.
+# Results for a query are computed once and cached, so paging through them is a
+# slice of the cached list.
+@dataclass(slots=True)
+class SearchIndex(object):
+    books: array[int]
+    chapters: array[int]
+    verses: array[int]
+    texts: list[str]
+    lengths: array[int]
+    vocabulary: list[str]
+    postings: list[_Postings]
+    _terms: dict[str, int] = attrib(init=False)
+    _average_length: float = attrib(init=False)
+    _results: LRUCache[tuple[tuple[str, ...], Ranking], list[int]] = attrib(init=False)
+
+    def __attrs_post_init__(self, /) -> None:
+        self._terms = {term: index for index, term in enumerate(self.vocabulary)}
+        self._average_length = sum(self.lengths) / max(len(self.lengths), 1) or 1.0
+        self._results = LRUCache(max_size=256)
+
+    def __len__(self, /) -> int:
+        return len(self.texts)
+
+    def search(
+        self,
+        terms: Sequence[str],
+        /,
+        *,
+        limit: int,
+        offset: int = 0,
+        ranking: Ranking = 'canonical',
+    ) -> tuple[list[VerseRow], int]:
+        key = (tuple(terms), ranking)
+
+        if (results := self._results.get(key)) is None:
+            results = self.__run(parse_query(terms), ranking)
+            self._results.set(key, results)
+
+        return [
+            (self.books[doc], self.chapters[doc], self.verses[doc], self.texts[doc])
+            for doc in results[offset : offset + limit]
+        ], len(results)
+
+    def __run(self, clauses: list[_Clause], ranking: Ranking, /) -> list[int]:
+        if not clauses:
+            return []
+
+        matches = [self.__match(clause) for clause in clauses]
+        # Intersect starting from the rarest clause
+        order = sorted(range(len(matches)), key=lambda i: len(matches[i]))
+        docs = list(matches[order[0]])
+
+        for index in order[1:]:
+            clause_matches = matches[index]
+            docs = [doc for doc in docs if doc in clause_matches]
+
+            if not docs:
+                return []
+
+        docs.sort()
+
+        if ranking != 'bm25':
+            return docs
+
+        scores = dict.fromkeys(docs, 0.0)
+        total = len(self.texts)
+
+        for clause_matches in matches:
+            idf = math.log(
+                1 + (total - len(clause_matches) + 0.5) / (len(clause_matches) + 0.5)
+            )
+
+            for doc in docs:
+                frequency = clause_matches[doc]
+                norm = _k1 * (1 - _b + _b * self.lengths[doc] / self._average_length)
+                scores[doc] += idf * frequency * (_k1 + 1) / (frequency + norm)
+
+        # Stable, so equal scores stay in canonical order
+        return sorted(docs, key=lambda doc: -scores[doc])
+
+    # Maps each verse a clause matches to how many times it matches there
+    def __match(self, clause: _Clause, /) -> dict[int, int]:
+        if isinstance(clause, _Word):
+            if (postings := self.__get_postings(clause.word)) is None:
+                return {}
+
+            return dict(zip(postings.docs, postings.freqs))
+
+        if isinstance(clause, _Prefix):
+            matches: dict[int, int] = defaultdict(int)
+            start = bisect_left(self.vocabulary, clause.prefix)
+
+            for term in self.vocabulary[start:]:
+                if not term.startswith(clause.prefix):
+                    break
+
+                postings = self.postings[self._terms[term]]
+
+                for doc, frequency in zip(postings.docs, postings.freqs):
+                    matches[doc] += frequency
+
+            return dict(matches)
+
+        return self.__match_phrase(clause.words)
+
+    def __match_phrase(self, words: tuple[str, ...], /) -> dict[int, int]:
+        word_postings: list[_Postings] = []
+
+        for word in words:
+            if (postings := self.__get_postings(word)) is None:
+                return {}
+            word_postings.append(postings)
+
+        # Only the verses containing every word have their positions decoded
+        doc_indexes = [
+            dict(zip(postings.docs, range(len(postings.docs))))
+            for postings in word_postings
+        ]
+        candidates = set(min(doc_indexes, key=len)).intersection(*doc_indexes)
+        matches: dict[int, int] = {}
+
+        for doc in candidates:
+            starts = set(word_postings[0].get_positions(doc_indexes[0][doc]))
+
+            for offset in range(1, len(word_postings)):
+                starts.intersection_update(
+                    position - offset
+                    for position in word_postings[offset].get_positions(
+                        doc_indexes[offset][doc]
+                    )
+                )
+
+                if not starts:
+                    break
+
+            if starts:
+                matches[doc] = len(starts)
+
+        return matches
+
+    def __get_postings(self, word: str, /) -> _Postings | None:
+        if (index := self._terms.get(word)) is None:
+            return None
+
+        return self.postings[index]
+
+    def save(self, path: Path, /) -> None:
+        posting_indexes = array('I', [0])
+        position_offsets = array('I', [0])
+
+        for postings in self.postings:
+            posting_indexes.append(posting_indexes[-1] + len(postings.docs))
+            position_offsets.append(position_offsets[-1] + len(postings.positions))
+
+        data = b''.join(
+            (
+                _header.pack(
+                    MAGIC, FORMAT_VERSION, len(self.texts), len(self.vocabulary)
+                ),
+                _pack_array(self.books),
+                _pack_array(self.chapters),
+                _pack_array(self.verses),
+                _pack_array(self.lengths),
+                _pack_strings(self.texts),
+                _pack_strings(self.vocabulary),
+                _pack_array(posting_indexes),
+                _pack_array(position_offsets),
+                *(_pack_array(postings.docs) for postings in self.postings),
+                *(_pack_array(postings.freqs) for postings in self.postings),
+                *(_pack_array(postings.offsets) for postings in self.postings),
+                *(postings.positions for postings in self.postings),
+            )
+        )
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = path.with_suffix('.tmp')
+        temporary_path.write_bytes(data)
+        temporary_path.replace(path)
+
+    # Raises ValueError when the file isn't an index in this format, including one
+    # written in an older format, so the caller rebuilds it
+    @classmethod
+    def load(cls, path: Path, /) -> SearchIndex:
+        return cls.from_bytes(path.read_bytes())
+
+    @classmethod
+    def from_bytes(cls, data: bytes, /) -> SearchIndex:
+        if len(data) < _header.size:
+            raise ValueError('File is too short')
+
+        magic, version, verse_count, term_count = _header.unpack_from(data)
+
+        if magic != MAGIC:
+            raise ValueError('Not a search index')
+
+        if version != FORMAT_VERSION:
+            raise ValueError(f'Unsupported format version {version}')
+
+        reader = _Reader(data, _header.size)
+        books = reader.read_array('H', verse_count)
+        chapters = reader.read_array('H', verse_count)
+        verses = reader.read_array('H', verse_count)
+        lengths = reader.read_array('H', verse_count)
+        texts = reader.read_strings(verse_count)
+        vocabulary = reader.read_strings(term_count)
+        posting_indexes = reader.read_array('I', term_count + 1)
+        position_offsets = reader.read_array('I', term_count + 1)
+        docs = reader.read_array('I', posting_indexes[-1])
+        freqs = reader.read_array('H', posting_indexes[-1])
+        offsets = reader.read_array('I', posting_indexes[-1])
+        positions = reader.read(position_offsets[-1])
+
+        if reader.position != len(data):
+            raise ValueError('File has trailing data')
+
+        return cls(
+            books,
+            chapters,
+            verses,
+            texts,
+            lengths,
+            vocabulary,
+            [
+                _Postings(
+                    docs[start:end],
+                    freqs[start:end],
+                    offsets[start:end],
+                    positions[position_start:position_end],
+                )
+                for start, end, position_start, position_end in zip(
+                    posting_indexes,
+                    posting_indexes[1:],
+                    position_offsets,
+                    position_offsets[1:],
+                )
+            ],
+        )
+
+    @classmethod
+    def build(cls, rows: Iterable[VerseRow], /) -> SearchIndex:
+        books = array('H')
+        chapters = array('H')
+        verses = array('H')
+        texts: list[str] = []
+        lengths = array('H')
+        occurrences: dict[str, dict[int, list[int]]] = defaultdict(dict)
+
+        for doc, (book, chapter, verse, text) in enumerate(sorted(rows)):
+            books.append(book)
+            chapters.append(chapter)
+            verses.append(verse)
+            texts.append(text)
+
+            words = tokenize(text)
+            lengths.append(len(words))
+
+            for position, word in enumerate(words):
+                occurrences[word].setdefault(doc, []).append(position)
+
+        vocabulary = sorted(occurrences)
+        postings: list[_Postings] = []
+
+        for word in vocabulary:
+            docs = array('I')
+            freqs = array('H')
+            offsets = array('I')
+            positions = bytearray()
+
+            for doc, word_positions in occurrences[word].items():
+                docs.append(doc)
+                freqs.append(len(word_positions))
+                offsets.append(len(positions))
+                positions += _encode_varints(
+                    position - previous
+                    for previous, position in zip([0] + word_positions, word_positions)
+                )
+
+            postings.append(_Postings(docs, freqs, offsets, bytes(positions)))
+
+        return cls(books, chapters, verses, texts, lengths, vocabulary, postings)
+
+
+def _pack_array(values: array[int], /) -> bytes:
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+
+    return values.tobytes()
+
+
+def _pack_strings(strings: list[str], /) -> bytes:
+    encoded = [string.encode('utf-8') for string in strings]
+    offsets = array('I', accumulate((len(item) for item in encoded), initial=0))
+
+    return _pack_array(offsets) + b''.join(encoded)
+
+
+# Reads an index file's sections in order
+@dataclass(slots=True)
+class _Reader(object):
+    data: bytes
+    position: int
+
+    def read(self, size: int, /) -> bytes:
+        end = self.position + size
+
+        if end > len(self.data):
+            raise ValueError('File is truncated')
+
+        result = self.data[self.position : end]
+        self.position = end
+
+        return result
+
+    def read_array(self, typecode: str, count: int, /) -> array[int]:
+        result = array(typecode)
+        result.frombytes(self.read(count * result.itemsize))
+
+        if sys.byteorder == 'big':
+            result.byteswap()
+
+        return result
+
+    def read_strings(self, count: int, /) -> list[str]:
+        offsets = self.read_array('I', count + 1)
+        data = self.read(offsets[-1])
+
+        return [
+            str(data[start:end], 'utf-8') for start, end in zip(offsets, offsets[1:])
+        ]
+
+
+def get_index_path(index_dir: str | Path, version: str, /) -> Path:
+    return Path(index_dir) / f'{version}.idx'
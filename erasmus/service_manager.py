@@ -2,25 +2,87 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from typing import Final
+from collections.abc import Awaitable, Callable, Hashable, Iterable, Sequence
+from typing import Final, TypeVar, cast
 
 import aiohttp
 import async_timeout
 from attr import attrib, dataclass
 
 from . import services
+from .backend_health import BackendHealth
+from .cache import PassageCache, get_chapter_key, get_passage_key
 from .config import Config
+from .connection_pool import ConnectionPool
 from .data import Passage, SearchResults, VerseRange
-from .exceptions import ServiceLookupTimeout, ServiceSearchTimeout
+from .exceptions import (
+    ChaptersNotSupportedError,
+    DoNotUnderstandError,
+    ErasmusError,
+    ServiceLookupTimeout,
+    ServiceSearchTimeout,
+)
+from .latency import AdaptiveTimeouts
+from .parse_pool import ParsePool
 from .protocols import Bible, Service
+from .services.tokens import Chapter, Token, render_markdown
+from .single_flight import SingleFlight
 
 _log: Final = logging.getLogger(__name__)
 
+T = TypeVar('T')
+
+# Passages spanning more chapters than this are fetched directly rather than
+# fetching every chapter in between
+_max_chapter_span: Final = 3
+
+
+# A bible as served by one of its fallback backends
+@dataclass(slots=True)
+class _BackendBible(object):
+    command: str
+    name: str
+    abbr: str
+    service: str
+    service_version: str
+    rtl: bool | None
+    books: int
+    fallbacks: Sequence[Sequence[str]] = ()
+
+    @classmethod
+    def create(cls, bible: Bible, service: str, service_version: str, /) -> Bible:
+        return cls(
+            bible.command,
+            bible.name,
+            bible.abbr,
+            service,
+            service_version,
+            bible.rtl,
+            bible.books,
+        )
+
 
 @dataclass(slots=True)
 class ServiceManager(object):
     service_map: dict[str, Service] = attrib(factory=dict)
     timeout: float = 10
+    cache: PassageCache = attrib(factory=PassageCache)
+    parse_pool: ParsePool = attrib(factory=ParsePool)
+    pools: dict[str, ConnectionPool] = attrib(factory=dict)
+    health: BackendHealth = attrib(factory=BackendHealth)
+    timeouts: AdaptiveTimeouts = attrib(factory=AdaptiveTimeouts)
+    hedged: int = attrib(init=False, default=0)
+    failed_over: int = attrib(init=False, default=0)
+    _passage_flights: SingleFlight[Hashable, Passage] = attrib(
+        init=False, factory=SingleFlight
+    )
+    _chapter_flights: SingleFlight[Hashable, Chapter] = attrib(
+        init=False, factory=SingleFlight
+    )
+    _search_flights: SingleFlight[Hashable, SearchResults] = attrib(
+        init=False, factory=SingleFlight
+    )
+    _closing: asyncio.Future[None] | None = attrib(init=False, default=None)
 
     def __contains__(self, key: str, /) -> bool:
         return key in self.service_map
@@ -28,29 +90,417 @@ class ServiceManager(object):
     def __len__(self, /) -> int:
         return len(self.service_map)
 
+    async def prepare(self, bibles: Iterable[Bible], /) -> None:
+        by_service: dict[str, list[Bible]] = {}
+
+        for bible in bibles:
+            if bible.service in self.service_map:
+                by_service.setdefault(bible.service, []).append(bible)
+
+        await asyncio.gather(
+            *(
+                self.service_map[name].prepare(service_bibles)
+                for name, service_bibles in by_service.items()
+            ),
+            *(pool.warm() for pool in self.pools.values()),
+        )
+
     async def get_passage(self, bible: Bible, verses: VerseRange, /) -> Passage:
-        service = self.service_map.get(bible.service)
-        assert service is not None
+        assert bible.service in self.service_map
+        timeout = self.timeouts.get(bible.service, 'lookup', self.timeout)
         try:
             _log.debug(f'Getting passage {verses} ({bible.abbr})')
-            with async_timeout.timeout(self.timeout):
-                passage = await service.get_passage(bible, verses)
-                passage.version = bible.abbr
-                _log.debug(f'Got passage {passage.citation}')
+            with async_timeout.timeout(timeout):
+                if (text := await self.cache.get(bible, verses)) is not None:
+                    _log.debug(f'Got passage {verses} ({bible.abbr}) from cache')
+                    return Passage(text=text, range=verses, version=bible.abbr)
+
+                async def fetch() -> Passage:
+                    passage = await self.__hedge(
+                        bible,
+                        lambda service, backend: self.__fetch_passage(
+                            service, backend, verses
+                        ),
+                    )
+                    passage.version = bible.abbr
+                    _log.debug(f'Got passage {passage.citation}')
+                    await self.cache.set(bible, verses, passage.text)
+                    return passage
+
+                passage = await self._passage_flights.do(
+                    get_passage_key(bible, verses), fetch
+                )
+
+                if passage.range is not verses:
+                    passage = Passage(
+                        text=passage.text, range=verses, version=bible.abbr
+                    )
+
                 return passage
         except asyncio.TimeoutError:
-            raise ServiceLookupTimeout(bible, verses)
+            _log.warning(
+                f'Timed out getting passage {verses} ({bible.abbr}) from '
+                f'{bible.service} after {timeout:.2f}s'
+            )
+            self.timeouts.record(bible.service, 'lookup', timeout)
+            raise ServiceLookupTimeout(bible, verses, timeout)
+
+    # Returns the passage, or the error getting it, for each range in order. When the
+    # service can fetch several ranges in one request, the ranges that aren't cached,
+    # sliced from chapters or already being fetched go in one batch; every other
+    # range is looked up as in get_passage. A batched range that failed with
+    # something other than an ErasmusError is retried on its own, which moves it to a
+    # fallback if the service keeps failing. The semaphore, when given, is held for
+    # each request, so callers can share one limit across several calls.
+    async def get_passages(
+        self,
+        bible: Bible,
+        ranges: Sequence[VerseRange],
+        /,
+        *,
+        semaphore: asyncio.Semaphore | None = None,
+    ) -> list[Passage | Exception]:
+        assert bible.service in self.service_map
+        service = self.service_map[bible.service]
+        limit = semaphore or asyncio.Semaphore(max(len(ranges), 1))
+        results: list[Passage | Exception | None] = [None] * len(ranges)
+        singles: list[int] = []
+        batch: list[int] = []
+
+        for index, verses in enumerate(ranges):
+            if (text := await self.cache.get(bible, verses)) is not None:
+                results[index] = Passage(text=text, range=verses, version=bible.abbr)
+            elif (
+                not service.supports_batch(bible)
+                or self.__use_chapters(service, bible, verses)
+                or get_passage_key(bible, verses) in self._passage_flights
+            ):
+                singles.append(index)
+            else:
+                batch.append(index)
+
+        if len(batch) < 2:
+            singles += batch
+            batch = []
+
+        async def get_single(index: int, /) -> None:
+            try:
+                async with limit:
+                    results[index] = await self.get_passage(bible, ranges[index])
+            except Exception as error:
+                results[index] = error
+
+        async def get_batch() -> None:
+            batch_ranges = [ranges[index] for index in batch]
+            timeout = self.timeouts.get(bible.service, 'batch lookup', self.timeout)
+            passages: list[Passage | Exception]
+            _log.debug(f'Getting passages {batch_ranges} ({bible.abbr})')
+
+            try:
+                with async_timeout.timeout(timeout):
+                    passages = await self.__hedge(
+                        bible,
+                        lambda service, backend: service.get_passages(
+                            backend, batch_ranges, semaphore=limit
+                        ),
+                        operation='batch lookup',
+                    )
+            except asyncio.TimeoutError:
+                _log.warning(
+                    f'Timed out getting passages {batch_ranges} ({bible.abbr}) from '
+                    f'{bible.service} after {timeout:.2f}s'
+                )
+                self.timeouts.record(bible.service, 'batch lookup', timeout)
+                passages = [
+                    ServiceLookupTimeout(bible, verses, timeout)
+                    for verses in batch_ranges
+                ]
+            except Exception as error:
+                passages = [error] * len(batch)
+
+            retries: list[int] = []
+
+            for index, passage in zip(batch, passages):
+                if isinstance(passage, Passage):
+                    passage.version = bible.abbr
+                    await self.cache.set(bible, ranges[index], passage.text)
+                    results[index] = passage
+                elif isinstance(passage, ErasmusError):
+                    results[index] = passage
+                else:
+                    retries.append(index)
+
+            await asyncio.gather(*(get_single(index) for index in retries))
+
+        await asyncio.gather(
+            *(get_single(index) for index in singles),
+            *((get_batch(),) if batch else ()),
+        )
+
+        return cast('list[Passage | Exception]', results)
+
+    async def __fetch_passage(
+        self,
+        service: Service,
+        bible: Bible,
+        verses: VerseRange,
+        /,
+    ) -> Passage:
+        # A service that can't fetch chapters after all still looks up the passage
+        if self.__use_chapters(service, bible, verses):
+            try:
+                return await self.__get_passage_from_chapters(service, bible, verses)
+            except ChaptersNotSupportedError:
+                pass
+
+        return await service.get_passage(bible, verses)
+
+    def __get_backends(self, bible: Bible, /) -> list[Bible]:
+        backends: list[Bible] = [bible]
+
+        for service, service_version in bible.fallbacks:
+            if service in self.service_map:
+                backends.append(_BackendBible.create(bible, service, service_version))
+
+        available = [
+            backend
+            for backend in backends
+            if self.health.is_available((backend.service, backend.service_version))
+        ]
+
+        # When every backend is failing, keep trying them rather than fail outright
+        return available or backends
+
+    # Calls the first backend and, once it has taken longer than its p95, the next
+    # one as well, moving on straight away when one fails. The first result wins.
+    # Errors about the request itself, like an unknown book, come from the request
+    # rather than the backend, so they are returned as they are. Latencies are
+    # recorded under operation, and only lookups count towards the hedge delay.
+    async def __hedge(
+        self,
+        bible: Bible,
+        func: Callable[[Service, Bible], Awaitable[T]],
+        /,
+        *,
+        operation: str = 'lookup',
+    ) -> T:
+        backends = self.__get_backends(bible)
+        loop = asyncio.get_running_loop()
+        tasks: dict[asyncio.Future[T], tuple[Bible, float]] = {}
+        error: BaseException | None = None
+        index = 0
+
+        def start() -> None:
+            nonlocal index
+            backend = backends[index]
+            index += 1
+            tasks[
+                asyncio.ensure_future(func(self.service_map[backend.service], backend))
+            ] = (backend, loop.time())
+
+        start()
+
+        try:
+            while tasks:
+                delay: float | None = None
+
+                if index < len(backends):
+                    latest, started_at = list(tasks.values())[-1]
+                    delay = max(
+                        self.health.get_hedge_delay(
+                            (latest.service, latest.service_version)
+                        )
+                        - (loop.time() - started_at),
+                        0,
+                    )
+
+                done, _ = await asyncio.wait(
+                    tasks, timeout=delay, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    self.hedged += 1
+                    start()
+                    continue
+
+                for task in done:
+                    backend, started_at = tasks.pop(task)
+                    key = (backend.service, backend.service_version)
+
+                    if (task_error := task.exception()) is None:
+                        elapsed = loop.time() - started_at
+                        self.health.record_success(
+                            key, elapsed if operation == 'lookup' else None
+                        )
+                        self.timeouts.record(backend.service, operation, elapsed)
+
+                        if backend is not bible:
+                            self.failed_over += 1
+
+                        return task.result()
+
+                    if isinstance(task_error, ErasmusError):
+                        raise task_error
+
+                    _log.warning(
+                        f'Error getting passage from {backend.service} '
+                        f'({backend.service_version}): {task_error!r}'
+                    )
+                    self.health.record_failure(key)
+                    error = task_error
+
+                    if index < len(backends):
+                        start()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+            if tasks:
+                await asyncio.wait(tasks)
+
+        assert error is not None
+        raise error
+
+    def __use_chapters(
+        self,
+        service: Service,
+        bible: Bible,
+        verses: VerseRange,
+        /,
+    ) -> bool:
+        if not self.cache.chapters or not service.supports_chapters(bible):
+            return False
+
+        end = verses.end if verses.end is not None else verses.start
+
+        return 0 <= end.chapter - verses.start.chapter < _max_chapter_span
+
+    async def __get_chapter(
+        self,
+        service: Service,
+        bible: Bible,
+        book: str,
+        number: int,
+        /,
+    ) -> Chapter:
+        if (chapter := self.cache.get_chapter(bible, book, number)) is not None:
+            return chapter
+
+        async def fetch() -> Chapter:
+            chapter = await service.get_chapter(bible, book, number)
+            self.cache.set_chapter(bible, book, number, chapter)
+            return chapter
+
+        return await self._chapter_flights.do(
+            get_chapter_key(bible, book, number), fetch
+        )
+
+    async def __get_passage_from_chapters(
+        self,
+        service: Service,
+        bible: Bible,
+        verses: VerseRange,
+        /,
+    ) -> Passage:
+        start = verses.start
+        end = verses.end if verses.end is not None else verses.start
+        numbers = range(start.chapter, end.chapter + 1)
+        chapters = await asyncio.gather(
+            *(self.__get_chapter(service, bible, verses.book, n) for n in numbers)
+        )
+        tokens: list[Token] = []
+
+        for number, chapter in zip(numbers, chapters):
+            chapter_tokens = chapter.get_tokens(
+                start.verse if number == start.chapter else None,
+                end.verse if number == end.chapter else None,
+            )
+
+            if chapter_tokens is None:
+                raise DoNotUnderstandError
+
+            tokens += chapter_tokens
+
+        return Passage(
+            text=render_markdown(tokens, rtl=bible.rtl),
+            range=verses,
+            version=bible.abbr,
+        )
 
     async def search(
         self, bible: Bible, terms: list[str], /, *, limit: int = 20, offset: int = 0
     ) -> SearchResults:
-        service = self.service_map.get(bible.service)
-        assert service is not None
+        assert bible.service in self.service_map
+        service = self.service_map[bible.service]
+        timeout = self.timeouts.get(bible.service, 'search', self.timeout)
+
+        async def fetch() -> SearchResults:
+            loop = asyncio.get_running_loop()
+            started_at = loop.time()
+            results = await service.search(bible, terms, limit=limit, offset=offset)
+            self.timeouts.record(bible.service, 'search', loop.time() - started_at)
+            return results
+
         try:
-            with async_timeout.timeout(self.timeout):
-                return await service.search(bible, terms, limit=limit, offset=offset)
+            with async_timeout.timeout(timeout):
+                return await self._search_flights.do(
+                    (
+                        bible.service,
+                        bible.service_version,
+                        tuple(terms),
+                        limit,
+                        offset,
+                    ),
+                    fetch,
+                )
         except asyncio.TimeoutError:
-            raise ServiceSearchTimeout(bible, terms)
+            _log.warning(
+                f'Timed out searching {bible.abbr} on {bible.service} '
+                f'after {timeout:.2f}s'
+            )
+            self.timeouts.record(bible.service, 'search', timeout)
+            raise ServiceSearchTimeout(bible, terms, timeout)
+
+    # Services close first, as they may still be sending requests. Closing again
+    # waits for the first close to finish.
+    async def close(self, /) -> None:
+        if self._closing is None:
+            self.parse_pool.close()
+            self._closing = asyncio.ensure_future(self.__close())
+
+        await asyncio.shield(self._closing)
+
+    async def __close(self, /) -> None:
+        await asyncio.gather(
+            *(service.close() for service in self.service_map.values())
+        )
+        await asyncio.gather(*(pool.close() for pool in self.pools.values()))
+
+    def get_stats(self, /) -> dict[str, int]:
+        return {
+            **self.cache.get_stats(),
+            **self.parse_pool.get_stats(),
+            **{
+                key: value
+                for name, pool in self.pools.items()
+                for key, value in pool.get_stats(name).items()
+            },
+            **{
+                key: value
+                for service in self.service_map.values()
+                for key, value in service.get_stats().items()
+            },
+            'passage requests': self._passage_flights.calls,
+            'passage requests coalesced': self._passage_flights.coalesced,
+            'chapter requests': self._chapter_flights.calls,
+            'chapter requests coalesced': self._chapter_flights.coalesced,
+            'hedged requests': self.hedged,
+            'failed over requests': self.failed_over,
+            **self.health.get_stats(),
+            **self.timeouts.get_stats(self.timeout),
+            'search requests': self._search_flights.calls,
+            'search requests coalesced': self._search_flights.coalesced,
+        }
 
     @classmethod
     def from_config(
@@ -60,11 +510,36 @@ class ServiceManager(object):
         /,
     ) -> ServiceManager:
         service_map: dict[str, Service] = {}
+        pools: dict[str, ConnectionPool] = {}
         service_configs = config.get('services', {})
+        parse_pool = ParsePool.from_config(config.get('parse_pool'))
 
         for name, service_cls in services.__dict__.items():
             if callable(service_cls):
                 section = service_configs.get(name)
-                service_map[name] = service_cls(config=section, session=session)
+                service_session = session
+
+                if (
+                    pool := ConnectionPool.from_config(
+                        (section or {}).get('connections'),
+                        getattr(service_cls, 'upstream_urls', ()),
+                    )
+                ) is not None:
+                    pools[name] = pool
+                    service_session = pool.create_session()
+
+                service_map[name] = service_cls(
+                    config=section, session=service_session, parse_pool=parse_pool
+                )
+
+        timeouts_config = config.get('timeouts', {})
 
-        return cls(service_map)
+        return cls(
+            service_map,
+            timeout=timeouts_config.get('default', 10),
+            cache=PassageCache.from_config(config.get('passage_cache')),
+            parse_pool=parse_pool,
+            pools=pools,
+            health=BackendHealth.from_config(config.get('hedging')),
+            timeouts=AdaptiveTimeouts.from_config(timeouts_config),
+        )
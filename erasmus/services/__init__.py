@@ -1,5 +1,6 @@
 from .apibible import ApiBible
 from .biblegateway import BibleGateway
+from .local import Local
 from .unbound import Unbound
 
-__all__ = ['ApiBible', 'BibleGateway', 'Unbound']
+__all__ = ['ApiBible', 'BibleGateway', 'Local', 'Unbound']
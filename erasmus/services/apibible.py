@@ -1,103 +1,136 @@
 from __future__ import annotations
 
-import asyncio
-from typing import Any, Final, TypedDict
+import logging
+from collections.abc import Iterable
+from typing import Any, Final, Literal, TypedDict
 
 import aiohttp
 from attr import attrib, dataclass
 from botus_receptus import re
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
 from yarl import URL
 
-from ..data import Passage, SearchResults, VerseRange
+from ..api_keys import ApiKeyPool
+from ..data import Passage, SearchResults, VerseRange, get_usfm_code
 from ..exceptions import DoNotUnderstandError
+from ..fums import FumsReporter
 from ..json import get, loads
 from ..protocols import Bible
 from .base_service import BaseService
+from .tokens import (
+    LINE_BREAK,
+    Chapter,
+    Style,
+    Text,
+    Token,
+    VerseNumber,
+    render_markdown,
+)
+
+_log: Final = logging.getLogger(__name__)
+
+ContentType = Literal['html', 'json']
 
 _img_re: Final = re.compile('src="', re.named_group('src')('[^"]+'), '"')
-_book_map: Final[dict[str, str]] = {
-    'Genesis': 'GEN',
-    'Exodus': 'EXO',
-    'Leviticus': 'LEV',
-    'Numbers': 'NUM',
-    'Deuteronomy': 'DEU',
-    'Joshua': 'JOS',
-    'Judges': 'JDG',
-    'Ruth': 'RUT',
-    '1 Samuel': '1SA',
-    '2 Samuel': '2SA',
-    '1 Kings': '1KI',
-    '2 Kings': '2KI',
-    '1 Chronicles': '1CH',
-    '2 Chronicles': '2CH',
-    'Ezra': 'EZR',
-    'Nehemiah': 'NEH',
-    'Esther': 'EST',
-    'Job': 'JOB',
-    'Psalm': 'PSA',
-    'Proverbs': 'PRO',
-    'Ecclesiastes': 'ECC',
-    'Song of Solomon': 'SNG',
-    'Isaiah': 'ISA',
-    'Jeremiah': 'JER',
-    'Lamentations': 'LAM',
-    'Ezekiel': 'EZK',
-    'Daniel': 'DAN',
-    'Hosea': 'HOS',
-    'Joel': 'JOL',
-    'Amos': 'AMO',
-    'Obadiah': 'OBA',
-    'Jonah': 'JON',
-    'Micah': 'MIC',
-    'Nahum': 'NAM',
-    'Habakkuk': 'HAB',
-    'Zephaniah': 'ZEP',
-    'Haggai': 'HAG',
-    'Zechariah': 'ZEC',
-    'Malachi': 'MAL',
-    '1 Esdras': '1ES',
-    '2 Esdras': '2ES',
-    'Tobit': 'TOB',
-    'Judith': 'JDT',
-    'Additions to Esther': 'ESG',
-    'Wisdom': 'WIS',
-    'Sirach': 'SIR',
-    'Baruch': 'BAR',
-    'Prayer of Azariah': 'S3Y',
-    'Susanna': 'SUS',
-    'Bel and the Dragon': 'BEL',
-    'Prayer of Manasseh': 'MAN',
-    '1 Maccabees': '1MA',
-    '2 Maccabees': '2MA',
-    'Matthew': 'MAT',
-    'Mark': 'MRK',
-    'Luke': 'LUK',
-    'John': 'JHN',
-    'Acts': 'ACT',
-    'Romans': 'ROM',
-    '1 Corinthians': '1CO',
-    '2 Corinthians': '2CO',
-    'Galatians': 'GAL',
-    'Ephesians': 'EPH',
-    'Philippians': 'PHP',
-    'Colossians': 'COL',
-    '1 Thessalonians': '1TH',
-    '2 Thessalonians': '2TH',
-    '1 Timothy': '1TI',
-    '2 Timothy': '2TI',
-    'Titus': 'TIT',
-    'Philemon': 'PHM',
-    'Hebrews': 'HEB',
-    'James': 'JAS',
-    '1 Peter': '1PE',
-    '2 Peter': '2PE',
-    '1 John': '1JN',
-    '2 John': '2JN',
-    '3 John': '3JN',
-    'Jude': 'JUD',
-    'Revelation': 'REV',
-}
+# The strings get_text() would include
+_string_types: Final = (NavigableString, CData)
+
+
+def _tokenize(node: Tag, tokens: list[Token], style: Style, /) -> None:
+    for child in node.children:
+        if not isinstance(child, Tag):
+            if type(child) in _string_types:
+                tokens.append(Text(str(child), style))
+            continue
+
+        classes = child.get('class') or ()
+
+        if child.name == 'br':
+            tokens.append(LINE_BREAK)
+        elif child.name == 'span' and 'v' in classes:
+            # render_markdown adds the period after the verse number
+            tokens += (
+                Text(' ', style),
+                VerseNumber(child.get_text('')),
+                Text(' ', style),
+            )
+        elif child.name == 'span' and 'add' in classes:
+            _tokenize(child, tokens, style | Style.ITALIC)
+        else:
+            _tokenize(child, tokens, style)
+
+
+def _get_tokens(content: str, /) -> list[Token]:
+    tokens: list[Token] = []
+    _tokenize(BeautifulSoup(content, 'html.parser'), tokens, Style.NONE)
+
+    return tokens
+
+
+# The json content type is the same USX markup as the html one, as nested tag items
+# whose style attribute is the html class and text items, so it is tokenized the same
+# way without building a document
+def _get_json_text(items: Iterable[dict[str, Any]], /) -> str:
+    return ''.join(
+        item['text'] if 'text' in item else _get_json_text(item.get('items', ()))
+        for item in items
+    )
+
+
+def _tokenize_json(
+    items: Iterable[dict[str, Any]],
+    tokens: list[Token],
+    style: Style,
+    /,
+) -> None:
+    for item in items:
+        if 'text' in item:
+            tokens.append(Text(item['text'], style))
+            continue
+
+        item_style = (item.get('attrs') or {}).get('style')
+        children = item.get('items', ())
+
+        if item_style == 'v':
+            tokens += (
+                Text(' ', style),
+                VerseNumber(_get_json_text(children)),
+                Text(' ', style),
+            )
+        elif item_style == 'add':
+            _tokenize_json(children, tokens, style | Style.ITALIC)
+        else:
+            _tokenize_json(children, tokens, style)
+
+
+def _get_json_tokens(content: list[dict[str, Any]], /) -> list[Token]:
+    tokens: list[Token] = []
+    _tokenize_json(content, tokens, Style.NONE)
+
+    return tokens
+
+
+def _transform_verse(
+    content: str,
+    verses: VerseRange,
+    abbr: str,
+    rtl: bool | None,
+    /,
+) -> Passage:
+    return Passage(
+        text=render_markdown(_get_tokens(content), rtl=rtl), range=verses, version=abbr
+    )
+
+
+def _parse_chapter(content: str, /) -> Chapter:
+    return Chapter.from_tokens(_get_tokens(content))
+
+
+def _get_retry_after(response: aiohttp.ClientResponse, /) -> float | None:
+    try:
+        return float(response.headers['Retry-After'])
+    except (KeyError, ValueError):
+        return None
 
 
 class _ResponseMetaDict(TypedDict):
@@ -111,25 +144,54 @@ class _ResponseDict(TypedDict):
 
 @dataclass(slots=True)
 class ApiBible(BaseService):
+    upstream_urls = ('https://api.scripture.api.bible/',)
+
     _passage_url: URL = attrib(init=False)
+    _chapter_url: URL = attrib(init=False)
     _search_url: URL = attrib(init=False)
-    _headers: dict[str, str] = attrib(init=False)
+    _keys: ApiKeyPool = attrib(init=False)
+    _content_type: ContentType = attrib(init=False)
+    _content_query: dict[str, str] = attrib(init=False)
+    _fums: FumsReporter = attrib(init=False)
 
     def __attrs_post_init__(self, /) -> None:
         self._passage_url = URL(
             'https://api.scripture.api.bible/v1/bibles/{bibleId}/passages/{passageId}'
         )
+        self._chapter_url = URL(
+            'https://api.scripture.api.bible/v1/bibles/{bibleId}/chapters/{chapterId}'
+        )
         self._search_url = URL(
             'https://api.scripture.api.bible/v1/bibles/{bibleId}/search'
         )
 
-        if self.config:
-            self._headers = {'api-key': self.config.get('api_key', '')}
-        else:
-            self._headers = {}
+        self._keys = ApiKeyPool.from_config(self.config)
+
+        self._content_type = (self.config or {}).get('content_type', 'html')
+
+        if self._content_type not in ('html', 'json'):
+            _log.warning(
+                f'Unknown content_type {self._content_type!r}, falling back to html'
+            )
+            self._content_type = 'html'
+
+        self._content_query = {
+            'include-notes': 'false',
+            'include-titles': 'false',
+            'include-chapter-numbers': 'false',
+            'include-verse-numbers': 'true',
+        }
+
+        # html is the API's default, and leaving it out keeps the request unchanged
+        if self._content_type == 'json':
+            self._content_query['content-type'] = 'json'
+
+        self._fums = FumsReporter.from_config(
+            self.session, (self.config or {}).get('fums')
+        )
 
     def __get_passage_id(self, verses: VerseRange, /) -> str:
-        book_id: str = _book_map[verses.book]
+        book_id: str = get_usfm_code(verses.book)
         passage_id: str = f'{book_id}.{verses.start.chapter}.{verses.start.verse}'
 
         if verses.end is not None:
@@ -139,32 +201,6 @@ class ApiBible(BaseService):
 
         return passage_id
 
-    def __transform_verse(
-        self,
-        bible: Bible,
-        verses: VerseRange,
-        content: str,
-        /,
-    ) -> Passage:
-        soup = BeautifulSoup(content, 'html.parser')
-
-        for number in soup.select('span.v'):
-            # Add a period after verse numbers
-            number.insert_before(' __BOLD__')
-            number.insert_after('__BOLD__ ')
-            number.string = f'{number.string}.'
-            number.unwrap()
-        for it in soup.select('span.add'):
-            it.insert_before('__ITALIC__')
-            it.insert_after('__ITALIC__')
-            it.unwrap()
-        for br in soup.select('br'):
-            br.replace_with('\n')
-
-        text = self.replace_special_escapes(bible, soup.get_text(''))
-
-        return Passage(text=text, range=verses, version=bible.abbr)
-
     async def __process_response(
         self,
         response: aiohttp.ClientResponse,
@@ -175,38 +211,81 @@ class ApiBible(BaseService):
 
         json: _ResponseDict = await response.json(loads=loads, content_type=None)
 
-        # Make a request for the image to report to the Fair Use Management System
+        # Report the view to the Fair Use Management System by requesting its image
         meta: str | None = get(json, 'meta.fumsNoScript')
         if meta:
             if (match := _img_re.search(meta)) is not None:
-                try:
-                    async with self.session.get(match.group('src')) as fums_response:
-                        await fums_response.read()
-                except asyncio.TimeoutError:
-                    pass
+                self._fums.report(match.group('src'))
 
         return json['data']
 
+    # A throttled request is retried with the next key while there is one that isn't
+    # cooling down. Once none are left the 429 is raised as a failure of the service
+    # rather than the request, so the lookup can move on to a fallback.
+    async def __get(self, url: URL, /) -> dict[str, Any]:
+        attempts = 0
+
+        while True:
+            key = self._keys.get() if self._keys else None
+            attempts += 1
+
+            async with self.session.get(
+                url, headers={'api-key': key} if key is not None else {}
+            ) as response:
+                if response.status == 429 and key is not None:
+                    self._keys.record_throttled(key, _get_retry_after(response))
+
+                    if attempts < len(self._keys) and self._keys.is_available():
+                        continue
+
+                    response.raise_for_status()
+
+                return await self.__process_response(response)
+
+    async def close(self, /) -> None:
+        await self._fums.close()
+
+    def get_stats(self, /) -> dict[str, int]:
+        return {**self._fums.get_stats(), **self._keys.get_stats('ApiBible')}
+
     async def get_passage(self, bible: Bible, verses: VerseRange, /) -> Passage:
-        async with self.session.get(
+        data = await self.__get(
             self._passage_url.with_path(
                 self._passage_url.path.format(
                     bibleId=bible.service_version,
                     passageId=self.__get_passage_id(verses),
                 )
-            ).with_query(
-                {
-                    'include-notes': 'false',
-                    'include-titles': 'false',
-                    'include-chapter-numbers': 'false',
-                    'include-verse-numbers': 'true',
-                }
-            ),
-            headers=self._headers,
-        ) as response:
-            data = await self.__process_response(response)
+            ).with_query(self._content_query)
+        )
+
+        if self._content_type == 'json':
+            return Passage(
+                text=render_markdown(_get_json_tokens(data['content']), rtl=bible.rtl),
+                range=verses,
+                version=bible.abbr,
+            )
+
+        return await self.parse_pool.run(
+            _transform_verse, data['content'], verses, bible.abbr, bible.rtl
+        )
 
-            return self.__transform_verse(bible, verses, data['content'])
+    def supports_chapters(self, bible: Bible, /) -> bool:
+        return True
+
+    async def get_chapter(self, bible: Bible, book: str, chapter: int, /) -> Chapter:
+        data = await self.__get(
+            self._chapter_url.with_path(
+                self._chapter_url.path.format(
+                    bibleId=bible.service_version,
+                    chapterId=f'{get_usfm_code(book)}.{chapter}',
+                )
+            ).with_query(self._content_query)
+        )
+
+        if self._content_type == 'json':
+            return Chapter.from_tokens(_get_json_tokens(data['content']))
+
+        return await self.parse_pool.run(_parse_chapter, data['content'])
 
     async def search(
         self,
@@ -217,7 +296,7 @@ class ApiBible(BaseService):
         limit: int = 20,
         offset: int = 0,
     ) -> SearchResults:
-        async with self.session.get(
+        data = await self.__get(
             self._search_url.with_path(
                 self._search_url.path.format(bibleId=bible.service_version)
             ).with_query(
@@ -227,20 +306,18 @@ class ApiBible(BaseService):
                     'offset': offset,
                     'sort': 'canonical',
                 }
-            ),
-            headers=self._headers,
-        ) as response:
-            data = await self.__process_response(response)
-
-            total: int = get(data, 'total') or 0
-
-            passages = [
-                Passage(
-                    text=self.replace_special_escapes(bible, verse['text']),
-                    range=VerseRange.from_string(verse['reference']),
-                    version=bible.abbr,
-                )
-                for verse in get(data, 'verses', [])
-            ]
+            )
+        )
+
+        total: int = get(data, 'total') or 0
+
+        passages = [
+            Passage(
+                text=render_markdown([Text(verse['text'])], rtl=bible.rtl),
+                range=VerseRange.from_string(verse['reference']),
+                version=bible.abbr,
+            )
+            for verse in get(data, 'verses', [])
+        ]
 
-            return SearchResults(passages, total)
+        return SearchResults(passages, total)
@@ -1,50 +1,85 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from abc import abstractmethod
-from typing import Any, Final
+from collections.abc import Iterable, Sequence
+from typing import Any, ClassVar, Final, cast
 
 import aiohttp
-from attr import dataclass
-from botus_receptus import re
+from attr import attrib, dataclass
 
 from ..data import Passage, SearchResults, VerseRange
+from ..exceptions import ChaptersNotSupportedError
+from ..parse_pool import ParsePool
 from ..protocols import Bible
+from .tokens import Chapter
 
 _log: Final = logging.getLogger(__name__)
 
-_whitespace_re: Final = re.compile(re.one_or_more(re.WHITESPACE))
-_bold_re: Final = re.compile(r'__BOLD__')
-_italic_re: Final = re.compile(r'__ITALIC__')
-_specials_re: Final = re.compile(re.capture(r'[\*`]'))
-_number_re: Final = re.compile(
-    re.capture(r'\*\*', re.one_or_more(re.DIGIT), re.DOT, r'\*\*')
-)
-
 
 @dataclass(slots=True)
 class BaseService(object):
+    # Where the service's requests go, for warming its connections at startup
+    upstream_urls: ClassVar[tuple[str, ...]] = ()
+
     session: aiohttp.ClientSession
     config: dict[str, Any] | None
+    parse_pool: ParsePool = attrib(factory=ParsePool)
+
+    # Called once the bible versions are loaded, before any lookups
+    async def prepare(self, bibles: Iterable[Bible], /) -> None:
+        pass
+
+    # Called when the bot shuts down, before the service's session is closed
+    async def close(self, /) -> None:
+        pass
+
+    def get_stats(self, /) -> dict[str, int]:
+        return {}
 
     @abstractmethod
     async def get_passage(self, bible: Bible, verses: VerseRange, /) -> Passage:
         ...
 
+    # Returns the passage, or the error getting it, for each range in order, holding
+    # the semaphore for each request when one is given. Services that can fetch
+    # several ranges in one request override this and supports_batch.
+    async def get_passages(
+        self,
+        bible: Bible,
+        ranges: Sequence[VerseRange],
+        /,
+        *,
+        semaphore: asyncio.Semaphore | None = None,
+    ) -> list[Passage | Exception]:
+        limit = semaphore or asyncio.Semaphore(max(len(ranges), 1))
+
+        async def get_passage(verses: VerseRange, /) -> Passage:
+            async with limit:
+                return await self.get_passage(bible, verses)
+
+        return cast(
+            'list[Passage | Exception]',
+            await asyncio.gather(
+                *(get_passage(verses) for verses in ranges),
+                return_exceptions=True,
+            ),
+        )
+
+    def supports_batch(self, bible: Bible, /) -> bool:
+        return False
+
+    # Services that can return a whole chapter with its verse boundaries override
+    # these, which lets ServiceManager cache chapters and slice passages out of them
+    def supports_chapters(self, bible: Bible, /) -> bool:
+        return False
+
+    async def get_chapter(self, bible: Bible, book: str, chapter: int, /) -> Chapter:
+        raise ChaptersNotSupportedError(bible)
+
     @abstractmethod
     async def search(
         self, bible: Bible, terms: list[str], /, *, limit: int = 20, offset: int = 0
     ) -> SearchResults:
         ...
-
-    def replace_special_escapes(self, bible: Bible, text: str, /) -> str:
-        text = _whitespace_re.sub(' ', text.strip())
-        text = _specials_re.sub(r'\\\1', text)
-        text = _bold_re.sub('**', text)
-        text = _italic_re.sub('_', text)
-
-        if bible.rtl:
-            # wrap in [RTL embedding]text[Pop directional formatting]
-            text = _number_re.sub('\u202b\\1\u202c', text)
-
-        return text
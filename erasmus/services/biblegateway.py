@@ -1,77 +1,326 @@
 # Service for querying biblegateway.com
 from __future__ import annotations
 
-from typing import Final
+import asyncio
+import logging
+from collections.abc import Sequence
+from typing import Any, Final
 
 from attr import attrib, dataclass
 from botus_receptus import re
-from bs4 import BeautifulSoup, NavigableString, SoupStrainer, Tag
+from bs4 import BeautifulSoup, CData, NavigableString, SoupStrainer, Tag
 from yarl import URL
 
-from ..data import Passage, SearchResults, VerseRange
-from ..exceptions import DoNotUnderstandError
+from ..data import Passage, SearchResults, VerseRange, get_book
+from ..exceptions import BookNotUnderstoodError, DoNotUnderstandError
 from ..protocols import Bible
 from .base_service import BaseService
+from .tokens import (
+    LINE_BREAK,
+    Chapter,
+    Style,
+    Text,
+    Token,
+    VerseNumber,
+    render_markdown,
+)
+
+try:
+    from lxml import etree
+except ImportError:  # pragma: no cover
+    etree = None
+
+_log: Final = logging.getLogger(__name__)
 
 _total_re: Final = re.compile(
     re.START, re.named_group('total')(re.one_or_more(re.DIGITS))
 )
 
 
+@dataclass(slots=True, frozen=True)
+class _Region(object):
+    class_re: re.Pattern[str]
+    strainer: SoupStrainer
+    # A cheap substring match that narrows the candidates for class_re
+    xpath: Any
+
+
+def _region(
+    class_re: re.Pattern[str],
+    strainer: SoupStrainer,
+    xpath: str,
+    /,
+) -> _Region:
+    return _Region(
+        class_re, strainer, etree.XPath(xpath) if etree is not None else None
+    )
+
+
+# The strings get_text() would include
+_string_types: Final = (NavigableString, CData)
+
+_passage_class_re: Final = re.compile(
+    re.WORD_BOUNDARY,
+    'result-text-style-',
+    re.either('normal', 'rtl'),
+    re.WORD_BOUNDARY,
+)
+_search_classes: Final = ['search-result-list', 'showing-results']
+# Each verse's text is in a span with a class like "Gal-3-10", its OSIS reference
+_verse_class_re: Final = re.compile(
+    re.START,
+    re.named_group('book')(re.one_or_more(re.ALPHANUMERICS)),
+    re.DASH,
+    re.named_group('chapter')(re.one_or_more(re.DIGIT)),
+    re.DASH,
+    re.named_group('verse')(re.one_or_more(re.DIGIT)),
+    re.END,
+)
+
+
+_passage_region: Final = _region(
+    _passage_class_re,
+    SoupStrainer(class_=_passage_class_re),
+    '//*[contains(@class, "result-text-style-")]',
+)
+_search_region: Final = _region(
+    re.compile(
+        re.either(re.START, re.WHITESPACE),
+        re.either(*_search_classes),
+        re.either(re.END, re.WHITESPACE),
+    ),
+    SoupStrainer(class_=_search_classes),
+    '//*[contains(@class, "search-result-list") '
+    'or contains(@class, "showing-results")]',
+)
+
+
+# With 'lxml', the page is parsed in C and only the region's elements are serialized
+# and handed to BeautifulSoup, instead of walking the whole page in Python
+def _get_soup(
+    body: bytes,
+    encoding: str,
+    parser: str,
+    region: _Region,
+    /,
+) -> BeautifulSoup:
+    if parser != 'lxml':
+        return BeautifulSoup(
+            body, parser, parse_only=region.strainer, from_encoding=encoding
+        )
+
+    root = etree.fromstring(body, etree.HTMLParser(encoding=encoding))
+    fragments: list[str] = []
+
+    if root is not None:
+        for node in region.xpath(root):
+            if region.class_re.search(node.get('class')):
+                fragments.append(
+                    etree.tostring(node, encoding='unicode', with_tail=False)
+                )
+
+    return BeautifulSoup(''.join(fragments), 'html.parser')
+
+
+def _tokenize(
+    node: Tag,
+    tokens: list[Token],
+    style: Style,
+    upper: bool,
+    /,
+) -> None:
+    for child in node.children:
+        if not isinstance(child, Tag):
+            if type(child) in _string_types:
+                tokens.append(Text(child.upper() if upper else str(child), style))
+            continue
+
+        classes = child.get('class') or ()
+
+        if child.name == 'br':
+            tokens.append(LINE_BREAK)
+        elif child.name == 'span' and 'chapternum' in classes:
+            tokens += (VerseNumber('1'), Text(' ', style))
+        elif child.name == 'sup' and 'versenum' in classes:
+            # render_markdown adds the period after the verse number
+            tokens += (VerseNumber(child.get_text('').strip()), Text(' ', style))
+        else:
+            child_style = style
+
+            if child.name in ('b', 'h4'):
+                child_style |= Style.BOLD
+            if child.name in ('i', 'h3') or 'selah' in classes:
+                child_style |= Style.ITALIC
+
+            _tokenize(child, tokens, child_style, upper or 'small-caps' in classes)
+
+            if child.name == 'h4':
+                tokens.append(Text(' ', style))
+
+
+def _get_tokens(verse_node: Tag, for_search: bool = False, /) -> list[Token]:
+    for node in verse_node.select(
+        f'h1, {"h3, " if not for_search else ""}.footnotes, .footnote, .crossrefs, '
+        '.crossreference, .full-chap-link'
+    ):
+        # Remove headings and footnotes
+        node.decompose()
+
+    tokens: list[Token] = []
+    _tokenize(verse_node, tokens, Style.NONE, False)
+
+    return tokens
+
+
+def _get_passage_tokens(body: bytes, encoding: str, parser: str, /) -> list[Token]:
+    soup = _get_soup(body, encoding, parser, _passage_region)
+    verse_block = soup.select_one('.result-text-style-normal, .result-text-style-rtl')
+
+    if verse_block is None:
+        raise DoNotUnderstandError
+
+    return _get_tokens(verse_block)
+
+
+def _parse_passage(
+    body: bytes,
+    encoding: str,
+    parser: str,
+    verses: VerseRange,
+    abbr: str,
+    rtl: bool | None,
+    /,
+) -> Passage:
+    return Passage(
+        text=render_markdown(_get_passage_tokens(body, encoding, parser), rtl=rtl),
+        range=verses,
+        version=abbr,
+    )
+
+
+# Whether a block's verses start at the start of verses and stop by its end
+def _block_matches(verse_block: Tag, verses: VerseRange, /) -> bool:
+    found: list[tuple[str, int, int]] = []
+
+    for span in verse_block.select('span.text'):
+        for class_name in span.get('class') or ():
+            if (match := _verse_class_re.match(class_name)) is None:
+                continue
+
+            try:
+                book = get_book(match.group('book'))
+            except BookNotUnderstoodError:
+                return False
+
+            found.append((book, int(match.group('chapter')), int(match.group('verse'))))
+
+    end = verses.end if verses.end is not None else verses.start
+
+    return (
+        len(found) > 0
+        and found[0] == (verses.book, verses.start.chapter, verses.start.verse)
+        and all(
+            book == verses.book and (chapter, verse) <= (end.chapter, end.verse)
+            for book, chapter, verse in found
+        )
+    )
+
+
+# A page for several references has a block per reference, in order. References
+# BibleGateway can't find have no block, and it may merge or reorder references, so
+# unless every block holds the verses of its range None is returned and the caller
+# falls back to a request per range.
+def _parse_passages(
+    body: bytes,
+    encoding: str,
+    parser: str,
+    ranges: Sequence[VerseRange],
+    abbr: str,
+    rtl: bool | None,
+    /,
+) -> list[Passage] | None:
+    soup = _get_soup(body, encoding, parser, _passage_region)
+    verse_blocks = soup.select('.result-text-style-normal, .result-text-style-rtl')
+
+    if len(verse_blocks) != len(ranges) or not all(
+        _block_matches(verse_block, verses)
+        for verse_block, verses in zip(verse_blocks, ranges)
+    ):
+        return None
+
+    return [
+        Passage(
+            text=render_markdown(_get_tokens(verse_block), rtl=rtl),
+            range=verses,
+            version=abbr,
+        )
+        for verse_block, verses in zip(verse_blocks, ranges)
+    ]
+
+
+def _parse_chapter(body: bytes, encoding: str, parser: str, /) -> Chapter:
+    return Chapter.from_tokens(_get_passage_tokens(body, encoding, parser))
+
+
+def _parse_search(
+    body: bytes,
+    encoding: str,
+    parser: str,
+    abbr: str,
+    rtl: bool | None,
+    /,
+) -> SearchResults:
+    soup = _get_soup(body, encoding, parser, _search_region)
+
+    verse_nodes = soup.select('.search-result-list .bible-item')
+    total_node = soup.select_one('.showing-results')
+
+    if verse_nodes is None or total_node is None:
+        return SearchResults([], 0)
+
+    if (match := _total_re.match(total_node.get_text(' ', strip=True))) is None:
+        raise DoNotUnderstandError
+
+    def mapper(node: Tag, /) -> Passage:
+        extras_node = node.select_one('.bible-item-extras')
+        if extras_node:
+            extras_node.decompose()
+
+        verse_text_node = node.select_one('.bible-item-text')
+        verse_reference_node = node.select_one('.bible-item-title')
+
+        if verse_text_node is None or verse_reference_node is None:
+            raise DoNotUnderstandError
+
+        verse = VerseRange.from_string(verse_reference_node.string.strip())
+
+        return Passage(
+            text=render_markdown(_get_tokens(verse_text_node, True), rtl=rtl),
+            range=verse,
+            version=abbr,
+        )
+
+    passages = list(map(mapper, verse_nodes))
+
+    return SearchResults(passages, int(match.group('total')))
+
+
 @dataclass(slots=True)
 class BibleGateway(BaseService):
+    upstream_urls = ('https://www.biblegateway.com/',)
+
     _passage_url: URL = attrib(init=False)
     _search_url: URL = attrib(init=False)
+    _parser: str = attrib(init=False)
 
     def __attrs_post_init__(self, /) -> None:
         self._passage_url = URL('https://www.biblegateway.com/passage/')
         self._search_url = URL('https://www.biblegateway.com/quicksearch/')
+        self._parser = (self.config or {}).get('parser', 'html.parser')
 
-    def __transform_verse_node(
-        self,
-        bible: Bible,
-        verses: VerseRange,
-        verse_node: Tag,
-        for_search: bool = False,
-        /,
-    ) -> Passage:
-        for node in verse_node.select(
-            f'h1, {"h3, " if not for_search else ""}.footnotes, .footnote, .crossrefs, '
-            '.crossreference, .full-chap-link'
-        ):
-            # Remove headings and footnotes
-            node.decompose()
-
-        for number in verse_node.select('span.chapternum'):
-            number.insert_before('__BOLD__')
-            number.insert_after('__BOLD__ ')
-            number.string = '1.'
-            number.unwrap()
-        for small_caps in verse_node.select('.small-caps'):
-            for descendant in list(small_caps.descendants):
-                if isinstance(descendant, NavigableString):
-                    descendant.replace_with(descendant.string.upper())
-            small_caps.unwrap()
-        for bold in verse_node.select('b, h4'):
-            bold.insert_before('__BOLD__')
-            bold.insert_after('__BOLD__' + (' ' if bold.name == 'h4' else ''))
-            bold.unwrap()
-        for number in verse_node.select('sup.versenum'):
-            # Add a period after verse numbers
-            number.insert_before('__BOLD__')
-            number.insert_after('__BOLD__ ')
-            number.string = f'{number.string.strip()}.'
-            number.unwrap()
-        for br in verse_node.select('br'):
-            br.replace_with('\n')
-        for italic in verse_node.select('.selah, i, h3'):
-            italic.insert_before('__ITALIC__')
-            italic.insert_after('__ITALIC__')
-            italic.unwrap()
-
-        text = self.replace_special_escapes(bible, verse_node.get_text(''))
-
-        return Passage(text=text, range=verses, version=bible.abbr)
+        if self._parser == 'lxml' and etree is None:
+            _log.warning('lxml is not installed, falling back to html.parser')
+            self._parser = 'html.parser'
 
     async def get_passage(self, bible: Bible, verses: VerseRange, /) -> Passage:
         async with self.session.get(
@@ -83,24 +332,71 @@ class BibleGateway(BaseService):
                 }
             )
         ) as response:
-            text = await response.text(errors='replace')
-            strainer = SoupStrainer(
-                class_=re.compile(
-                    re.WORD_BOUNDARY,
-                    'result-text-style-',
-                    re.either('normal', 'rtl'),
-                    re.WORD_BOUNDARY,
-                )
-            )
-            soup = BeautifulSoup(text, 'html.parser', parse_only=strainer)
-            verse_block = soup.select_one(
-                '.result-text-style-normal, .result-text-style-rtl'
+            body = await response.read()
+            encoding = response.get_encoding()
+
+        return await self.parse_pool.run(
+            _parse_passage, body, encoding, self._parser, verses, bible.abbr, bible.rtl
+        )
+
+    async def get_passages(
+        self,
+        bible: Bible,
+        ranges: Sequence[VerseRange],
+        /,
+        *,
+        semaphore: asyncio.Semaphore | None = None,
+    ) -> list[Passage | Exception]:
+        if len(ranges) < 2:
+            return await super().get_passages(bible, ranges, semaphore=semaphore)
+
+        async with semaphore or asyncio.Semaphore(), self.session.get(
+            self._passage_url.with_query(
+                {
+                    'search': '; '.join(str(verses) for verses in ranges),
+                    'version': bible.service_version,
+                    'interface': 'print',
+                }
             )
+        ) as response:
+            body = await response.read()
+            encoding = response.get_encoding()
+
+        passages = await self.parse_pool.run(
+            _parse_passages,
+            body,
+            encoding,
+            self._parser,
+            ranges,
+            bible.abbr,
+            bible.rtl,
+        )
+
+        if passages is None:
+            return await super().get_passages(bible, ranges, semaphore=semaphore)
+
+        return list(passages)
 
-            if verse_block is None:
-                raise DoNotUnderstandError
+    def supports_batch(self, bible: Bible, /) -> bool:
+        return True
+
+    def supports_chapters(self, bible: Bible, /) -> bool:
+        return True
+
+    async def get_chapter(self, bible: Bible, book: str, chapter: int, /) -> Chapter:
+        async with self.session.get(
+            self._passage_url.with_query(
+                {
+                    'search': f'{book} {chapter}',
+                    'version': bible.service_version,
+                    'interface': 'print',
+                }
+            )
+        ) as response:
+            body = await response.read()
+            encoding = response.get_encoding()
 
-            return self.__transform_verse_node(bible, verses, verse_block)
+        return await self.parse_pool.run(_parse_chapter, body, encoding, self._parser)
 
     async def search(
         self,
@@ -122,34 +418,9 @@ class BibleGateway(BaseService):
                 }
             )
         ) as response:
-            text = await response.text(errors='replace')
-            strainer = SoupStrainer(class_=['search-result-list', 'showing-results'])
-            soup = BeautifulSoup(text, 'html.parser', parse_only=strainer)
-
-            verse_nodes = soup.select('.search-result-list .bible-item')
-            total_node = soup.select_one('.showing-results')
-
-            if verse_nodes is None or total_node is None:
-                return SearchResults([], 0)
-
-            if (match := _total_re.match(total_node.get_text(' ', strip=True))) is None:
-                raise DoNotUnderstandError
-
-            def mapper(node: Tag, /) -> Passage:
-                extras_node = node.select_one('.bible-item-extras')
-                if extras_node:
-                    extras_node.decompose()
-
-                verse_text_node = node.select_one('.bible-item-text')
-                verse_reference_node = node.select_one('.bible-item-title')
-
-                if verse_text_node is None or verse_reference_node is None:
-                    raise DoNotUnderstandError
-
-                verse = VerseRange.from_string(verse_reference_node.string.strip())
-
-                return self.__transform_verse_node(bible, verse, verse_text_node, True)
-
-            passages = list(map(mapper, verse_nodes))
+            body = await response.read()
+            encoding = response.get_encoding()
 
-            return SearchResults(passages, int(match.group('total')))
+        return await self.parse_pool.run(
+            _parse_search, body, encoding, self._parser, bible.abbr, bible.rtl
+        )
@@ -0,0 +1,174 @@
+# Service for versions imported into the local_verses table
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Iterable
+from typing import Final
+
+from attr import attrib, dataclass
+
+from ..data import (
+    Passage,
+    SearchResults,
+    Verse,
+    VerseRange,
+    get_book_name,
+    get_book_number,
+)
+from ..db.local import LocalVerse
+from ..exceptions import DoNotUnderstandError
+from ..packed_corpus import PackedCorpus, get_corpus_path
+from ..protocols import Bible
+from ..search_index import Ranking, SearchIndex, get_index_path
+from ..single_flight import SingleFlight
+from .base_service import BaseService
+from .tokens import Text, Token, VerseNumber, render_markdown
+
+_log: Final = logging.getLogger(__name__)
+
+
+def _get_tokens(rows: Iterable[tuple[int, int, str]], /) -> list[Token]:
+    tokens: list[Token] = []
+
+    for _, verse, text in rows:
+        tokens += (VerseNumber(str(verse)), Text(f' {text} '))
+
+    return tokens
+
+
+# With corpus_dir configured, passages are read from a version's packed corpus file
+# there when it has one. Whether a version has one is checked once, so a corpus
+# written after that is used from the next restart. With index_dir configured,
+# searches use an in-process index per version, loaded from index_dir at startup or
+# built from the stored verses and saved there. Otherwise both use the database.
+@dataclass(slots=True)
+class Local(BaseService):
+    _corpora: dict[str, PackedCorpus | None] = attrib(init=False, factory=dict)
+    _indexes: dict[str, SearchIndex] = attrib(init=False, factory=dict)
+    _index_flights: SingleFlight[str, SearchIndex] = attrib(
+        init=False, factory=SingleFlight
+    )
+
+    async def prepare(self, bibles: Iterable[Bible], /) -> None:
+        bibles = list(bibles)
+
+        for bible in bibles:
+            self.__get_corpus(bible.service_version)
+
+        if self.config is None or 'index_dir' not in self.config:
+            return
+
+        await asyncio.gather(
+            *(self.__get_index(bible.service_version) for bible in bibles)
+        )
+
+    async def close(self, /) -> None:
+        for corpus in self._corpora.values():
+            if corpus is not None:
+                corpus.close()
+
+        self._corpora.clear()
+
+    def __get_corpus(self, version: str, /) -> PackedCorpus | None:
+        if self.config is None or 'corpus_dir' not in self.config:
+            return None
+
+        if version in self._corpora:
+            return self._corpora[version]
+
+        path = get_corpus_path(self.config['corpus_dir'], version)
+        corpus: PackedCorpus | None = None
+
+        try:
+            corpus = PackedCorpus.open(path)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as error:
+            _log.warning('Could not open %s: %s', path, error)
+
+        # Versions without a usable corpus are cached too, so they aren't tried again
+        # on every lookup
+        self._corpora[version] = corpus
+
+        return corpus
+
+    async def __get_index(self, version: str, /) -> SearchIndex:
+        if (index := self._indexes.get(version)) is not None:
+            return index
+
+        return await self._index_flights.do(version, lambda: self.__load_index(version))
+
+    async def __load_index(self, version: str, /) -> SearchIndex:
+        assert self.config is not None
+
+        loop = asyncio.get_running_loop()
+        path = get_index_path(self.config['index_dir'], version)
+
+        try:
+            index = await loop.run_in_executor(None, SearchIndex.load, path)
+        except (OSError, ValueError) as error:
+            if not isinstance(error, FileNotFoundError):
+                _log.warning('Could not load %s, rebuilding it: %s', path, error)
+
+            _log.info('Building search index for %s', version)
+            rows = await LocalVerse.get_version(version)
+            index = await loop.run_in_executor(None, SearchIndex.build, rows)
+            await loop.run_in_executor(None, index.save, path)
+
+        self._indexes[version] = index
+
+        return index
+
+    async def get_passage(self, bible: Bible, verses: VerseRange, /) -> Passage:
+        end = verses.end if verses.end is not None else verses.start
+        args = (
+            get_book_number(verses.book),
+            (verses.start.chapter, verses.start.verse),
+            (end.chapter, end.verse),
+        )
+
+        if (corpus := self.__get_corpus(bible.service_version)) is not None:
+            rows = corpus.get_range(*args)
+        else:
+            rows = await LocalVerse.get_range(bible.service_version, *args)
+
+        if not rows:
+            raise DoNotUnderstandError
+
+        return Passage(
+            text=render_markdown(_get_tokens(rows), rtl=bible.rtl),
+            range=verses,
+            version=bible.abbr,
+        )
+
+    async def search(
+        self,
+        bible: Bible,
+        terms: list[str],
+        /,
+        *,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> SearchResults:
+        if self.config is not None and 'index_dir' in self.config:
+            index = await self.__get_index(bible.service_version)
+            ranking: Ranking = self.config.get('ranking', 'canonical')
+            rows, total = index.search(
+                terms, limit=limit, offset=offset, ranking=ranking
+            )
+        else:
+            rows, total = await LocalVerse.search(
+                bible.service_version, terms, limit=limit, offset=offset
+            )
+
+        passages = [
+            Passage(
+                text=render_markdown([Text(text)], rtl=bible.rtl),
+                range=VerseRange(get_book_name(book), Verse(chapter, verse)),
+                version=bible.abbr,
+            )
+            for book, chapter, verse, text in rows
+        ]
+
+        return SearchResults(passages, total)
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import enum
+from collections.abc import Iterable
+from typing import Final, Union
+
+from attr import dataclass
+from botus_receptus import re
+
+
+class Style(enum.IntFlag):
+    NONE = 0
+    BOLD = 1
+    ITALIC = 2
+
+
+@dataclass(slots=True, frozen=True)
+class Text(object):
+    text: str
+    style: Style = Style.NONE
+
+
+@dataclass(slots=True, frozen=True)
+class VerseNumber(object):
+    number: str
+
+
+@dataclass(slots=True, frozen=True)
+class LineBreak(object):
+    pass
+
+
+LINE_BREAK: Final = LineBreak()
+
+# What a service parser emits instead of markdown. Text runs carry the styles they
+# are in, so rendering doesn't depend on markers surviving in the text.
+Token = Union[Text, VerseNumber, LineBreak]
+
+_markers: Final = {Style.BOLD: '**', Style.ITALIC: '_'}
+# Some versions print combined verses under one number, such as "16-17"
+_verse_number_re: Final = re.compile(
+    re.START,
+    re.named_group('start')(re.one_or_more(re.DIGIT)),
+    re.optional(
+        re.group(
+            '[', re.DASH, '\u2013', ']', re.named_group('end')(re.one_or_more(re.DIGIT))
+        )
+    ),
+)
+
+
+def _escape(text: str, /) -> str:
+    if '*' in text:
+        text = text.replace('*', '\\*')
+    if '`' in text:
+        text = text.replace('`', '\\`')
+
+    return text
+
+
+# Renders tokens as Discord markdown in one pass. Whitespace is collapsed to single
+# spaces (line breaks included) and trimmed from both ends, '*' and '`' in the text
+# are escaped, and in right-to-left passages verse numbers are wrapped in an RTL
+# embedding so they stay next to their verse.
+def render_markdown(tokens: Iterable[Token], /, *, rtl: bool | None = False) -> str:
+    parts: list[str] = []
+    opened: list[Style] = []
+    style = Style.NONE
+    space = False
+
+    def set_style(new_style: Style, /) -> None:
+        nonlocal style, space
+
+        if new_style == style:
+            return
+
+        if space and parts:
+            parts.append(' ')
+        space = False
+
+        # Close back to the outermost style that ends, so markers stay nested
+        keep = 0
+        while keep < len(opened) and opened[keep] & new_style:
+            keep += 1
+        while len(opened) > keep:
+            parts.append(_markers[opened.pop()])
+
+        style = Style.NONE
+        for flag in opened:
+            style |= flag
+
+        # Runs don't record which style is outermost, so italics (headings) wrap bold
+        for flag in (Style.ITALIC, Style.BOLD):
+            if flag & new_style and not flag & style:
+                opened.append(flag)
+                parts.append(_markers[flag])
+
+        style = new_style
+
+    for token in tokens:
+        if type(token) is Text:
+            text = token.text
+
+            if not text:
+                continue
+
+            set_style(token.style)
+
+            words = text.split()
+
+            if not words:
+                space = True
+                continue
+
+            if (space or text[0].isspace()) and parts:
+                parts.append(' ')
+
+            parts.append(_escape(' '.join(words)))
+            space = text[-1].isspace()
+        elif type(token) is VerseNumber:
+            if space and parts:
+                parts.append(' ')
+            space = False
+
+            number = f'{_escape(token.number)}.'
+
+            if style & Style.BOLD:
+                parts.append(number)
+            elif rtl:
+                # wrap in [RTL embedding]text[Pop directional formatting]
+                parts.append(f'\u202b**{number}**\u202c')
+            else:
+                parts.append(f'**{number}**')
+        else:
+            space = True
+
+    while opened:
+        if space and parts:
+            parts.append(' ')
+        space = False
+        parts.append(_markers[opened.pop()])
+
+    return ''.join(parts)
+
+
+# Renders tokens without markup, keeping line breaks
+def render_plain(tokens: Iterable[Token], /) -> str:
+    parts: list[str] = []
+
+    for token in tokens:
+        if type(token) is Text:
+            parts.append(token.text)
+        elif type(token) is VerseNumber:
+            parts.append(f'{token.number}.')
+        else:
+            parts.append('\n')
+
+    return '\n'.join(
+        ' '.join(line.split()) for line in ''.join(parts).strip().splitlines()
+    )
+
+
+# A whole chapter's tokens, indexed by the token each verse starts at so any range of
+# verses can be sliced out and rendered without going back to the service. Anything
+# before the first verse number (such as a psalm title) belongs to the first verse.
+@dataclass(slots=True)
+class Chapter(object):
+    tokens: list[Token]
+    verses: dict[int, int]
+
+    def get_tokens(self, start: int | None, end: int | None, /) -> list[Token] | None:
+        start_index: int | None
+
+        if start is None:
+            start_index = 0
+        elif (start_index := self.verses.get(start)) is None:
+            return None
+
+        end_index = len(self.tokens)
+
+        if end is not None:
+            # A combined verse number covers verses on either side of the end
+            last_index = max(start_index, self.verses.get(end, start_index))
+
+            for verse, index in self.verses.items():
+                if verse > end and last_index < index < end_index:
+                    end_index = index
+
+        return self.tokens[start_index:end_index]
+
+    @classmethod
+    def from_tokens(cls, tokens: list[Token], /) -> Chapter:
+        verses: dict[int, int] = {}
+
+        for index, token in enumerate(tokens):
+            if (
+                type(token) is not VerseNumber
+                or (match := _verse_number_re.match(token.number)) is None
+            ):
+                continue
+
+            start = int(match.group('start'))
+            end = int(match.group('end') or start)
+
+            for verse in range(start, end + 1):
+                verses.setdefault(verse, index if verses else 0)
+
+        return cls(tokens, verses)
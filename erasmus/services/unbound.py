@@ -2,18 +2,24 @@
 
 from __future__ import annotations
 
+from collections.abc import Hashable
 from typing import Final
 
 from attr import attrib, dataclass
 from botus_receptus import re
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from yarl import URL
 
 from ..data import Passage, SearchResults, VerseRange
 from ..exceptions import DoNotUnderstandError
+from ..lru import LRUCache
 from ..protocols import Bible
+from ..single_flight import SingleFlight
 from .base_service import BaseService
+from .tokens import Text, Token, VerseNumber, render_markdown
 
+# The results are in the third nested table, so only tables are parsed
+_table_strainer: Final = SoupStrainer('table')
 _number_re: Final = re.compile(re.capture(re.one_or_more(re.DIGITS), re.DOT))
 _book_map: Final[dict[str, str]] = {
     'Genesis': '01O',
@@ -106,15 +112,104 @@ _book_map: Final[dict[str, str]] = {
 }
 
 
+def _parse_passage(
+    body: bytes,
+    encoding: str,
+    verses: VerseRange,
+    abbr: str,
+    rtl: bool | None,
+    /,
+) -> Passage:
+    soup = BeautifulSoup(
+        body, 'html.parser', parse_only=_table_strainer, from_encoding=encoding
+    )
+
+    verse_table = soup.select_one('table table table')
+
+    if verse_table is None:
+        raise DoNotUnderstandError
+
+    rows = verse_table.select('tr')
+
+    if rows[0].get_text('').strip() == 'No Verses Found':
+        raise DoNotUnderstandError
+
+    is_rtl = False
+    for row in rows:
+        cells = row.select('td')
+        if len(cells) == 2 and cells[1].string == '\xa0':
+            is_rtl = True
+
+        if len(cells) != 2 or cells[0].string == '\xa0' or cells[1].string == '\xa0':
+            row.decompose()
+        elif is_rtl:
+            cells[1].contents[0].insert_before(cells[1].contents[1])
+            cells[1].insert_before(cells[0])
+
+    tokens: list[Token] = []
+
+    # Splitting on the capture group alternates text with the verse numbers
+    for index, part in enumerate(_number_re.split(verse_table.get_text(''))):
+        tokens.append(VerseNumber(part[:-1]) if index % 2 else Text(part))
+
+    return Passage(text=render_markdown(tokens, rtl=rtl), range=verses, version=abbr)
+
+
+# Returns every result as its reference and text, which is all that is kept of a
+# search; the passages are only built for the page being shown
+def _parse_search(body: bytes, encoding: str, /) -> list[tuple[str, str]]:
+    soup = BeautifulSoup(
+        body, 'html.parser', parse_only=_table_strainer, from_encoding=encoding
+    )
+
+    verse_table = soup.select_one('table table table')
+
+    if verse_table is None:
+        raise DoNotUnderstandError
+
+    rows = verse_table.select('tr')
+
+    if rows[0].get_text('').strip() == 'No Verses Found':
+        return []
+
+    results: list[tuple[str, str]] = []
+    chapter_string = ''
+
+    # The first row is a heading and the last two are the result count
+    for row in rows[1:-2]:
+        cells = row.select('td')
+        if len(cells) < 2:
+            continue
+        if cells[0].string == '\xa0':
+            chapter_string = row.get_text('').strip()
+        else:
+            verse_string = cells[0].get_text('').strip()[:-1]
+            results.append((f'{chapter_string}:{verse_string}', cells[1].get_text('')))
+
+    return results
+
+
 @dataclass(slots=True)
 class Unbound(BaseService):
+    upstream_urls = ('http://unbound.biola.edu/',)
+
     _base_url: URL = attrib(init=False)
+    _searches: LRUCache[Hashable, list[tuple[str, str]]] = attrib(init=False)
+    _search_flights: SingleFlight[Hashable, list[tuple[str, str]]] = attrib(
+        init=False, factory=SingleFlight
+    )
 
     def __attrs_post_init__(self, /) -> None:
         self._base_url = URL(
             'http://unbound.biola.edu/index.cfm?method=searchResults.doSearch'
         )
 
+        config = self.config or {}
+        self._searches = LRUCache(
+            max_size=config.get('search_cache_size', 64),
+            ttl=config.get('search_cache_ttl', 86400),
+        )
+
     async def get_passage(self, bible: Bible, verses: VerseRange, /) -> Passage:
         url = self._base_url.update_query(
             {
@@ -134,44 +229,15 @@ class Unbound(BaseService):
             )
 
         async with self.session.get(url) as response:
-            text = await response.text()
-            soup = BeautifulSoup(text, 'html.parser')
-
-            verse_table = soup.select_one('table table table')
-
-            if verse_table is None:
-                raise DoNotUnderstandError
-
-            rows = verse_table.select('tr')
-
-            if rows[0].get_text('').strip() == 'No Verses Found':
-                raise DoNotUnderstandError
-
-            rtl = False
-            for row in rows:
-                cells = row.select('td')
-                if len(cells) == 2 and cells[1].string == '\xa0':
-                    rtl = True
-
-                if (
-                    len(cells) != 2
-                    or cells[0].string == '\xa0'
-                    or cells[1].string == '\xa0'
-                ):
-                    row.decompose()
-                elif rtl:
-                    cells[1].contents[0].insert_before(cells[1].contents[1])
-                    cells[1].insert_before(cells[0])
-
-            return Passage(
-                text=self.replace_special_escapes(
-                    bible,
-                    _number_re.sub(r'__BOLD__\1__BOLD__', verse_table.get_text('')),
-                ),
-                range=verses,
-                version=bible.abbr,
-            )
+            body = await response.read()
+            encoding = response.get_encoding()
 
+        return await self.parse_pool.run(
+            _parse_passage, body, encoding, verses, bible.abbr, bible.rtl
+        )
+
+    # Unbound returns every result for a search at once, so the whole list is
+    # cached and each page of results is sliced from it
     async def search(
         self,
         bible: Bible,
@@ -181,6 +247,31 @@ class Unbound(BaseService):
         limit: int = 20,
         offset: int = 0,
     ) -> SearchResults:
+        key = (bible.service_version, tuple(terms))
+
+        if (results := self._searches.get(key)) is None:
+            results = await self._search_flights.do(
+                key, lambda: self.__fetch_search(bible, terms)
+            )
+
+        return SearchResults(
+            [
+                Passage(
+                    text=render_markdown([Text(text)], rtl=bible.rtl),
+                    range=VerseRange.from_string(reference),
+                    version=bible.abbr,
+                )
+                for reference, text in results[offset : offset + limit]
+            ],
+            len(results),
+        )
+
+    async def __fetch_search(
+        self,
+        bible: Bible,
+        terms: list[str],
+        /,
+    ) -> list[tuple[str, str]]:
         async with self.session.post(
             self._base_url.update_query(
                 {
@@ -197,43 +288,16 @@ class Unbound(BaseService):
                 }
             )
         ) as response:
-            text = await response.text()
-            soup = BeautifulSoup(text, 'html.parser')
-
-            verse_table = soup.select_one('table table table')
-
-            if verse_table is None:
-                raise DoNotUnderstandError
-
-            rows = verse_table.select('tr')
-
-            if rows[0].get_text('').strip() == 'No Verses Found':
-                return SearchResults([], 0)
-
-            rows[0].decompose()
-            rows[-2].decompose()
-            rows[-1].decompose()
-
-            passages: list[Passage] = []
-            chapter_string = ''
-
-            for row in verse_table.select('tr'):
-                cells = row.select('td')
-                if len(cells) < 2:
-                    continue
-                if cells[0].string == '\xa0':
-                    chapter_string = row.get_text('').strip()
-                else:
-                    verse_string = cells[0].get_text('').strip()[:-1]
-                    passage_text = cells[1].get_text('')
-                    passages.append(
-                        Passage(
-                            text=self.replace_special_escapes(bible, passage_text),
-                            range=VerseRange.from_string(
-                                f'{chapter_string}:{verse_string}'
-                            ),
-                            version=bible.abbr,
-                        )
-                    )
-
-            return SearchResults(passages, len(passages))
+            body = await response.read()
+            encoding = response.get_encoding()
+
+        results = await self.parse_pool.run(_parse_search, body, encoding)
+        self._searches.set((bible.service_version, tuple(terms)), results)
+
+        return results
+
+    def get_stats(self, /) -> dict[str, int]:
+        return {
+            'Unbound search cache hits': self._searches.hits,
+            'Unbound search cache misses': self._searches.misses,
+        }
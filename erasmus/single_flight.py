@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+
+class _Call(Generic[V]):
+    __slots__ = ('task', 'waiters')
+
+    task: asyncio.Future[V]
+    waiters: int
+
+    def __init__(self, task: asyncio.Future[V], /) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+# Coalesces concurrent calls sharing a key into one underlying call. A cancelled
+# waiter only stops waiting; the shared call is cancelled once no waiters are left.
+class SingleFlight(Generic[K, V]):
+    __slots__ = ('calls', 'coalesced', '_calls')
+
+    calls: int
+    coalesced: int
+    _calls: dict[K, _Call[V]]
+
+    def __init__(self, /) -> None:
+        self.calls = 0
+        self.coalesced = 0
+        self._calls = {}
+
+    def __len__(self, /) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: K, /) -> bool:
+        return key in self._calls
+
+    async def do(self, key: K, func: Callable[[], Awaitable[V]], /) -> V:
+        call = self._calls.get(key)
+
+        if call is None:
+            new_call = call = _Call(asyncio.ensure_future(func()))
+            self._calls[key] = new_call
+            new_call.task.add_done_callback(lambda _: self.__forget(key, new_call))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if not call.task.done():
+                call.waiters -= 1
+
+                if call.waiters == 0:
+                    self.__forget(key, call)
+                    call.task.cancel()
+
+            raise
+
+    def __forget(self, key: K, call: _Call[V], /) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
@@ -1,11 +1,18 @@
 from __future__ import annotations
 
+import asyncio
 from typing import Any
 
 import pytest
+import pytest_mock
+from attr import attrib, dataclass
 
 from erasmus.cogs.bible import Bible
+from erasmus.data import Passage, VerseRange
+from erasmus.db.bible import BibleVersion
 from erasmus.erasmus import Erasmus
+from erasmus.exceptions import DoNotUnderstandError
+from erasmus.service_manager import ServiceManager
 
 
 class MockBot(object):
@@ -13,6 +20,18 @@ class MockBot(object):
     session: Any = {}
 
 
+@dataclass(slots=True)
+class MockVersion(object):
+    command: str
+    name: str
+    abbr: str
+    service: str
+    service_version: str
+    rtl: bool = False
+    books: int = 0xFF
+    fallbacks: list[list[str]] = attrib(factory=list)
+
+
 class TestBible(object):
     @pytest.fixture
     def mock_bot(self) -> MockBot:
@@ -21,3 +40,190 @@ class TestBible(object):
     def test_instantiate(self, mock_bot: Erasmus) -> None:
         cog = Bible(mock_bot)
         assert cog is not None
+
+    @pytest.mark.asyncio
+    async def test_close(
+        self, mock_bot: Erasmus, mocker: pytest_mock.MockerFixture
+    ) -> None:
+        cog = Bible(mock_bot)
+        close = mocker.patch.object(ServiceManager, 'close', mocker.AsyncMock())
+
+        await cog.close()
+
+        close.assert_awaited_once_with()
+
+
+class TestLookupFromMessage(object):
+    @pytest.fixture
+    def mock_bot(self, mocker: pytest_mock.MockerFixture) -> Any:
+        bot: Any = MockBot()
+        bot.user = mocker.Mock()
+        bot.user.mentioned_in.return_value = False
+        bot.on_command_error = mocker.AsyncMock()
+
+        return bot
+
+    @pytest.fixture
+    def mock_service(self, mocker: pytest_mock.MockerFixture) -> Any:
+        service = mocker.Mock()
+        service.supports_batch.return_value = False
+        service.supports_chapters.return_value = False
+        service.get_passage = mocker.AsyncMock(
+            side_effect=lambda bible, verses: Passage(str(verses), verses)
+        )
+
+        return service
+
+    @pytest.fixture
+    def versions(self, mocker: pytest_mock.MockerFixture) -> dict[str, MockVersion]:
+        versions = {
+            abbr: MockVersion(abbr.lower(), abbr, abbr, 'Mock', abbr.lower())
+            for abbr in ('KJV', 'ESV', 'NASB')
+        }
+
+        async def get_by_abbr(abbr: str) -> MockVersion | None:
+            if abbr == 'BAD':
+                raise RuntimeError('bad version')
+
+            return versions.get(abbr)
+
+        mocker.patch.object(
+            BibleVersion,
+            'get_for_user',
+            mocker.AsyncMock(return_value=versions['KJV']),
+        )
+        mocker.patch.object(
+            BibleVersion, 'get_by_abbr', mocker.AsyncMock(side_effect=get_by_abbr)
+        )
+
+        return versions
+
+    @pytest.fixture
+    def cog(self, mock_bot: Any, mock_service: Any, versions: Any) -> Bible:
+        cog = Bible(mock_bot)
+        cog.service_manager.service_map['Mock'] = mock_service
+
+        return cog
+
+    @pytest.fixture
+    def mock_ctx(self, mocker: pytest_mock.MockerFixture) -> Any:
+        ctx = mocker.MagicMock()
+        ctx.guild = None
+        ctx.author.id = ctx.message.author.id = 1
+        ctx.send_passage = mocker.AsyncMock()
+
+        return ctx
+
+    def get_sent(self, mock_ctx: Any, /) -> list[str]:
+        return [
+            str(call.args[0].range) for call in mock_ctx.send_passage.await_args_list
+        ]
+
+    @pytest.mark.asyncio
+    async def test_reply_order(
+        self,
+        cog: Bible,
+        mock_bot: Any,
+        mock_ctx: Any,
+        mock_service: Any,
+        mocker: pytest_mock.MockerFixture,
+    ) -> None:
+        finished: list[str] = []
+        last_started = asyncio.Event()
+
+        # The first reference is the last to finish
+        async def get_passage(bible: Any, verses: VerseRange) -> Passage:
+            if verses.book == 'Genesis':
+                await last_started.wait()
+            elif verses.book == 'Leviticus':
+                last_started.set()
+
+            finished.append(verses.book)
+
+            return Passage(str(verses), verses)
+
+        mock_service.get_passage.side_effect = get_passage
+        message = mocker.Mock(
+            content='[Genesis 1:1] [Exodus 1:1 ESV] [Leviticus 1:1 NASB]'
+        )
+
+        await cog.lookup_from_message(mock_ctx, message)
+
+        assert finished == ['Exodus', 'Leviticus', 'Genesis']
+        assert self.get_sent(mock_ctx) == [
+            'Genesis 1:1',
+            'Exodus 1:1',
+            'Leviticus 1:1',
+        ]
+        assert [
+            call.args[0].version for call in mock_ctx.send_passage.await_args_list
+        ] == ['KJV', 'ESV', 'NASB']
+        mock_bot.on_command_error.assert_not_awaited()
+        # Each reference was charged to the cooldown
+        assert cog._user_cooldown.get_bucket(mock_ctx.message).get_tokens() == 5
+
+    @pytest.mark.asyncio
+    async def test_failed_reference(
+        self,
+        cog: Bible,
+        mock_bot: Any,
+        mock_ctx: Any,
+        mock_service: Any,
+        mocker: pytest_mock.MockerFixture,
+    ) -> None:
+        error = DoNotUnderstandError()
+
+        async def get_passage(bible: Any, verses: VerseRange) -> Passage:
+            if verses.book == 'Exodus':
+                raise error
+
+            return Passage(str(verses), verses)
+
+        mock_service.get_passage.side_effect = get_passage
+        message = mocker.Mock(
+            content='[Genesis 1:1] [Exodus 1:1] [Leviticus 1:1 BAD] [Numbers 1:1]'
+        )
+
+        await cog.lookup_from_message(mock_ctx, message)
+
+        assert self.get_sent(mock_ctx) == ['Genesis 1:1', 'Numbers 1:1']
+        assert [call.args[1] for call in mock_bot.on_command_error.await_args_list] == [
+            error,
+            mocker.ANY,
+        ]
+        assert (
+            str(mock_bot.on_command_error.await_args_list[1].args[1]) == 'bad version'
+        )
+
+    @pytest.mark.asyncio
+    async def test_lookup_concurrency(
+        self,
+        cog: Bible,
+        mock_ctx: Any,
+        mock_service: Any,
+        mocker: pytest_mock.MockerFixture,
+    ) -> None:
+        running = 0
+        most_running = 0
+
+        async def get_passage(bible: Any, verses: VerseRange) -> Passage:
+            nonlocal running, most_running
+            running += 1
+            most_running = max(most_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+            return Passage(str(verses), verses)
+
+        mock_service.get_passage.side_effect = get_passage
+        cog.lookup_concurrency = 2
+        message = mocker.Mock(
+            content=' '.join(f'[Genesis 1:{verse}]' for verse in range(1, 6))
+            + ' [Exodus 1:1 ESV]'
+        )
+
+        await cog.lookup_from_message(mock_ctx, message)
+
+        assert most_running == 2
+        assert mock_service.get_passage.await_count == 6
+        assert len(self.get_sent(mock_ctx)) == 6
@@ -1,13 +1,17 @@
 from __future__ import annotations
 
+from typing import Any
+
 import pytest
+import pytest_mock
 
-from erasmus.cogs.confession import Confession
+from erasmus.cogs.confession import Confession, ConfessionSearchSource
+from erasmus.db.confession import ConfessionTypeEnum
 from erasmus.erasmus import Erasmus
 
 
 class MockBot(object):
-    ...
+    config: Any = {}
 
 
 class TestConfession(object):
@@ -18,3 +22,61 @@ class TestConfession(object):
     def test_instantiate(self, mock_bot: Erasmus) -> None:
         cog = Confession(mock_bot)
         assert cog is not None
+
+
+class TestConfessionSearchSource(object):
+    @pytest.fixture
+    def mock_confession(self, mocker: pytest_mock.MockerFixture) -> Any:
+        confession = mocker.Mock()
+        confession.type = ConfessionTypeEnum.QA
+        confession.search_count = mocker.AsyncMock(return_value=45)
+
+        def search(
+            terms: list[str], *, limit: int, after: int | None = None, offset: int = 0
+        ) -> list[int]:
+            start = offset if after is None else after + 1
+
+            return list(range(start, min(start + limit, 45)))
+
+        confession.search = mocker.AsyncMock(side_effect=search)
+
+        return confession
+
+    @pytest.mark.asyncio
+    async def test_prepare(self, mock_confession: Any) -> None:
+        source = ConfessionSearchSource(mock_confession, ['faith'], per_page=20)
+        await source._prepare_once()
+
+        assert source.get_total() == 45
+        assert source.get_max_pages() == 3
+        assert source.is_paginating()
+        mock_confession.search_count.assert_awaited_once_with(['faith'])
+        mock_confession.search.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_get_page(self, mock_confession: Any) -> None:
+        source = ConfessionSearchSource(mock_confession, ['faith'], per_page=20)
+        await source._prepare_once()
+
+        assert await source.get_page(0) == list(range(0, 20))
+        assert await source.get_page(1) == list(range(20, 40))
+        assert await source.get_page(0) == list(range(0, 20))
+        assert await source.get_page(2) == list(range(40, 45))
+
+        assert mock_confession.search.await_count == 3
+        assert mock_confession.search.await_args_list[1].kwargs == {
+            'limit': 20,
+            'after': 19,
+        }
+        assert mock_confession.search.await_args_list[2].kwargs == {
+            'limit': 20,
+            'after': 39,
+        }
+
+    @pytest.mark.asyncio
+    async def test_get_page_jump(self, mock_confession: Any) -> None:
+        source = ConfessionSearchSource(mock_confession, ['faith'], per_page=20)
+        await source._prepare_once()
+
+        assert await source.get_page(2) == list(range(40, 45))
+        mock_confession.search.assert_awaited_once_with(['faith'], limit=20, offset=40)
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+import pytest_mock
+
+from erasmus.db.bible import BibleVersion, _Registry
+from erasmus.lru import LRUCache
+
+
+class MockVersion(object):
+    __slots__ = ('id', 'command')
+
+    def __init__(self, id: int, command: str) -> None:
+        self.id = id
+        self.command = command
+
+
+class TestRegistry(object):
+    @pytest.fixture
+    def registry(self) -> _Registry:
+        registry = _Registry()
+        registry.replace(
+            [
+                MockVersion(1, 'nasb'),  # type: ignore
+                MockVersion(2, 'esv'),  # type: ignore
+                MockVersion(3, 'KJV'),  # type: ignore
+            ]
+        )
+
+        return registry
+
+    def test_replace(self, registry: _Registry) -> None:
+        assert registry.loaded
+        assert [version.command for version in registry.get_all()] == [
+            'nasb',
+            'esv',
+            'KJV',
+        ]
+        assert [version.command for version in registry.get_all(ordered=True)] == [
+            'KJV',
+            'esv',
+            'nasb',
+        ]
+
+    def test_lookup(self, registry: _Registry) -> None:
+        assert registry.by_id[2].command == 'esv'
+        assert registry.by_command['esv'].command == 'esv'
+        assert 'kjv' not in registry.by_command
+        assert registry.by_lower_command['kjv'].command == 'KJV'
+
+    def test_add_remove(self, registry: _Registry) -> None:
+        version: Any = MockVersion(4, 'csb')
+        registry.add(version)
+
+        assert registry.by_command['csb'] is version
+        assert [version.command for version in registry.get_all(ordered=True)] == [
+            'KJV',
+            'csb',
+            'esv',
+            'nasb',
+        ]
+
+        registry.remove(version)
+
+        assert 4 not in registry.by_id
+        assert 'csb' not in registry.by_command
+        assert 'csb' not in registry.by_lower_command
+        assert len(registry.get_all(ordered=True)) == 3
+
+
+class TestGetForUser(object):
+    @pytest.fixture(autouse=True)
+    def registry(self, mocker: pytest_mock.MockerFixture) -> _Registry:
+        registry = _Registry()
+        registry.replace(
+            [
+                MockVersion(1, 'bsb'),  # type: ignore
+                MockVersion(2, 'esv'),  # type: ignore
+                MockVersion(3, 'nasb'),  # type: ignore
+            ]
+        )
+        mocker.patch('erasmus.db.bible._registry', registry)
+
+        return registry
+
+    @pytest.fixture
+    def user_prefs(self, mocker: pytest_mock.MockerFixture) -> LRUCache[int, Any]:
+        return mocker.patch('erasmus.db.bible._user_prefs', LRUCache())
+
+    @pytest.fixture
+    def guild_prefs(self, mocker: pytest_mock.MockerFixture) -> LRUCache[int, Any]:
+        return mocker.patch('erasmus.db.bible._guild_prefs', LRUCache())
+
+    @pytest.fixture
+    def mock_first(self, mocker: pytest_mock.MockerFixture) -> Any:
+        select = mocker.patch('erasmus.db.bible.db.select')
+        select.return_value.gino.first = mocker.AsyncMock(
+            return_value={'user_bible_id': None, 'guild_bible_id': 3}
+        )
+
+        return select.return_value.gino.first
+
+    @pytest.mark.asyncio
+    async def test_single_query_and_negative_cache(
+        self,
+        mock_first: Any,
+        user_prefs: LRUCache[int, Any],
+        guild_prefs: LRUCache[int, Any],
+    ) -> None:
+        version = await BibleVersion.get_for_user(10, 20)
+        assert version.command == 'nasb'
+        assert mock_first.await_count == 1
+
+        version = await BibleVersion.get_for_user(10, 20)
+        assert version.command == 'nasb'
+        assert mock_first.await_count == 1
+        assert user_prefs.get(10, 'missing') is None
+        assert guild_prefs.get(20) == 3
+
+    @pytest.mark.asyncio
+    async def test_cached_user_preference(
+        self,
+        mock_first: Any,
+        user_prefs: LRUCache[int, Any],
+        guild_prefs: LRUCache[int, Any],
+    ) -> None:
+        user_prefs.set(10, 2)
+
+        version = await BibleVersion.get_for_user(10, None)
+
+        assert version.command == 'esv'
+        mock_first.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_set_during_query(
+        self,
+        mock_first: Any,
+        user_prefs: LRUCache[int, Any],
+        guild_prefs: LRUCache[int, Any],
+    ) -> None:
+        # The user sets a version and the guild's is unset while the query runs
+        async def first() -> dict[str, Any]:
+            user_prefs.set(10, 2)
+            guild_prefs.set(20, None)
+
+            return {'user_bible_id': None, 'guild_bible_id': 3}
+
+        mock_first.side_effect = first
+
+        version = await BibleVersion.get_for_user(10, 20)
+
+        assert version.command == 'esv'
+        assert user_prefs.get(10) == 2
+        assert guild_prefs.get(20, 'missing') is None
+
+    @pytest.mark.asyncio
+    async def test_fallback(
+        self,
+        mock_first: Any,
+        user_prefs: LRUCache[int, Any],
+        guild_prefs: LRUCache[int, Any],
+    ) -> None:
+        mock_first.return_value = {'user_bible_id': None}
+
+        version = await BibleVersion.get_for_user(10, None)
+
+        assert version.command == 'bsb'
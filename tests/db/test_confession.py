@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import os
+from collections.abc import AsyncIterator, Callable
+from typing import Any
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from erasmus.db.base import db
+from erasmus.db.confession import (
+    Article,
+    Confession,
+    ConfessionType,
+    ConfessionTypeEnum,
+    Paragraph,
+    Question,
+)
+
+TEST_DB_URL = os.environ.get('ERASMUS_TEST_DB_URL')
+
+
+def compile_query(query: Any, /) -> str:
+    return str(
+        query.compile(
+            dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}
+        )
+    )
+
+
+class TestSearchQueries(object):
+    @pytest.fixture
+    def confession(self) -> Confession:
+        return Confession(id=1, command='test', name='Test')
+
+    @pytest.mark.parametrize(
+        'get_query,table',
+        [
+            (Confession.search_paragraphs_query, 'confession_paragraphs'),
+            (Confession.search_questions_query, 'confession_questions'),
+            (Confession.search_articles_query, 'confession_articles'),
+        ],
+    )
+    def test_uses_search_vector(
+        self,
+        confession: Confession,
+        get_query: Callable[[Confession, list[str]], Any],
+        table: str,
+    ) -> None:
+        sql = compile_query(get_query(confession, ['faith', 'works']))
+
+        assert f"{table}.search_vector @@ to_tsquery('english', 'faith & works')" in sql
+        assert 'to_tsvector' not in sql
+
+    def test_paragraphs_after(self, confession: Confession) -> None:
+        sql = compile_query(
+            confession.search_paragraphs_query(
+                ['faith'], after=Paragraph(chapter_number=3, paragraph_number=2)
+            )
+        )
+
+        assert (
+            '(confession_paragraphs.chapter_number, '
+            'confession_paragraphs.paragraph_number) > (3, 2)'
+        ) in sql
+
+    def test_questions_after(self, confession: Confession) -> None:
+        sql = compile_query(
+            confession.search_questions_query(
+                ['faith'], after=Question(question_number=12)
+            )
+        )
+
+        assert 'confession_questions.question_number > 12' in sql
+
+    def test_articles_after(self, confession: Confession) -> None:
+        sql = compile_query(
+            confession.search_articles_query(['faith'], after=Article(article_number=4))
+        )
+
+        assert 'confession_articles.article_number > 4' in sql
+
+    @pytest.mark.parametrize(
+        'type,table',
+        [
+            (ConfessionTypeEnum.CHAPTERS, 'confession_paragraphs'),
+            (ConfessionTypeEnum.QA, 'confession_questions'),
+            (ConfessionTypeEnum.ARTICLES, 'confession_articles'),
+        ],
+    )
+    def test_search_count_query(
+        self, confession: Confession, type: ConfessionTypeEnum, table: str
+    ) -> None:
+        confession.type = ConfessionType(value=type)
+        sql = compile_query(confession.search_count_query(['faith']))
+
+        assert sql.startswith(f'SELECT count({table}.id)')
+        assert 'JOIN' not in sql
+        assert 'ORDER BY' not in sql
+        assert f"{table}.search_vector @@ to_tsquery('english', 'faith')" in sql
+
+
+@pytest.mark.skipif(TEST_DB_URL is None, reason='ERASMUS_TEST_DB_URL is not set')
+class TestSearchPlans(object):
+    @pytest.fixture
+    async def bind(self) -> AsyncIterator[None]:
+        await db.set_bind(TEST_DB_URL)
+        yield
+        await db.pop_bind().close()
+
+    @pytest.mark.parametrize(
+        'get_query,index',
+        [
+            (Confession.search_paragraphs_query, 'confession_paragraphs_search_idx'),
+            (Confession.search_questions_query, 'confession_questions_search_idx'),
+            (Confession.search_articles_query, 'confession_articles_search_idx'),
+        ],
+    )
+    @pytest.mark.asyncio
+    async def test_uses_index(
+        self,
+        bind: None,
+        get_query: Callable[[Confession, list[str]], Any],
+        index: str,
+    ) -> None:
+        confession = Confession(id=1, command='test', name='Test')
+        sql = compile_query(get_query(confession, ['faith', 'works']))
+
+        async with db.transaction():
+            # The confession tables are small enough that the planner would
+            # otherwise prefer a sequential scan regardless of the index
+            await db.status('SET LOCAL enable_seqscan = off')
+            plan = '\n'.join(row[0] for row in await db.all(f'EXPLAIN {sql}'))
+
+        assert f'Bitmap Index Scan on {index}' in plan
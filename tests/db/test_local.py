@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from erasmus.db.local import LocalVerse
+
+from .test_confession import compile_query
+
+
+def test_range_query() -> None:
+    sql = compile_query(LocalVerse.range_query('BIB', 43, (1, 51), (2, 1)))
+
+    assert "local_verses.version = 'BIB'" in sql
+    assert 'local_verses.book = 43' in sql
+    assert '(local_verses.chapter, local_verses.verse) >= (1, 51)' in sql
+    assert '(local_verses.chapter, local_verses.verse) <= (2, 1)' in sql
+    assert 'ORDER BY local_verses.chapter, local_verses.verse' in sql
+
+
+def test_search_query() -> None:
+    sql = compile_query(LocalVerse.search_query('BIB', ['faith', 'works']))
+
+    assert "local_verses.search_vector @@ to_tsquery('english', 'faith & works')" in sql
+    assert 'ORDER BY local_verses.book, local_verses.chapter, local_verses.verse' in sql
@@ -1,16 +1,21 @@
 from __future__ import annotations
 
+import json
+from collections.abc import AsyncIterator
 from pathlib import Path
-from typing import Any, cast
+from typing import Any, Final, cast
 
 import _pytest
 import aiohttp
 import pytest
+import pytest_mock
 import toml
+import yaml
 
-from erasmus.data import Passage, VerseRange
+from erasmus.data import Passage, SearchResults, VerseRange
 from erasmus.protocols import Service
 from erasmus.services.apibible import ApiBible
+from erasmus.services.tokens import render_markdown
 
 from . import ServiceTest
 
@@ -296,7 +301,214 @@ class TestApiBible(ServiceTest):
         return 'KJV'
 
     @pytest.fixture
-    def service(
+    async def service(
         self, config: Any, aiohttp_client_session: aiohttp.ClientSession
-    ) -> Service:
-        return ApiBible(config=config, session=aiohttp_client_session)
+    ) -> AsyncIterator[Service]:
+        service = ApiBible(config=config, session=aiohttp_client_session)
+        yield service
+        # Send the queued FUMS reports while the cassette is still in use
+        await service.close()
+
+
+def _text(text: str, verse_id: str) -> dict[str, Any]:
+    return {
+        'text': text,
+        'type': 'text',
+        'attrs': {'verseId': verse_id, 'verseOrgIds': [verse_id]},
+    }
+
+
+def _verse(number: str, sid: str) -> dict[str, Any]:
+    return {
+        'name': 'verse',
+        'type': 'tag',
+        'attrs': {'number': number, 'style': 'v', 'sid': sid},
+        'items': [{'text': number, 'type': 'text'}],
+    }
+
+
+def _add(text: str, verse_id: str) -> dict[str, Any]:
+    return {
+        'name': 'char',
+        'type': 'tag',
+        'attrs': {'style': 'add'},
+        'items': [_text(text, verse_id)],
+    }
+
+
+# There are no recorded content-type=json cassettes, so these are written by hand in
+# the api.bible json schema: a para tag holding verse tags, char tags and text items
+# with their verse ids, for the same passages as the recorded html cassettes
+_json_content: Final[dict[str, list[dict[str, Any]]]] = {
+    'Gal 3-10-11 KJV': [
+        {
+            'name': 'para',
+            'type': 'tag',
+            'attrs': {'style': 'p'},
+            'items': [
+                _verse('10', 'GAL 3:10'),
+                _text(
+                    'For as many as are of the works of the law are under the '
+                    'curse: for it is written, Cursed ',
+                    'GAL.3.10',
+                ),
+                _add('is', 'GAL.3.10'),
+                _text(
+                    ' every one that continueth not in all things which are '
+                    'written in the book of the law to do them. ',
+                    'GAL.3.10',
+                ),
+                _verse('11', 'GAL 3:11'),
+                _text(
+                    'But that no man is justified by the law in the sight of God, ',
+                    'GAL.3.11',
+                ),
+                _add('it is', 'GAL.3.11'),
+                _text(' evident: for, The just shall live by faith. ', 'GAL.3.11'),
+            ],
+        }
+    ],
+    'Mark 5-1 KJV': [
+        {
+            'name': 'para',
+            'type': 'tag',
+            'attrs': {'style': 'p'},
+            'items': [
+                _verse('1', 'MRK 5:1'),
+                _text(
+                    'And they came over unto the other side of the sea, into the '
+                    'country of the Gadarenes. ',
+                    'MRK.5.1',
+                ),
+            ],
+        }
+    ],
+}
+
+
+# The json content type must give the same passages as the recorded html
+@pytest.mark.parametrize(
+    'name,verses,expected',
+    [
+        (
+            'Gal 3-10-11 KJV',
+            'Gal 3:10-11',
+            '**10.** For as many as are of the works of the law are under the '
+            'curse: for it is written, Cursed _is_ every one that continueth '
+            'not in all things which are written in the book of the law to do '
+            'them. **11.** But that no man is justified by the law in the '
+            'sight of God, _it is_ evident: for, The just shall live by faith.',
+        ),
+        (
+            'Mark 5-1 KJV',
+            'Mark 5:1',
+            '**1.** And they came over unto the other side of the sea, into '
+            'the country of the Gadarenes.',
+        ),
+    ],
+)
+@pytest.mark.asyncio
+async def test_get_passage_json(
+    name: str,
+    verses: str,
+    expected: str,
+    MockBible: type[Any],
+    mock_client_session: Any,
+    mock_response: Any,
+    mocker: pytest_mock.MockerFixture,
+) -> None:
+    cassette = yaml.safe_load(
+        (
+            Path(__file__).parent
+            / 'cassettes'
+            / 'test_apibible'
+            / f'TestApiBible.test_get_passage[{name}].yaml'
+        ).read_text()
+    )
+    html_data = json.loads(cassette['interactions'][0]['response']['body']['string'])
+    mock_response.status = 200
+    bible = MockBible(
+        command='bib',
+        name='The Bible',
+        abbr='KJV',
+        service='ApiBible',
+        service_version='de4e12af7f28f599-02',
+    )
+    verse_range = VerseRange.from_string(verses)
+
+    mock_response.json = mocker.AsyncMock(
+        return_value={'data': html_data['data'], 'meta': None}
+    )
+    html_service = ApiBible(config={'api_key': ''}, session=mock_client_session)
+    html_passage = await html_service.get_passage(bible, verse_range)
+
+    mock_response.json = mocker.AsyncMock(
+        return_value={
+            'data': {**html_data['data'], 'content': _json_content[name]},
+            'meta': None,
+        }
+    )
+    json_service = ApiBible(
+        config={'api_key': '', 'content_type': 'json'}, session=mock_client_session
+    )
+    json_passage = await json_service.get_passage(bible, verse_range)
+
+    assert json_passage == html_passage == Passage(expected, verse_range, 'KJV')
+    assert mock_client_session.get.call_args.args[0].query['content-type'] == 'json'
+
+    chapter = await json_service.get_chapter(bible, verse_range.book, 3)
+    tokens = chapter.get_tokens(verse_range.start.verse, None)
+
+    assert tokens is not None
+    assert render_markdown(tokens) == expected
+
+
+@pytest.mark.asyncio
+async def test_throttled_keys(
+    MockBible: type[Any],
+    mock_client_session: Any,
+    mocker: pytest_mock.MockerFixture,
+) -> None:
+    def make_response(status: int) -> Any:
+        response = mocker.MagicMock()
+        response.__aenter__.return_value = response
+        response.status = status
+        response.headers = {'Retry-After': '5'} if status == 429 else {}
+        response.raise_for_status = mocker.Mock(
+            side_effect=aiohttp.ClientResponseError(mocker.Mock(), (), status=status)
+        )
+        response.json = mocker.AsyncMock(
+            return_value={'data': {'total': 0, 'verses': []}, 'meta': None}
+        )
+
+        return response
+
+    mock_client_session.get.side_effect = [
+        make_response(429),
+        make_response(200),
+        make_response(429),
+    ]
+    service = ApiBible(config={'api_keys': ['a', 'b']}, session=mock_client_session)
+    bible = MockBible(
+        command='bib',
+        name='The Bible',
+        abbr='KJV',
+        service='ApiBible',
+        service_version='de4e12af7f28f599-02',
+    )
+
+    assert await service.search(bible, ['faith']) == SearchResults([], 0)
+    assert [
+        call.kwargs['headers'] for call in mock_client_session.get.call_args_list
+    ] == [{'api-key': 'a'}, {'api-key': 'b'}]
+
+    # Both keys are cooling down now, so the 429 is raised
+    with pytest.raises(aiohttp.ClientResponseError):
+        await service.search(bible, ['faith'])
+
+    stats = service.get_stats()
+
+    assert stats['ApiBible key 1 throttled'] == 1
+    assert stats['ApiBible key 2 requests'] == 2
+    assert stats['ApiBible key 2 throttled'] == 1
+    assert stats['ApiBible keys cooling down'] == 2
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+import aiohttp
+import pytest
+import pytest_mock
+
+from erasmus.data import Passage, SearchResults, VerseRange
+from erasmus.db.local import LocalVerse
+from erasmus.exceptions import DoNotUnderstandError
+from erasmus.packed_corpus import PackedCorpus, get_corpus_path, write
+from erasmus.search_index import SearchIndex, get_index_path
+from erasmus.services.local import Local
+
+
+class TestLocal(object):
+    @pytest.fixture
+    def bible(self, MockBible: type[Any]) -> Any:
+        return MockBible('bib', 'The Bible', 'BIB', 'Local', 'local-BIB')
+
+    @pytest.fixture
+    def service(self, mock_client_session: aiohttp.ClientSession) -> Local:
+        return Local(config=None, session=mock_client_session)
+
+    @pytest.mark.asyncio
+    async def test_get_passage(
+        self, mocker: pytest_mock.MockerFixture, bible: Any, service: Local
+    ) -> None:
+        get_range = mocker.patch.object(
+            LocalVerse,
+            'get_range',
+            mocker.AsyncMock(
+                return_value=[
+                    (1, 51, 'And he said unto him, *Verily*'),
+                    (2, 1, 'And the third day'),
+                ]
+            ),
+        )
+        verses = VerseRange.from_string('John 1:51-2:1')
+
+        assert await service.get_passage(bible, verses) == Passage(
+            '**51.** And he said unto him, \\*Verily\\* **1.** And the third day',
+            verses,
+            'BIB',
+        )
+        get_range.assert_awaited_once_with('local-BIB', 43, (1, 51), (2, 1))
+
+    @pytest.mark.asyncio
+    async def test_get_passage_no_passages(
+        self, mocker: pytest_mock.MockerFixture, bible: Any, service: Local
+    ) -> None:
+        mocker.patch.object(LocalVerse, 'get_range', mocker.AsyncMock(return_value=[]))
+
+        with pytest.raises(DoNotUnderstandError):
+            await service.get_passage(bible, VerseRange.from_string('John 50:1-4'))
+
+    @pytest.mark.asyncio
+    async def test_get_passage_corpus(
+        self,
+        mocker: pytest_mock.MockerFixture,
+        mock_client_session: aiohttp.ClientSession,
+        MockBible: type[Any],
+        bible: Any,
+        tmp_path: Path,
+    ) -> None:
+        get_range = mocker.patch.object(LocalVerse, 'get_range', mocker.AsyncMock())
+        write(
+            [(43, 1, 51, 'And he said unto him'), (43, 2, 1, 'And the third day')],
+            get_corpus_path(tmp_path, 'local-BIB'),
+        )
+        service = Local(
+            config={'corpus_dir': str(tmp_path)}, session=mock_client_session
+        )
+        verses = VerseRange.from_string('John 1:51-2:1')
+
+        await service.prepare([bible])
+
+        assert await service.get_passage(bible, verses) == Passage(
+            '**51.** And he said unto him **1.** And the third day', verses, 'BIB'
+        )
+        get_range.assert_not_called()
+
+        # Versions without a corpus file are read from the database
+        get_range.return_value = [(1, 1, 'Blessed is the man')]
+        other = MockBible('other', 'Other', 'OTH', 'Local', 'local-OTH')
+
+        await service.get_passage(other, VerseRange.from_string('Psalm 1:1'))
+        get_range.assert_awaited_once_with('local-OTH', 19, (1, 1), (1, 1))
+
+    @pytest.mark.asyncio
+    async def test_corpus_open_once_and_close(
+        self,
+        mocker: pytest_mock.MockerFixture,
+        mock_client_session: aiohttp.ClientSession,
+        MockBible: type[Any],
+        bible: Any,
+        tmp_path: Path,
+    ) -> None:
+        mocker.patch.object(
+            LocalVerse,
+            'get_range',
+            mocker.AsyncMock(return_value=[(1, 1, 'Blessed is the man')]),
+        )
+        write(
+            [(19, 1, 1, 'Blessed is the man')], get_corpus_path(tmp_path, 'local-BIB')
+        )
+        get_corpus_path(tmp_path, 'local-BAD').write_bytes(b'not a corpus')
+        open_corpus = mocker.spy(PackedCorpus, 'open')
+        close_corpus = mocker.spy(PackedCorpus, 'close')
+        service = Local(
+            config={'corpus_dir': str(tmp_path)}, session=mock_client_session
+        )
+        others = [
+            MockBible('other', 'Other', 'OTH', 'Local', 'local-OTH'),
+            MockBible('bad', 'Bad', 'BAD', 'Local', 'local-BAD'),
+        ]
+        verses = VerseRange.from_string('Psalm 1:1')
+
+        await service.prepare([bible, *others])
+
+        for _ in range(2):
+            for version in (bible, *others):
+                await service.get_passage(version, verses)
+
+        # Missing and unreadable corpora aren't retried on each lookup
+        assert open_corpus.call_count == 3
+
+        await service.close()
+
+        close_corpus.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_search(
+        self, mocker: pytest_mock.MockerFixture, bible: Any, service: Local
+    ) -> None:
+        search = mocker.patch.object(
+            LocalVerse,
+            'search',
+            mocker.AsyncMock(
+                return_value=([(1, 14, 18, 'And Melchizedek king of Salem')], 12)
+            ),
+        )
+
+        assert await service.search(
+            bible, ['Melchizedek'], limit=1, offset=2
+        ) == SearchResults(
+            [
+                Passage(
+                    'And Melchizedek king of Salem',
+                    VerseRange.from_string('Genesis 14:18'),
+                    'BIB',
+                )
+            ],
+            12,
+        )
+        search.assert_awaited_once_with('local-BIB', ['Melchizedek'], limit=1, offset=2)
+
+    @pytest.mark.asyncio
+    async def test_search_index(
+        self,
+        mocker: pytest_mock.MockerFixture,
+        mock_client_session: aiohttp.ClientSession,
+        bible: Any,
+        tmp_path: Path,
+    ) -> None:
+        get_version = mocker.patch.object(
+            LocalVerse,
+            'get_version',
+            mocker.AsyncMock(
+                return_value=[
+                    (1, 14, 18, 'And Melchizedek king of Salem'),
+                    (19, 110, 4, 'after the order of Melchizedek'),
+                    (58, 5, 6, 'after the order of Melchizedek'),
+                ]
+            ),
+        )
+        search = mocker.patch.object(LocalVerse, 'search', mocker.AsyncMock())
+        service = Local(
+            config={'index_dir': str(tmp_path)}, session=mock_client_session
+        )
+
+        await service.prepare([bible])
+
+        assert (tmp_path / 'local-BIB.idx').exists()
+        assert await service.search(
+            bible, ['the order of', 'melch*'], limit=1, offset=1
+        ) == SearchResults(
+            [
+                Passage(
+                    'after the order of Melchizedek',
+                    VerseRange.from_string('Hebrews 5:6'),
+                    'BIB',
+                )
+            ],
+            2,
+        )
+        get_version.assert_awaited_once_with('local-BIB')
+        search.assert_not_called()
+
+        # A new service loads the saved index instead of building it again
+        service = Local(
+            config={'index_dir': str(tmp_path)}, session=mock_client_session
+        )
+
+        assert (await service.search(bible, ['salem'])).total == 1
+        get_version.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_search_index_corrupt(
+        self,
+        mocker: pytest_mock.MockerFixture,
+        mock_client_session: aiohttp.ClientSession,
+        bible: Any,
+        tmp_path: Path,
+    ) -> None:
+        get_version = mocker.patch.object(
+            LocalVerse,
+            'get_version',
+            mocker.AsyncMock(return_value=[(1, 14, 18, 'And Melchizedek king')]),
+        )
+        path = get_index_path(tmp_path, 'local-BIB')
+        path.write_bytes(b'x\x9c\x03\x00')
+        service = Local(
+            config={'index_dir': str(tmp_path)}, session=mock_client_session
+        )
+
+        await service.prepare([bible])
+
+        get_version.assert_awaited_once_with('local-BIB')
+        assert len(SearchIndex.load(path)) == 1
+        assert (await service.search(bible, ['melchizedek'])).total == 1
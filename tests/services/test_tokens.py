@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import pytest
+
+from erasmus.services.tokens import (
+    LINE_BREAK,
+    Chapter,
+    Style,
+    Text,
+    Token,
+    VerseNumber,
+    render_markdown,
+    render_plain,
+)
+
+
+class TestRenderMarkdown(object):
+    @pytest.mark.parametrize(
+        'tokens,expected',
+        [
+            ([Text('  In the \n beginning  ')], 'In the beginning'),
+            ([Text('a '), LINE_BREAK, Text(' b')], 'a b'),
+            ([Text('2 * 3 = `6`')], '2 \\* 3 = \\`6\\`'),
+            (
+                [VerseNumber('1'), Text(' In the'), Text(' beginning ')],
+                '**1.** In the beginning',
+            ),
+            (
+                [Text('Then '), Text('Selah ', Style.ITALIC), Text(' again')],
+                'Then _Selah _ again',
+            ),
+            (
+                [
+                    Text('Melchizedek', Style.BOLD | Style.ITALIC),
+                    Text('’s Priesthood', Style.ITALIC),
+                    Text(' For'),
+                ],
+                '_**Melchizedek**’s Priesthood_ For',
+            ),
+            (
+                [
+                    Text('For ', Style.ITALIC),
+                    Text('He', Style.BOLD | Style.ITALIC),
+                    Text(' said'),
+                ],
+                '_For **He**_ said',
+            ),
+            ([Text('Lord', Style.BOLD), VerseNumber('2')], '**Lord2.**'),
+        ],
+    )
+    def test_render(self, tokens: list[Token], expected: str) -> None:
+        assert render_markdown(tokens) == expected
+
+    def test_rtl(self) -> None:
+        tokens: list[Token] = [VerseNumber('1'), Text(' בְּרֵאשִׁית')]
+
+        assert render_markdown(tokens, rtl=True) == '\u202b**1.**\u202c בְּרֵאשִׁית'
+        assert render_markdown(tokens) == '**1.** בְּרֵאשִׁית'
+
+
+def test_render_plain() -> None:
+    assert (
+        render_plain(
+            [
+                VerseNumber('1'),
+                Text(' In the  beginning', Style.BOLD),
+                LINE_BREAK,
+                VerseNumber('2'),
+                Text(' And *the* earth '),
+            ]
+        )
+        == '1. In the beginning\n2. And *the* earth'
+    )
+
+
+class TestChapter(object):
+    @pytest.fixture
+    def chapter(self) -> Chapter:
+        return Chapter.from_tokens(
+            [
+                Text('A Psalm', Style.BOLD),
+                Text(' '),
+                VerseNumber('1'),
+                Text(' One '),
+                VerseNumber('2'),
+                Text(' Two '),
+                VerseNumber('3-4'),
+                Text(' Three and four '),
+                VerseNumber('5'),
+                Text(' Five'),
+            ]
+        )
+
+    @pytest.mark.parametrize(
+        'start,end,expected',
+        [
+            (1, 1, '**A Psalm** **1.** One'),
+            (2, 2, '**2.** Two'),
+            (2, 3, '**2.** Two **3-4.** Three and four'),
+            (4, 4, '**3-4.** Three and four'),
+            (5, 10, '**5.** Five'),
+            (None, 2, '**A Psalm** **1.** One **2.** Two'),
+            (3, None, '**3-4.** Three and four **5.** Five'),
+        ],
+    )
+    def test_get_tokens(
+        self, chapter: Chapter, start: int | None, end: int | None, expected: str
+    ) -> None:
+        tokens = chapter.get_tokens(start, end)
+
+        assert tokens is not None
+        assert render_markdown(tokens) == expected
+
+    def test_get_tokens_missing_verse(self, chapter: Chapter) -> None:
+        assert chapter.get_tokens(6, 7) is None
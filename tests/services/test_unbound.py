@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+import pytest_mock
+
+from erasmus.data import Passage, VerseRange
+from erasmus.services.unbound import Unbound, _parse_search
+
+
+# There are no recorded Unbound cassettes, so the page is generated in the layout
+# Unbound returns: a heading row, a row for each chapter followed by its verses, and
+# two rows with the result count, all in the third nested table
+def _make_page(results: list[tuple[str, int, str]]) -> bytes:
+    rows = ['<tr><td colspan="2">Search results</td></tr>']
+    chapter = ''
+
+    for reference, verse, text in results:
+        if reference != chapter:
+            chapter = reference
+            rows.append(f'<tr><td>&nbsp;</td><td>{chapter}</td></tr>')
+
+        rows.append(f'<tr><td>{verse}.</td><td>{text}</td></tr>')
+
+    rows.append(f'<tr><td colspan="2">{len(results)} verses found</td></tr>')
+    rows.append('<tr><td colspan="2">&nbsp;</td></tr>')
+
+    return (
+        '<html><head><title>Unbound Bible</title></head><body>'
+        '<div id="nav"><ul><li><a href="/">Home</a></li></ul></div>'
+        '<table><tr><td><table><tr><td><table>'
+        f'{"".join(rows)}'
+        '</table></td></tr></table></td></tr></table>'
+        '</body></html>'
+    ).encode()
+
+
+_results = [
+    ('Genesis 14', 18, 'And Melchizedek king of Salem brought forth bread'),
+    ('Psalms 110', 4, 'Thou art a priest for ever'),
+    ('Hebrews 5', 6, 'after the order of Melchisedec.'),
+    ('Hebrews 5', 10, 'Called of God an high priest'),
+    ('Hebrews 6', 20, 'Whither the forerunner is for us entered'),
+]
+
+
+def test_parse_search() -> None:
+    assert _parse_search(_make_page(_results), 'utf-8') == [
+        (f'{chapter}:{verse}', text) for chapter, verse, text in _results
+    ]
+
+
+def test_parse_search_no_results() -> None:
+    body = (
+        b'<table><tr><td><table><tr><td><table>'
+        b'<tr><td>No Verses Found</td></tr>'
+        b'</table></td></tr></table></td></tr></table>'
+    )
+
+    assert _parse_search(body, 'utf-8') == []
+
+
+@pytest.mark.asyncio
+async def test_search(
+    MockBible: type[Any],
+    mock_client_session: Any,
+    mock_response: Any,
+    mocker: pytest_mock.MockerFixture,
+) -> None:
+    mock_response.read = mocker.AsyncMock(return_value=_make_page(_results))
+    mock_response.get_encoding.return_value = 'utf-8'
+    service = Unbound(config={}, session=mock_client_session)
+    bible = MockBible(
+        command='kjv',
+        name='King James Version',
+        abbr='KJV',
+        service='Unbound',
+        service_version='kjv',
+    )
+
+    first = await service.search(bible, ['Melchizedek'], limit=2)
+    second = await service.search(bible, ['Melchizedek'], limit=2, offset=2)
+    last = await service.search(bible, ['Melchizedek'], limit=2, offset=4)
+
+    assert first.total == second.total == last.total == len(_results)
+    assert first.verses == [
+        Passage(
+            'And Melchizedek king of Salem brought forth bread',
+            VerseRange.from_string('Genesis 14:18'),
+            'KJV',
+        ),
+        Passage(
+            'Thou art a priest for ever',
+            VerseRange.from_string('Psalms 110:4'),
+            'KJV',
+        ),
+    ]
+    assert [passage.range for passage in second.verses] == [
+        VerseRange.from_string('Hebrews 5:6'),
+        VerseRange.from_string('Hebrews 5:10'),
+    ]
+    assert [passage.range for passage in last.verses] == [
+        VerseRange.from_string('Hebrews 6:20')
+    ]
+
+    # Every page after the first is sliced from the cached results
+    mock_client_session.post.assert_called_once()
+    assert mock_client_session.post.call_args.args[0].query['search'] == 'Melchizedek'
+    assert service.get_stats() == {
+        'Unbound search cache hits': 2,
+        'Unbound search cache misses': 1,
+    }
+
+    # Different terms are a different search
+    await service.search(bible, ['Melchizedek', 'priest'])
+
+    assert mock_client_session.post.call_count == 2
+    assert (
+        mock_client_session.post.call_args.args[0].query['search']
+        == 'Melchizedek AND priest'
+    )
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import pytest_mock
+
+from erasmus.api_keys import ApiKeyPool
+
+
+class TestApiKeyPool(object):
+    def test_get(self) -> None:
+        pool = ApiKeyPool(('a', 'b', 'c'))
+
+        assert [pool.get() for _ in range(4)] == ['a', 'b', 'c', 'a']
+
+        stats = pool.get_stats('Test')
+
+        assert stats['Test key 1 requests'] == 2
+        assert stats['Test key 1 requests today'] == 2
+        assert stats['Test key 2 requests'] == 1
+        assert stats['Test key 3 requests'] == 1
+        assert stats['Test keys cooling down'] == 0
+
+    def test_throttled(self, mocker: pytest_mock.MockerFixture) -> None:
+        monotonic = mocker.patch('erasmus.api_keys.monotonic', return_value=100.0)
+        pool = ApiKeyPool(('a', 'b'), cooldown=30.0)
+
+        pool.record_throttled('a')
+        assert [pool.get() for _ in range(3)] == ['b', 'b', 'b']
+        assert pool.is_available()
+
+        pool.record_throttled('b', 10.0)
+        assert not pool.is_available()
+        # Every key is cooling down, so the one that recovers first is used
+        assert pool.get() == 'b'
+
+        stats = pool.get_stats('Test')
+        assert stats['Test key 1 throttled'] == 1
+        assert stats['Test key 2 throttled'] == 1
+        assert stats['Test keys cooling down'] == 2
+
+        monotonic.return_value = 130.0
+        assert [pool.get() for _ in range(2)] == ['a', 'b']
+        assert pool.get_stats('Test')['Test keys cooling down'] == 0
+
+    def test_requests_today(self, mocker: pytest_mock.MockerFixture) -> None:
+        get_day = mocker.patch('erasmus.api_keys._get_day', return_value=1)
+        pool = ApiKeyPool(('a',))
+        pool.get()
+        pool.get()
+
+        get_day.return_value = 2
+        assert pool.get_stats('Test')['Test key 1 requests today'] == 0
+
+        pool.get()
+        stats = pool.get_stats('Test')
+        assert stats['Test key 1 requests today'] == 1
+        assert stats['Test key 1 requests'] == 3
+
+    def test_from_config(self) -> None:
+        assert ApiKeyPool.from_config(None) == ApiKeyPool(())
+        assert ApiKeyPool.from_config({'api_key': 'a'}) == ApiKeyPool(('a',))
+        assert ApiKeyPool.from_config(
+            {'api_keys': ['a', 'b'], 'key_cooldown': 5}
+        ) == ApiKeyPool(('a', 'b'), cooldown=5)
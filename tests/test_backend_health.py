@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import pytest_mock
+
+from erasmus.backend_health import BackendHealth
+
+
+class TestBackendHealth(object):
+    def test_hedge_delay(self) -> None:
+        health = BackendHealth(default_delay=2.0, min_samples=20)
+        key = ('ServiceOne', 'BIB')
+
+        for elapsed in range(1, 20):
+            health.record_success(key, elapsed / 100)
+
+        assert health.get_hedge_delay(key) == 2.0
+
+        for elapsed in range(20, 101):
+            health.record_success(key, elapsed / 100)
+
+        assert health.get_hedge_delay(key) == 0.96
+        assert health.get_hedge_delay(('ServiceTwo', 'BIB')) == 2.0
+
+        # A success without a latency doesn't count towards the delay
+        for _ in range(100):
+            health.record_success(key)
+
+        assert health.get_hedge_delay(key) == 0.96
+
+    def test_circuit(self, mocker: pytest_mock.MockerFixture) -> None:
+        monotonic = mocker.patch('erasmus.backend_health.monotonic', return_value=100.0)
+        health = BackendHealth(failure_threshold=2, recovery_time=30.0)
+        key = ('ServiceOne', 'BIB')
+
+        health.record_failure(key)
+        assert health.is_available(key)
+
+        health.record_failure(key)
+        assert not health.is_available(key)
+        assert health.get_stats() == {'backends unavailable': 1}
+
+        monotonic.return_value = 130.0
+        assert health.is_available(key)
+
+        # Still failing, so it waits again
+        health.record_failure(key)
+        monotonic.return_value = 150.0
+        assert not health.is_available(key)
+
+        monotonic.return_value = 160.0
+        health.record_success(key, 0.1)
+        assert health.is_available(key)
+
+        health.record_failure(key)
+        assert health.is_available(key)
+
+    def test_from_config(self) -> None:
+        assert BackendHealth.from_config(None) == BackendHealth()
+        assert BackendHealth.from_config(
+            {'default_delay': 1.5, 'failure_threshold': 3}
+        ) == BackendHealth(default_delay=1.5, failure_threshold=3)
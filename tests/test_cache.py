@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from erasmus.cache import PassageCache
+from erasmus.data import VerseRange
+
+
+class TestPassageCache(object):
+    @pytest.mark.asyncio
+    async def test_get_set(self, MockBible: type[Any]) -> None:
+        cache = PassageCache()
+        bible = MockBible('bib', 'The Bible', 'BIB', 'MyService', 'service-BIB')
+
+        assert await cache.get(bible, VerseRange.from_string('John 3:16')) is None
+
+        await cache.set(bible, VerseRange.from_string('John 3:16'), 'For God')
+
+        assert await cache.get(bible, VerseRange.from_string('Jn 3:16')) == 'For God'
+        assert (
+            await cache.get(bible, VerseRange.from_string('John 3:16-3:16'))
+            == 'For God'
+        )
+        assert await cache.get(bible, VerseRange.from_string('John 3:16-17')) is None
+        assert cache.hits == 2
+        assert cache.misses == 2
+
+    @pytest.mark.asyncio
+    async def test_keyed_by_service_version(self, MockBible: type[Any]) -> None:
+        cache = PassageCache()
+        bible1 = MockBible('bib', 'The Bible', 'BIB', 'MyService', 'service-BIB')
+        bible2 = MockBible('bib2', 'The Bible 2', 'BIB', 'MyService', 'service-BIB2')
+
+        await cache.set(bible1, VerseRange.from_string('John 3:16'), 'For God')
+
+        assert await cache.get(bible2, VerseRange.from_string('John 3:16')) is None
+
+    @pytest.mark.asyncio
+    async def test_purge(self, MockBible: type[Any]) -> None:
+        cache = PassageCache()
+        bible = MockBible('bib', 'The Bible', 'BIB', 'MyService', 'service-BIB')
+
+        await cache.set(bible, VerseRange.from_string('John 3:16'), 'For God')
+
+        assert await cache.purge() == 1
+        assert await cache.get(bible, VerseRange.from_string('John 3:16')) is None
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import pytest
+
+from erasmus.confession_corpus import ConfessionCorpus
+from erasmus.db.confession import (
+    Confession,
+    ConfessionNumberingType,
+    ConfessionType,
+    ConfessionTypeEnum,
+    NumberingTypeEnum,
+)
+from erasmus.exceptions import InvalidConfessionError, NoSectionError, NoSectionsError
+
+
+def make_record(
+    id: int,
+    command: str,
+    type: ConfessionTypeEnum,
+    numbering: NumberingTypeEnum = NumberingTypeEnum.ARABIC,
+) -> Confession:
+    record = Confession(id=id, command=command, name=command.upper())
+    record.type = ConfessionType(value=type)
+    record.numbering = ConfessionNumberingType(numbering=numbering)
+
+    return record
+
+
+class TestConfessionCorpus(object):
+    @pytest.fixture
+    def corpus(self) -> ConfessionCorpus:
+        return ConfessionCorpus.from_rows(
+            'abc123',
+            [
+                make_record(1, 'wcf', ConfessionTypeEnum.CHAPTERS),
+                make_record(2, 'hc', ConfessionTypeEnum.QA, NumberingTypeEnum.ROMAN),
+                make_record(3, 'bc', ConfessionTypeEnum.ARTICLES),
+            ],
+            [(1, 1, 'Of the Holy Scripture'), (1, 2, 'Of God'), (4, 1, 'Orphan')],
+            [
+                (1, 1, 1, 'Although the light of nature...'),
+                (1, 1, 2, 'Under the name of Holy Scripture...'),
+                (1, 2, 1, 'There is but one only...'),
+                (1, 3, 1, 'No chapter'),
+            ],
+            [(2, 1, 'What is your only comfort?', 'That I am not my own...')],
+            [(3, 1, 'There is only one God', 'We all believe...')],
+        )
+
+    @pytest.mark.asyncio
+    async def test_get_by_command(self, corpus: ConfessionCorpus) -> None:
+        confession = await corpus.get_by_command('WCF')
+
+        assert confession.id == 1
+        assert confession.command == 'wcf'
+        assert confession.name == 'WCF'
+        assert confession.type == ConfessionTypeEnum.CHAPTERS
+        assert confession.numbering == NumberingTypeEnum.ARABIC
+
+        with pytest.raises(InvalidConfessionError):
+            await corpus.get_by_command('lbcf')
+
+    @pytest.mark.asyncio
+    async def test_get_all(self, corpus: ConfessionCorpus) -> None:
+        assert len(corpus) == 3
+        assert [confession.command async for confession in corpus.get_all()] == [
+            'bc',
+            'hc',
+            'wcf',
+        ]
+
+    @pytest.mark.asyncio
+    async def test_chapters(self, corpus: ConfessionCorpus) -> None:
+        confession = await corpus.get_by_command('wcf')
+
+        assert [
+            (chapter.chapter_number, chapter.chapter_title)
+            async for chapter in confession.get_chapters()
+        ] == [(1, 'Of the Holy Scripture'), (2, 'Of God')]
+
+        paragraph = await confession.get_paragraph(1, 2)
+        assert paragraph.paragraph_number == 2
+        assert paragraph.text == 'Under the name of Holy Scripture...'
+        assert paragraph.chapter.chapter_title == 'Of the Holy Scripture'
+
+        with pytest.raises(NoSectionError):
+            await confession.get_paragraph(3, 1)
+
+        with pytest.raises(NoSectionsError):
+            async for _ in (await corpus.get_by_command('hc')).get_chapters():
+                pass
+
+    @pytest.mark.asyncio
+    async def test_questions(self, corpus: ConfessionCorpus) -> None:
+        confession = await corpus.get_by_command('hc')
+
+        assert confession.numbering == NumberingTypeEnum.ROMAN
+        assert await confession.get_question_count() == 1
+        assert (await confession.get_question(1)).answer_text == (
+            'That I am not my own...'
+        )
+
+        with pytest.raises(NoSectionError):
+            await confession.get_question(2)
+
+    @pytest.mark.asyncio
+    async def test_articles(self, corpus: ConfessionCorpus) -> None:
+        confession = await corpus.get_by_command('bc')
+
+        assert [article.title async for article in confession.get_articles()] == [
+            'There is only one God'
+        ]
+        assert (await confession.get_article(1)).text == 'We all believe...'
+
+        with pytest.raises(NoSectionError):
+            await confession.get_article(2)
+
+    def test_get_stats(self, corpus: ConfessionCorpus) -> None:
+        stats = corpus.get_stats()
+
+        assert stats['schema version'] == 'abc123'
+        assert stats['confessions'] == 3
+        assert stats['chapters'] == 2
+        assert stats['paragraphs'] == 3
+        assert stats['questions'] == 1
+        assert stats['articles'] == 1
+        assert stats['memory usage'] == corpus.get_memory_usage()
+        assert corpus.get_memory_usage() > len('Although the light of nature...')
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import aiohttp
+import pytest
+import pytest_mock
+from aiohttp.tracing import Trace
+from yarl import URL
+
+from erasmus.connection_pool import ConnectionPool
+
+
+class TestConnectionPool(object):
+    def test_from_config(self) -> None:
+        assert ConnectionPool.from_config(None) is None
+        assert ConnectionPool.from_config(
+            {'limit': 5, 'limit_per_host': 2, 'ttl_dns_cache': 300, 'warm_timeout': 2},
+            ['https://a/'],
+        ) == ConnectionPool(
+            limit=5,
+            limit_per_host=2,
+            ttl_dns_cache=300,
+            warm_timeout=2,
+            urls=('https://a/',),
+        )
+
+    # The connector's trace signals are sent the way aiohttp sends them, so the
+    # tests don't open any connections
+    @pytest.mark.asyncio
+    async def test_traces(self, mocker: pytest_mock.MockerFixture) -> None:
+        ClientSession = mocker.patch('aiohttp.ClientSession')
+        TCPConnector = mocker.patch('aiohttp.TCPConnector')
+        pool = ConnectionPool(limit=1, ttl_dns_cache=0)
+
+        assert pool.create_session() is ClientSession.return_value
+        TCPConnector.assert_called_once_with(
+            limit=1,
+            limit_per_host=0,
+            keepalive_timeout=15,
+            use_dns_cache=False,
+            ttl_dns_cache=0,
+        )
+
+        (trace_config,) = ClientSession.call_args.kwargs['trace_configs']
+        trace_config.freeze()
+        trace = Trace(
+            ClientSession.return_value, trace_config, trace_config.trace_config_ctx()
+        )
+
+        await trace.send_connection_create_start()
+        await trace.send_connection_create_end()
+        await trace.send_connection_queued_start()
+        await asyncio.sleep(0.05)
+        await trace.send_connection_queued_end()
+
+        stats = pool.get_stats('Test')
+
+        assert stats['Test connections opened'] == 1
+        assert stats['Test pool waits'] == 1
+        assert stats['Test pool wait ms'] >= 40
+        assert stats['Test pool max wait ms'] == stats['Test pool wait ms']
+
+    @pytest.mark.asyncio
+    async def test_warm(self, mock_client_session: Any, mock_response: Any) -> None:
+        mock_client_session.head.return_value = mock_response
+        pool = ConnectionPool(
+            warm_connections=2,
+            warm_timeout=2,
+            urls=('https://a/path?query=1', 'https://b:8443/'),
+        )
+        pool.session = mock_client_session
+
+        await pool.warm()
+
+        assert [call.args[0] for call in mock_client_session.head.call_args_list] == [
+            URL('https://a/'),
+            URL('https://a/'),
+            URL('https://b:8443/'),
+            URL('https://b:8443/'),
+        ]
+        assert mock_client_session.head.call_args.kwargs == {
+            'allow_redirects': False,
+            'timeout': aiohttp.ClientTimeout(total=2),
+        }
+
+    @pytest.mark.asyncio
+    async def test_warm_unreachable(self, mock_client_session: Any) -> None:
+        mock_client_session.head.side_effect = [
+            aiohttp.ClientConnectionError(),
+            asyncio.TimeoutError(),
+        ]
+        pool = ConnectionPool(urls=('https://a/', 'https://b/'))
+        pool.session = mock_client_session
+
+        await pool.warm()
+
+        assert mock_client_session.head.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_close(self) -> None:
+        pool = ConnectionPool()
+        session = pool.create_session()
+
+        await pool.close()
+
+        assert session.closed
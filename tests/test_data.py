@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+import re
 from typing import Any
 
 import pytest
 
-from erasmus.data import Passage, SearchResults, Verse, VerseRange
+from erasmus import data
+from erasmus.data import (
+    Passage,
+    SearchResults,
+    Verse,
+    VerseRange,
+    may_contain_reference,
+)
 from erasmus.exceptions import ReferenceNotUnderstoodError
 
 
@@ -275,6 +283,102 @@ class TestVerseRange(object):
             VerseRange.from_string(passage_str)
 
 
+@pytest.mark.parametrize(
+    'string,only_bracketed,expected',
+    [
+        ('hello everyone', False, False),
+        ('meet at 10:30', False, True),
+        ('meet at 10:30', True, False),
+        ('ratio is 3 : 1', False, True),
+        ('see [John] later', True, False),
+        ('[John 3:16]', True, True),
+        ('John 3:16', False, True),
+        ('John 3:16', True, False),
+        ('<:emoji:123456>', False, False),
+    ],
+)
+def test_may_contain_reference(
+    string: str, only_bracketed: bool, expected: bool
+) -> None:
+    assert may_contain_reference(string, only_bracketed=only_bracketed) == expected
+
+
+class TestBookPattern(object):
+    @pytest.fixture(scope='class')
+    def trie_pattern(self) -> str:
+        return data._get_trie_pattern(data._book_names)
+
+    @pytest.fixture(scope='class')
+    def alternation_pattern(self) -> str:
+        # The flat alternation the trie replaced, kept as the reference implementation
+        names = list(dict.fromkeys(data._book_names))
+        return '(?:' + '|'.join(re.escape(name) for name in names) + ')'
+
+    @pytest.fixture(scope='class')
+    def strings(self) -> list[str]:
+        strings: list[str] = []
+
+        for name in data._book_names:
+            strings += [
+                name,
+                f'{name}.',
+                name.upper(),
+                name.lower(),
+                name[:-1],
+                f'{name}x',
+                f'{name} 1:1',
+                f'{name}. 12 : 3-4 ESV',
+                f'[{name} 3:16\u20134:2 NASB]',
+                f'[ {name.lower()} 119:1-176 ]',
+                f'see {name.upper()} 2:3 and [{name[:-1]} 4:5] or {name} 151 1:2',
+            ]
+
+        return strings
+
+    def test_book_language(
+        self, trie_pattern: str, alternation_pattern: str, strings: list[str]
+    ) -> None:
+        trie_re = re.compile(trie_pattern, re.IGNORECASE)
+        alternation_re = re.compile(alternation_pattern, re.IGNORECASE)
+
+        for string in strings:
+            assert (trie_re.fullmatch(string) is None) == (
+                alternation_re.fullmatch(string) is None
+            ), string
+
+    @pytest.mark.parametrize(
+        'name',
+        [
+            '_reference_re',
+            '_reference_with_version_re',
+            '_reference_or_bracketed_with_version_re',
+            '_bracketed_reference_with_version_re',
+            '_search_reference_re',
+        ],
+    )
+    def test_reference_matches(
+        self,
+        name: str,
+        trie_pattern: str,
+        alternation_pattern: str,
+        strings: list[str],
+    ) -> None:
+        trie_re: re.Pattern[str] = getattr(data, name)
+        assert trie_pattern in trie_re.pattern
+
+        alternation_re = re.compile(
+            trie_re.pattern.replace(trie_pattern, alternation_pattern), trie_re.flags
+        )
+
+        for string in strings:
+            assert [
+                (match.span(), match.groupdict()) for match in trie_re.finditer(string)
+            ] == [
+                (match.span(), match.groupdict())
+                for match in alternation_re.finditer(string)
+            ], string
+
+
 class TestPassage(object):
     def test_init(self) -> None:
         text = 'foo bar baz'
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+import pytest_mock
+from yarl import URL
+
+from erasmus.fums import FumsReporter
+
+
+# Stands in for the FUMS server: a report's query can delay the response, and fail
+# it with a 503 that many times for its key
+@pytest.fixture
+def session(mocker: pytest_mock.MockerFixture) -> MagicMock:
+    failures: dict[str, int] = {}
+
+    def get(url: str, /, **kwargs: Any) -> MagicMock:
+        query = URL(url).query
+        key = query.get('key', '')
+        failures[key] = failures.get(key, 0) + 1
+        response: MagicMock = mocker.MagicMock()
+        response.status = 503 if failures[key] <= int(query.get('fail', 0)) else 200
+        response.read = mocker.AsyncMock(return_value=b'ok')
+
+        async def enter() -> MagicMock:
+            await asyncio.sleep(float(query.get('delay', 0)))
+            return response
+
+        response.__aenter__.side_effect = enter
+
+        return response
+
+    session: MagicMock = mocker.MagicMock()
+    session.get = mocker.Mock(side_effect=get)
+
+    return session
+
+
+class TestFumsReporter(object):
+    def test_from_config(self, mocker: pytest_mock.MockerFixture) -> None:
+        session = mocker.sentinel.session
+
+        assert FumsReporter.from_config(session, None) == FumsReporter(session)
+        assert FumsReporter.from_config(
+            session, {'max_queue': 10, 'retries': 0}
+        ) == FumsReporter(session, max_queue=10, retries=0)
+
+    @pytest.mark.asyncio
+    async def test_report(self, session: MagicMock) -> None:
+        reporter = FumsReporter(session, retry_delay=0.01)
+        reporter.report('https://fums.example/?key=a')
+        reporter.report('https://fums.example/?key=b&fail=1')
+        reporter.report('https://fums.example/?key=c&fail=5')
+
+        assert reporter.get_stats()['fums queue depth'] == 3
+
+        await reporter.close()
+
+        stats = reporter.get_stats()
+
+        assert stats['fums queue depth'] == 0
+        assert stats['fums sent'] == 2
+        assert stats['fums failed'] == 1
+        assert stats['fums dropped'] == 0
+        # The failing reports are retried twice each
+        assert session.get.call_count == 6
+
+    @pytest.mark.asyncio
+    async def test_dropped(self, session: MagicMock) -> None:
+        reporter = FumsReporter(session, max_queue=2, concurrency=1)
+
+        for _ in range(5):
+            reporter.report('https://fums.example/')
+
+        await reporter.close()
+
+        stats = reporter.get_stats()
+
+        assert stats['fums sent'] == 2
+        assert stats['fums dropped'] == 3
+
+    @pytest.mark.asyncio
+    async def test_close_timeout(self, session: MagicMock) -> None:
+        reporter = FumsReporter(session, timeout=0.05)
+        reporter.report('https://fums.example/?delay=1')
+
+        await reporter.close()
+
+        assert reporter.get_stats()['fums sent'] == 0
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import pytest
+
+from erasmus.latency import AdaptiveTimeouts, LatencyHistogram
+
+
+class TestLatencyHistogram(object):
+    def test_get_quantile(self) -> None:
+        histogram = LatencyHistogram()
+
+        for index in range(100):
+            histogram.add(0.1 if index < 90 else 2.0)
+
+        assert histogram.get_quantile(0.5) == pytest.approx(0.1, rel=0.25)
+        assert histogram.get_quantile(0.9) == pytest.approx(0.1, rel=0.25)
+        assert histogram.get_quantile(0.99) == pytest.approx(2.0, rel=0.25)
+        assert histogram.get_quantile(0.99) >= 2.0
+
+    def test_decay(self) -> None:
+        histogram = LatencyHistogram(max_count=100)
+
+        for _ in range(99):
+            histogram.add(5.0)
+
+        assert histogram.get_quantile(0.5) >= 5.0
+
+        # The old samples are halved, so newer ones soon dominate
+        for _ in range(150):
+            histogram.add(0.05)
+
+        assert histogram.count < 100
+        assert histogram.get_quantile(0.5) == pytest.approx(0.05, rel=0.25)
+
+    def test_out_of_range(self) -> None:
+        histogram = LatencyHistogram()
+        histogram.add(1000.0)
+
+        assert histogram.get_quantile(0.99) > 100
+
+
+class TestAdaptiveTimeouts(object):
+    def test_get(self) -> None:
+        timeouts = AdaptiveTimeouts(floor=1.0, ceiling=20.0, min_samples=10)
+
+        for _ in range(9):
+            timeouts.record('ServiceOne', 'lookup', 0.2)
+
+        assert timeouts.get('ServiceOne', 'lookup', 10) == 10
+
+        timeouts.record('ServiceOne', 'lookup', 0.2)
+        assert timeouts.get('ServiceOne', 'lookup', 10) == 1.0
+        assert timeouts.get('ServiceOne', 'search', 10) == 10
+
+        for _ in range(10):
+            timeouts.record('ServiceOne', 'search', 3.0)
+
+        assert 6.0 <= timeouts.get('ServiceOne', 'search', 10) <= 7.5
+
+        for _ in range(10):
+            timeouts.record('ServiceTwo', 'search', 30.0)
+
+        assert timeouts.get('ServiceTwo', 'search', 10) == 20.0
+
+    def test_from_config(self) -> None:
+        timeouts = AdaptiveTimeouts.from_config(
+            {
+                'floor': 1,
+                'ceiling': 5,
+                'min_samples': 1,
+                'services': {'Unbound': {'ceiling': 30}},
+            }
+        )
+
+        timeouts.record('Unbound', 'search', 20.0)
+        timeouts.record('ApiBible', 'search', 20.0)
+
+        assert timeouts.get('Unbound', 'search', 10) == 30
+        assert timeouts.get('ApiBible', 'search', 10) == 5
+
+    def test_get_stats(self) -> None:
+        timeouts = AdaptiveTimeouts(floor=1.0, min_samples=1)
+        timeouts.record('ServiceOne', 'lookup', 0.2)
+
+        stats = timeouts.get_stats(10)
+
+        assert set(stats) == {
+            'ServiceOne lookup p99 ms',
+            'ServiceOne lookup timeout ms',
+        }
+        assert 200 <= stats['ServiceOne lookup p99 ms'] <= 250
+        assert stats['ServiceOne lookup timeout ms'] == 1000
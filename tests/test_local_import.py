@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from erasmus.local_import import get_records, parse_osis, parse_usfm
+
+_osis_container = '''<?xml version="1.0" encoding="UTF-8"?>
+<osis xmlns="http://www.bibletechnologies.net/2003/OSIS/namespace">
+  <osisText osisIDWork="TEST">
+    <header><work osisWork="TEST"><title>Test Bible</title></work></header>
+    <div type="book" osisID="John">
+      <chapter osisID="John.3">
+        <title>For God So Loved the World</title>
+        <verse osisID="John.3.16">For God so loved<note>Or only</note> the world,
+          that he gave his <transChange type="added">only</transChange> Son</verse>
+        <verse osisID="John.3.17 John.3.18">For God did not send his Son</verse>
+      </chapter>
+    </div>
+  </osisText>
+</osis>
+'''
+
+_osis_milestones = '''<osis>
+  <osisText>
+    <div type="book" osisID="Ps">
+      <chapter sID="Ps.23" osisID="Ps.23"/>
+      <title type="psalm" canonical="true">A Psalm of David.</title>
+      <lg>
+        <l><verse sID="Ps.23.1" osisID="Ps.23.1"/>The <divineName>Lord</divineName>
+          is my shepherd;</l>
+        <l>I shall not want.<verse eID="Ps.23.1"/></l>
+        <l><verse sID="Ps.23.2" osisID="Ps.23.2"/>He makes me lie down</l>
+        <verse eID="Ps.23.2"/>
+      </lg>
+      <chapter eID="Ps.23"/>
+    </div>
+  </osisText>
+</osis>
+'''
+
+_usfm = r'''\id JHN Test Bible
+\h John
+\toc1 The Gospel According to John
+\mt1 John
+\c 3
+\s1 For God So Loved the World
+\p
+\v 16 For God so loved\f + \fr 3:16 \ft Or \fq only\f* the world,
+\q1 that he gave his \add only\add* \w Son|strong="G5207"\w*
+\v 17-18 For God did not send his Son
+\c 4
+\p
+\v 1 Now when Jesus learned
+'''
+
+
+def test_parse_osis_container() -> None:
+    assert list(parse_osis(_osis_container)) == [
+        (43, 3, 16, 'For God so loved the world, that he gave his only Son'),
+        (43, 3, 17, 'For God did not send his Son'),
+    ]
+
+
+def test_parse_osis_milestones() -> None:
+    assert list(parse_osis(_osis_milestones)) == [
+        (19, 23, 1, 'The Lord is my shepherd; I shall not want.'),
+        (19, 23, 2, 'He makes me lie down'),
+    ]
+
+
+def test_parse_usfm() -> None:
+    assert list(parse_usfm(_usfm)) == [
+        (43, 3, 16, 'For God so loved the world, that he gave his only Son'),
+        (43, 3, 17, 'For God did not send his Son'),
+        (43, 4, 1, 'Now when Jesus learned'),
+    ]
+
+
+def test_get_records(tmp_path: Path) -> None:
+    (tmp_path / 'john.usfm').write_text(_usfm)
+    (tmp_path / 'psalms.xml').write_text(_osis_milestones)
+
+    assert get_records('TEST', [tmp_path / 'john.usfm', tmp_path / 'psalms.xml']) == [
+        ('TEST', 19, 23, 1, 'The Lord is my shepherd; I shall not want.'),
+        ('TEST', 19, 23, 2, 'He makes me lie down'),
+        ('TEST', 43, 3, 16, 'For God so loved the world, that he gave his only Son'),
+        ('TEST', 43, 3, 17, 'For God did not send his Son'),
+        ('TEST', 43, 4, 1, 'Now when Jesus learned'),
+    ]
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from erasmus.loop_lag import LoopLagMonitor
+
+
+class TestLoopLagMonitor(object):
+    def test_get_stats(self) -> None:
+        monitor = LoopLagMonitor(max_samples=100)
+
+        assert monitor.get_stats() == {}
+
+        for lag in range(100):
+            monitor.record(lag / 1000)
+
+        assert monitor.get_stats() == {
+            'loop lag mean ms': 49.5,
+            'loop lag p99 ms': 99.0,
+            'loop lag max ms': 99.0,
+        }
+
+        monitor.record(0)
+
+        assert monitor.get_stats()['loop lag mean ms'] == 49.5
+        assert monitor.get_stats()['loop lag max ms'] == 99.0
+
+    @pytest.mark.asyncio
+    async def test_measures_blocking(self) -> None:
+        monitor = LoopLagMonitor(interval=0.01)
+        monitor.start()
+
+        try:
+            await asyncio.sleep(0.005)
+            time.sleep(0.05)
+            await asyncio.sleep(0.02)
+        finally:
+            monitor.stop()
+
+        assert not monitor.running
+        assert monitor.max_lag >= 0.03
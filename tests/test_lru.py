@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import pytest_mock
+
+from erasmus.lru import LRUCache
+
+
+class TestLRUCache(object):
+    def test_get_set(self) -> None:
+        cache: LRUCache[str, int] = LRUCache(max_size=2)
+
+        assert cache.get('one') is None
+        assert cache.get('one', 0) == 0
+
+        cache.set('one', 1)
+        assert cache.get('one') == 1
+        assert cache.hits == 1
+        assert cache.misses == 2
+
+    def test_evicts_least_recently_used(self) -> None:
+        cache: LRUCache[str, int] = LRUCache(max_size=2)
+
+        cache.set('one', 1)
+        cache.set('two', 2)
+        cache.get('one')
+        cache.set('three', 3)
+
+        assert cache.get('two') is None
+        assert cache.get('one') == 1
+        assert cache.get('three') == 3
+        assert cache.evictions == 1
+
+    def test_max_weight(self) -> None:
+        cache: LRUCache[str, str] = LRUCache(max_size=10, max_weight=6, weigher=len)
+
+        cache.set('one', 'abc')
+        cache.set('two', 'def')
+        cache.set('three', 'ghi')
+        cache.set('four', 'too long to cache')
+
+        assert len(cache) == 2
+        assert cache.weight == 6
+        assert cache.get('one') is None
+        assert cache.get('four') is None
+
+    def test_ttl(self, mocker: pytest_mock.MockerFixture) -> None:
+        monotonic = mocker.patch('erasmus.lru.monotonic', return_value=100.0)
+        cache: LRUCache[str, int] = LRUCache(ttl=10)
+
+        cache.set('one', 1)
+        monotonic.return_value = 109.0
+        assert cache.get('one') == 1
+
+        monotonic.return_value = 111.0
+        assert cache.get('one') is None
+        assert len(cache) == 0
+
+    def test_setdefault(self, mocker: pytest_mock.MockerFixture) -> None:
+        monotonic = mocker.patch('erasmus.lru.monotonic', return_value=100.0)
+        cache: LRUCache[str, int | None] = LRUCache(ttl=10)
+
+        assert cache.setdefault('one', 1) == 1
+        assert cache.setdefault('one', 2) == 1
+        cache.set('two', None)
+        assert cache.setdefault('two', 2) is None
+
+        monotonic.return_value = 111.0
+        assert cache.setdefault('one', 3) == 3
+        assert cache.get('one') == 3
+
+    def test_clear(self) -> None:
+        cache: LRUCache[str, int] = LRUCache()
+
+        cache.set('one', 1)
+        cache.set('two', 2)
+
+        assert cache.clear() == 2
+        assert len(cache) == 0
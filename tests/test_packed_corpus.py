@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import struct
+from pathlib import Path
+
+import pytest
+
+from erasmus.packed_corpus import PackedCorpus, get_corpus_path, pack, write
+
+_verses = [
+    (1, 1, 1, 'In the beginning God created the heaven and the earth.'),
+    (1, 1, 2, 'And the earth was without form, and void'),
+    (1, 2, 1, 'Thus the heavens and the earth were finished'),
+    (1, 2, 3, 'And God blessed the seventh day'),
+    (3, 1, 1, 'And the LORD called unto Moses'),
+    (19, 1, 1, 'Blessed is the man'),
+    (19, 119, 1, 'אַשְׁרֵי תְמִימֵי־דָרֶךְ'),
+]
+
+
+class TestPackedCorpus(object):
+    @pytest.fixture
+    def corpus(self, tmp_path: Path) -> PackedCorpus:
+        path = get_corpus_path(tmp_path / 'corpora', 'KJV')
+        write(_verses, path)
+
+        return PackedCorpus.open(path)
+
+    @pytest.mark.parametrize(
+        'book,start,end,expected',
+        [
+            (1, (1, 1), (1, 1), [(1, 1, _verses[0][3])]),
+            (1, (1, 2), (2, 1), [(1, 2, _verses[1][3]), (2, 1, _verses[2][3])]),
+            (1, (2, 1), (2, 99), [(2, 1, _verses[2][3]), (2, 3, _verses[3][3])]),
+            (1, (2, 2), (2, 2), []),
+            (1, (3, 1), (4, 1), []),
+            (2, (1, 1), (1, 10), []),
+            (3, (1, 1), (1, 1), [(1, 1, _verses[4][3])]),
+            (19, (119, 1), (119, 1), [(119, 1, _verses[6][3])]),
+            (20, (1, 1), (1, 1), []),
+            (0, (1, 1), (1, 1), []),
+        ],
+    )
+    def test_get_range(
+        self,
+        corpus: PackedCorpus,
+        book: int,
+        start: tuple[int, int],
+        end: tuple[int, int],
+        expected: list[tuple[int, int, str]],
+    ) -> None:
+        assert corpus.get_range(book, start, end) == expected
+
+    def test_from_bytes(self) -> None:
+        corpus = PackedCorpus.from_bytes(pack(_verses))
+
+        assert corpus.book_count == 19
+        assert corpus.get_range(1, (1, 1), (1, 2)) == [
+            (1, 1, _verses[0][3]),
+            (1, 2, _verses[1][3]),
+        ]
+
+    @pytest.mark.parametrize(
+        'data',
+        [
+            b'',
+            b'NOPE' + bytes(16),
+            b'ERPC' + struct.pack('<4I', 2, 0, 0, 0),
+            pack(_verses)[:40],
+        ],
+    )
+    def test_invalid(self, tmp_path: Path, data: bytes) -> None:
+        path = tmp_path / 'invalid.corpus'
+        path.write_bytes(data)
+
+        with pytest.raises(ValueError):
+            PackedCorpus.open(path)
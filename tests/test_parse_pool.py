@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from erasmus.parse_pool import ParsePool
+
+
+def get_pid(payload: bytes, suffix: bytes, /) -> tuple[bytes, int]:
+    return payload.upper() + suffix, os.getpid()
+
+
+class TestParsePool(object):
+    @pytest.mark.asyncio
+    async def test_disabled(self) -> None:
+        pool = ParsePool()
+
+        assert not pool.enabled
+        assert await pool.run(get_pid, b'a' * 100_000, b'!') == (
+            b'A' * 100_000 + b'!',
+            os.getpid(),
+        )
+        assert pool.inline == 1
+        assert pool.offloaded == 0
+
+    @pytest.mark.asyncio
+    async def test_run(self) -> None:
+        pool = ParsePool(max_workers=1, min_size=10)
+
+        try:
+            assert await pool.run(get_pid, b'abc', b'!') == (b'ABC!', os.getpid())
+
+            text, pid = await pool.run(get_pid, b'abcdefghijkl', b'!')
+            assert text == b'ABCDEFGHIJKL!'
+            assert pid != os.getpid()
+
+            assert pool.get_stats() == {
+                'parse workers': 1,
+                'parses offloaded': 1,
+                'parses inline': 1,
+            }
+        finally:
+            pool.close()
+
+    def test_from_config(self) -> None:
+        assert ParsePool.from_config(None) == ParsePool()
+        assert ParsePool.from_config({'max_workers': 3, 'min_size': 10}) == ParsePool(
+            max_workers=3, min_size=10
+        )
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from erasmus.search_index import FORMAT_VERSION, Ranking, SearchIndex, get_index_path
+
+_verses = [
+    (43, 1, 1, 'In the beginning was the Word, and the Word was with God'),
+    (1, 1, 1, 'In the beginning God created the heaven and the earth.'),
+    (1, 1, 2, 'And the earth was without form, and void'),
+    (1, 1, 3, 'And God said, Let there be light: and there was light.'),
+    (19, 23, 1, 'The LORD is my shepherd; I shall not want.'),
+]
+
+Ref = tuple[int, int, int]
+
+
+def get_refs(
+    index: SearchIndex, terms: list[str], /, *, ranking: Ranking = 'canonical'
+) -> list[Ref]:
+    rows, _ = index.search(terms, limit=20, ranking=ranking)
+    return [(book, chapter, verse) for book, chapter, verse, _ in rows]
+
+
+class TestSearchIndex(object):
+    @pytest.fixture
+    def index(self) -> SearchIndex:
+        return SearchIndex.build(_verses)
+
+    @pytest.mark.parametrize(
+        'terms,expected',
+        [
+            (['god'], [(1, 1, 1), (1, 1, 3), (43, 1, 1)]),
+            (['God', 'earth'], [(1, 1, 1)]),
+            (['in the beginning'], [(1, 1, 1), (43, 1, 1)]),
+            (['beginning god'], [(1, 1, 1)]),
+            (['god the'], []),
+            (['beginning was'], [(43, 1, 1)]),
+            (['sh*'], [(19, 23, 1)]),
+            (['light*', 'and'], [(1, 1, 3)]),
+            (['lamb'], []),
+            (['...'], []),
+        ],
+    )
+    def test_search(
+        self, index: SearchIndex, terms: list[str], expected: list[Ref]
+    ) -> None:
+        assert get_refs(index, terms) == expected
+
+    def test_bm25(self, index: SearchIndex) -> None:
+        assert get_refs(index, ['light', 'and'], ranking='bm25') == [(1, 1, 3)]
+        # The shorter verse ranks first
+        assert get_refs(index, ['earth'], ranking='bm25') == [(1, 1, 2), (1, 1, 1)]
+        assert get_refs(index, ['earth']) == [(1, 1, 1), (1, 1, 2)]
+
+    def test_offset_limit(self, index: SearchIndex) -> None:
+        rows, total = index.search(['the'], limit=2, offset=1)
+
+        assert total == 4
+        assert [row[:3] for row in rows] == [(1, 1, 2), (19, 23, 1)]
+        assert index.search(['the'], limit=2, offset=10) == ([], 4)
+
+    def test_save_load(self, index: SearchIndex, tmp_path: Path) -> None:
+        path = get_index_path(tmp_path / 'indexes', 'KJV')
+        index.save(path)
+        loaded = SearchIndex.load(path)
+
+        assert len(loaded) == len(index)
+        assert loaded.search(['in the beginning'], limit=1) == index.search(
+            ['in the beginning'], limit=1
+        )
+
+    def test_load_old_format(
+        self, index: SearchIndex, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        path = tmp_path / 'KJV.idx'
+        monkeypatch.setattr('erasmus.search_index.FORMAT_VERSION', FORMAT_VERSION - 1)
+        index.save(path)
+        monkeypatch.undo()
+
+        with pytest.raises(ValueError):
+            SearchIndex.load(path)
+
+    @pytest.mark.parametrize(
+        'size,suffix',
+        [(0, b''), (4, b''), (16, b''), (60, b''), (-1, b''), (None, b'\0')],
+    )
+    def test_invalid(
+        self, index: SearchIndex, tmp_path: Path, size: int | None, suffix: bytes
+    ) -> None:
+        path = tmp_path / 'KJV.idx'
+        index.save(path)
+        path.write_bytes(path.read_bytes()[:size] + suffix)
+
+        with pytest.raises(ValueError):
+            SearchIndex.load(path)
+
+    def test_invalid_magic(self, index: SearchIndex, tmp_path: Path) -> None:
+        path = tmp_path / 'KJV.idx'
+        index.save(path)
+        path.write_bytes(b'NOPE' + path.read_bytes()[4:])
+
+        with pytest.raises(ValueError):
+            SearchIndex.load(path)
+
+    def test_empty(self) -> None:
+        assert SearchIndex.build([]).search(['god'], limit=10) == ([], 0)
@@ -7,22 +7,67 @@ import aiohttp
 import pytest
 import pytest_mock
 
+from erasmus.backend_health import BackendHealth
+from erasmus.cache import PassageCache
+from erasmus.connection_pool import ConnectionPool
 from erasmus.data import Passage, SearchResults, VerseRange
-from erasmus.exceptions import ServiceLookupTimeout, ServiceSearchTimeout
+from erasmus.exceptions import (
+    ChaptersNotSupportedError,
+    DoNotUnderstandError,
+    ServiceLookupTimeout,
+    ServiceSearchTimeout,
+)
+from erasmus.latency import AdaptiveTimeouts
 from erasmus.protocols import Bible, Service
 from erasmus.service_manager import ServiceManager
+from erasmus.services.tokens import Chapter, Text, Token, VerseNumber
 
 
 class MockService(object):
-    __slots__ = 'get_passage', 'search'
+    __slots__ = (
+        'prepare',
+        'close',
+        'get_stats',
+        'get_passage',
+        'get_passages',
+        'supports_batch',
+        'supports_chapters',
+        'get_chapter',
+        'search',
+    )
 
     def __init__(self, mocker: pytest_mock.MockerFixture) -> None:
+        self.prepare = mocker.AsyncMock()
+        self.close = mocker.AsyncMock()
+        self.get_stats = mocker.Mock(return_value={})
         self.get_passage = mocker.AsyncMock()
+        self.get_passages = mocker.AsyncMock()
+        self.supports_batch = mocker.Mock(return_value=False)
+        self.supports_chapters = mocker.Mock(return_value=False)
+        self.get_chapter = mocker.AsyncMock()
         self.search = mocker.AsyncMock()
 
 
+def make_chapter(number: int, verses: int) -> Chapter:
+    tokens: list[Token] = []
+
+    for verse in range(1, verses + 1):
+        tokens += (VerseNumber(str(verse)), Text(f' {number}:{verse} '))
+
+    return Chapter.from_tokens(tokens)
+
+
 class MockBible(object):
-    __slots__ = 'command', 'name', 'abbr', 'service', 'service_version', 'rtl', 'books'
+    __slots__ = (
+        'command',
+        'name',
+        'abbr',
+        'service',
+        'service_version',
+        'rtl',
+        'books',
+        'fallbacks',
+    )
 
     def __init__(
         self,
@@ -33,6 +78,7 @@ class MockBible(object):
         service: str,
         service_version: str,
         rtl: bool | None = False,
+        fallbacks: list[list[str]] | None = None,
     ) -> None:
         self.command = command
         self.name = name
@@ -41,6 +87,7 @@ class MockBible(object):
         self.service_version = service_version
         self.rtl = rtl
         self.books = 1
+        self.fallbacks = fallbacks or []
 
 
 class TestServiceManager(object):
@@ -98,14 +145,74 @@ class TestServiceManager(object):
         manager = ServiceManager.from_config(config, mock_client_session)
 
         services['ServiceOne'].assert_called_once_with(
-            config=None, session=mock_client_session
+            config=None, session=mock_client_session, parse_pool=manager.parse_pool
         )
         services['ServiceTwo'].assert_called_once_with(
-            config=config['services']['ServiceTwo'], session=mock_client_session
+            config=config['services']['ServiceTwo'],
+            session=mock_client_session,
+            parse_pool=manager.parse_pool,
         )
         assert manager.service_map['ServiceOne'] == mocker.sentinel.SERVICE_ONE
         assert manager.service_map['ServiceTwo'] == mocker.sentinel.SERVICE_TWO
 
+    @pytest.mark.asyncio
+    async def test_from_config_connections(
+        self,
+        mocker: pytest_mock.MockerFixture,
+        services: dict[str, Any],
+        mock_client_session: aiohttp.ClientSession,
+    ) -> None:
+        services['ServiceOne'].return_value = MockService(mocker)
+        services['ServiceTwo'].return_value = MockService(mocker)
+        services['ServiceTwo'].upstream_urls = ('https://two.example/',)
+        manager = ServiceManager.from_config(
+            {'services': {'ServiceTwo': {'connections': {'limit_per_host': 4}}}},
+            mock_client_session,
+        )
+        pool = manager.pools['ServiceTwo']
+        warm = mocker.patch.object(ConnectionPool, 'warm', mocker.AsyncMock())
+
+        try:
+            assert list(manager.pools) == ['ServiceTwo']
+            assert pool.limit_per_host == 4
+            assert pool.urls == ('https://two.example/',)
+            assert services['ServiceTwo'].call_args.kwargs['session'] is pool.session
+            assert pool.session is not mock_client_session
+            assert manager.get_stats()['ServiceTwo pool waits'] == 0
+
+            await manager.prepare([])
+
+            warm.assert_awaited_once_with()
+        finally:
+            assert pool.session is not None
+            await pool.session.close()
+
+    @pytest.mark.asyncio
+    async def test_close(
+        self,
+        mocker: pytest_mock.MockerFixture,
+        services: dict[str, Any],
+        mock_client_session: aiohttp.ClientSession,
+    ) -> None:
+        services['ServiceOne'].return_value = MockService(mocker)
+        services['ServiceTwo'].return_value = service_two = MockService(mocker)
+        services['ServiceTwo'].upstream_urls = ()
+        manager = ServiceManager.from_config(
+            {'services': {'ServiceTwo': {'connections': {}}}}, mock_client_session
+        )
+        session = manager.pools['ServiceTwo'].session
+        assert session is not None
+
+        # The session must still be open while the service is closing
+        def assert_open() -> None:
+            assert session is not None and not session.closed
+
+        service_two.close.side_effect = assert_open
+        await asyncio.gather(manager.close(), manager.close())
+
+        service_two.close.assert_awaited_once_with()
+        assert session.closed
+
     def test_container_methods(
         self, config: Any, mock_client_session: aiohttp.ClientSession
     ) -> None:
@@ -116,6 +223,28 @@ class TestServiceManager(object):
         assert '__all__' not in manager
         assert len(manager) == 2
 
+    @pytest.mark.asyncio
+    async def test_prepare(
+        self,
+        bible1: Bible,
+        bible2: Bible,
+        service_one: MockService,
+        service_two: MockService,
+    ) -> None:
+        manager = ServiceManager({'ServiceOne': service_one, 'ServiceTwo': service_two})
+        bible3 = MockBible(
+            command='bible3',
+            name='Bible 3',
+            abbr='BIB3',
+            service='ServiceThree',
+            service_version='service-BIB3',
+        )
+
+        await manager.prepare([bible1, bible2, bible3])
+
+        service_one.prepare.assert_awaited_once_with([bible1])
+        service_two.prepare.assert_awaited_once_with([bible2])
+
     @pytest.mark.asyncio
     async def test_get_passage(
         self,
@@ -141,6 +270,402 @@ class TestServiceManager(object):
             bible2, VerseRange.from_string('Genesis 1:2')
         )
 
+    @pytest.mark.asyncio
+    async def test_get_passages(
+        self,
+        bible1: Bible,
+        service_one: MockService,
+        mocker: pytest_mock.MockerFixture,
+    ) -> None:
+        manager = ServiceManager({'ServiceOne': service_one})
+        ranges = [
+            VerseRange.from_string('Genesis 1:2'),
+            VerseRange.from_string('Genesis 50:30'),
+            VerseRange.from_string('Exodus 1:1'),
+        ]
+        error = DoNotUnderstandError()
+        service_one.supports_batch.return_value = True
+        service_one.get_passages.return_value = [
+            Passage('one', ranges[0]),
+            error,
+            RuntimeError('failed'),
+        ]
+        service_one.get_passage.return_value = Passage('three', ranges[2])
+
+        assert await manager.get_passages(bible1, ranges) == [
+            Passage('one', ranges[0], 'BIB1'),
+            error,
+            Passage('three', ranges[2], 'BIB1'),
+        ]
+        service_one.get_passages.assert_awaited_once_with(
+            bible1, ranges, semaphore=mocker.ANY
+        )
+        # Only the range that failed for another reason is retried on its own
+        service_one.get_passage.assert_awaited_once_with(bible1, ranges[2])
+        # The batch's latency is kept apart from single lookups
+        assert 'ServiceOne batch lookup timeout ms' in manager.timeouts.get_stats(10)
+        assert manager.health.get_hedge_delay(('ServiceOne', 'service-BIB1')) == 2.0
+
+        service_one.get_passages.reset_mock()
+        service_one.get_passage.reset_mock()
+        service_one.get_passage.return_value = Passage('two', ranges[1])
+
+        # The cached passages aren't fetched again, leaving one to get on its own
+        assert await manager.get_passages(bible1, ranges) == [
+            Passage('one', ranges[0], 'BIB1'),
+            Passage('two', ranges[1], 'BIB1'),
+            Passage('three', ranges[2], 'BIB1'),
+        ]
+        service_one.get_passages.assert_not_awaited()
+        service_one.get_passage.assert_awaited_once_with(bible1, ranges[1])
+
+    @pytest.mark.asyncio
+    async def test_get_passages_without_batch(
+        self,
+        bible1: Bible,
+        service_one: MockService,
+        mocker: pytest_mock.MockerFixture,
+    ) -> None:
+        manager = ServiceManager({'ServiceOne': service_one})
+        ranges = [VerseRange.from_string(f'Genesis 1:{verse}') for verse in (1, 2, 3)]
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def get_passage(bible: Bible, verses: VerseRange, /) -> Passage:
+            started.set()
+            await release.wait()
+            return Passage(str(verses), verses)
+
+        service_one.get_passage.side_effect = get_passage
+
+        # Services that can't batch look up each range on its own
+        lookup = asyncio.ensure_future(manager.get_passage(bible1, ranges[0]))
+        await started.wait()
+        passages = asyncio.ensure_future(manager.get_passages(bible1, ranges))
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await passages == [
+            Passage(str(verses), verses, 'BIB1') for verses in ranges
+        ]
+        assert (await lookup).range == ranges[0]
+        service_one.get_passages.assert_not_awaited()
+        # The range already being fetched joins that fetch
+        assert service_one.get_passage.await_args_list == [
+            mocker.call(bible1, verses) for verses in ranges
+        ]
+
+        # Ranges already being fetched are left out of a batch
+        service_one.supports_batch.return_value = True
+        service_one.get_passage.reset_mock()
+        await manager.cache.purge()
+        started.clear()
+        release.clear()
+
+        lookup = asyncio.ensure_future(manager.get_passage(bible1, ranges[0]))
+        await started.wait()
+        service_one.get_passages.return_value = [
+            Passage(str(verses), verses) for verses in ranges[1:]
+        ]
+        passages = asyncio.ensure_future(manager.get_passages(bible1, ranges))
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await passages == [
+            Passage(str(verses), verses, 'BIB1') for verses in ranges
+        ]
+        service_one.get_passages.assert_awaited_once_with(
+            bible1, ranges[1:], semaphore=mocker.ANY
+        )
+        service_one.get_passage.assert_awaited_once_with(bible1, ranges[0])
+        await lookup
+
+    @pytest.mark.asyncio
+    async def test_get_passages_semaphore(
+        self,
+        bible1: Bible,
+        service_one: MockService,
+    ) -> None:
+        manager = ServiceManager({'ServiceOne': service_one})
+        semaphore = asyncio.Semaphore(1)
+        running = 0
+        most_running = 0
+
+        async def get_passage(bible: Bible, verses: VerseRange, /) -> Passage:
+            nonlocal running, most_running
+            running += 1
+            most_running = max(most_running, running)
+            await asyncio.sleep(0)
+            running -= 1
+            return Passage('text', verses)
+
+        service_one.get_passage.side_effect = get_passage
+
+        # Calls sharing a semaphore take turns
+        await asyncio.gather(
+            *(
+                manager.get_passages(
+                    bible1,
+                    [VerseRange.from_string(f'Genesis 1:{verse}')],
+                    semaphore=semaphore,
+                )
+                for verse in range(1, 4)
+            )
+        )
+
+        assert most_running == 1
+        assert service_one.get_passage.await_count == 3
+
+    @pytest.fixture
+    def fallback_bible(self) -> Bible:
+        return MockBible(
+            command='bible1',
+            name='Bible 1',
+            abbr='BIB1',
+            service='ServiceOne',
+            service_version='service-BIB1',
+            fallbacks=[['ServiceThree', 'three-BIB1'], ['ServiceTwo', 'two-BIB1']],
+        )
+
+    @pytest.mark.asyncio
+    async def test_get_passage_hedged(
+        self,
+        fallback_bible: Bible,
+        service_one: MockService,
+        service_two: MockService,
+    ) -> None:
+        async def slow_get_passage(bible: Bible, verses: VerseRange) -> Passage:
+            await asyncio.sleep(1)
+            return Passage('slow', verses)
+
+        manager = ServiceManager(
+            {'ServiceOne': service_one, 'ServiceTwo': service_two},
+            health=BackendHealth(default_delay=0.01),
+        )
+        verses = VerseRange.from_string('Genesis 1:2')
+        service_one.get_passage.side_effect = slow_get_passage
+        service_two.get_passage.return_value = Passage('fast', verses)
+
+        assert await manager.get_passage(fallback_bible, verses) == Passage(
+            'fast', verses, 'BIB1'
+        )
+        backend = service_two.get_passage.call_args.args[0]
+        assert (backend.service, backend.service_version, backend.abbr) == (
+            'ServiceTwo',
+            'two-BIB1',
+            'BIB1',
+        )
+        assert manager.hedged == 1
+        assert manager.failed_over == 1
+
+        # The passage is cached for the version, whichever backend returned it
+        assert await manager.cache.get(fallback_bible, verses) == 'fast'
+
+    @pytest.mark.asyncio
+    async def test_get_passage_failover(
+        self,
+        fallback_bible: Bible,
+        service_one: MockService,
+        service_two: MockService,
+    ) -> None:
+        manager = ServiceManager(
+            {'ServiceOne': service_one, 'ServiceTwo': service_two},
+            health=BackendHealth(failure_threshold=1),
+        )
+        service_one.get_passage.side_effect = aiohttp.ClientError
+        service_two.get_passage.return_value = Passage(
+            'blah', VerseRange.from_string('Genesis 1:2')
+        )
+
+        await manager.get_passage(fallback_bible, VerseRange.from_string('Genesis 1:2'))
+        await manager.get_passage(fallback_bible, VerseRange.from_string('Genesis 1:3'))
+
+        # The failing backend is skipped once its circuit is open
+        service_one.get_passage.assert_called_once()
+        assert service_two.get_passage.call_count == 2
+        assert manager.hedged == 0
+        assert manager.failed_over == 2
+        assert manager.get_stats()['backends unavailable'] == 1
+
+    @pytest.mark.asyncio
+    async def test_get_passage_all_backends_fail(
+        self,
+        fallback_bible: Bible,
+        service_one: MockService,
+        service_two: MockService,
+    ) -> None:
+        manager = ServiceManager({'ServiceOne': service_one, 'ServiceTwo': service_two})
+        service_one.get_passage.side_effect = aiohttp.ClientError
+        service_two.get_passage.side_effect = aiohttp.ServerDisconnectedError
+
+        with pytest.raises(aiohttp.ServerDisconnectedError):
+            await manager.get_passage(
+                fallback_bible, VerseRange.from_string('Genesis 1:2')
+            )
+
+    @pytest.mark.asyncio
+    async def test_get_passage_request_error(
+        self,
+        fallback_bible: Bible,
+        service_one: MockService,
+        service_two: MockService,
+    ) -> None:
+        manager = ServiceManager({'ServiceOne': service_one, 'ServiceTwo': service_two})
+        service_one.get_passage.side_effect = DoNotUnderstandError
+
+        with pytest.raises(DoNotUnderstandError):
+            await manager.get_passage(
+                fallback_bible, VerseRange.from_string('Genesis 1:2')
+            )
+
+        service_two.get_passage.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_get_passage_cached(
+        self,
+        bible1: Bible,
+        service_one: MockService,
+    ) -> None:
+        manager = ServiceManager({'ServiceOne': service_one})
+        service_one.get_passage.return_value = Passage(
+            'blah', VerseRange.from_string('Genesis 1:2')
+        )
+
+        result1 = await manager.get_passage(
+            bible1, VerseRange.from_string('Genesis 1:2')
+        )
+        result2 = await manager.get_passage(bible1, VerseRange.from_string('Gen 1:2'))
+
+        assert result1 == Passage('blah', VerseRange.from_string('Genesis 1:2'), 'BIB1')
+        assert result2 == Passage('blah', VerseRange.from_string('Gen 1:2'), 'BIB1')
+        service_one.get_passage.assert_called_once()
+        assert manager.cache.hits == 1
+        assert manager.cache.misses == 1
+
+    @pytest.mark.asyncio
+    async def test_get_passage_coalesced(
+        self,
+        bible1: Bible,
+        service_one: MockService,
+    ) -> None:
+        async def get_passage(bible: Bible, verses: VerseRange) -> Passage:
+            await asyncio.sleep(0.01)
+            return Passage('blah', verses)
+
+        manager = ServiceManager({'ServiceOne': service_one})
+        service_one.get_passage.side_effect = get_passage
+
+        results = await asyncio.gather(
+            *[
+                manager.get_passage(bible1, VerseRange.from_string(reference))
+                for reference in ['Genesis 1:2', 'Gen 1:2', 'Genesis 1:2-1:2']
+            ]
+        )
+
+        assert [result.range for result in results] == [
+            VerseRange.from_string('Genesis 1:2'),
+            VerseRange.from_string('Gen 1:2'),
+            VerseRange.from_string('Genesis 1:2-1:2'),
+        ]
+        service_one.get_passage.assert_called_once()
+        assert manager.get_stats()['passage requests coalesced'] == 2
+
+    @pytest.mark.asyncio
+    async def test_get_passage_from_chapters(
+        self,
+        mocker: pytest_mock.MockerFixture,
+        bible1: Bible,
+        service_one: MockService,
+    ) -> None:
+        async def get_chapter(bible: Bible, book: str, chapter: int) -> Chapter:
+            return make_chapter(chapter, 51)
+
+        manager = ServiceManager(
+            {'ServiceOne': service_one}, cache=PassageCache(chapters=True)
+        )
+        service_one.supports_chapters.return_value = True
+        service_one.get_chapter.side_effect = get_chapter
+
+        results = [
+            await manager.get_passage(bible1, VerseRange.from_string(reference))
+            for reference in ['John 1:16', 'John 1:17', 'John 1:16-18', 'John 1:50-2:1']
+        ]
+
+        assert [result.text for result in results] == [
+            '**16.** 1:16',
+            '**17.** 1:17',
+            '**16.** 1:16 **17.** 1:17 **18.** 1:18',
+            '**50.** 1:50 **51.** 1:51 **1.** 2:1',
+        ]
+        assert service_one.get_chapter.await_args_list == [
+            mocker.call(bible1, 'John', 1),
+            mocker.call(bible1, 'John', 2),
+        ]
+        service_one.get_passage.assert_not_called()
+        assert manager.get_stats()['cache chapter hits'] == 3
+
+    @pytest.mark.asyncio
+    async def test_get_passage_from_chapters_missing_verse(
+        self,
+        bible1: Bible,
+        service_one: MockService,
+    ) -> None:
+        manager = ServiceManager(
+            {'ServiceOne': service_one}, cache=PassageCache(chapters=True)
+        )
+        service_one.supports_chapters.return_value = True
+        service_one.get_chapter.return_value = make_chapter(1, 10)
+
+        with pytest.raises(DoNotUnderstandError):
+            await manager.get_passage(bible1, VerseRange.from_string('John 1:11'))
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        'supports_chapters,reference',
+        [(False, 'John 1:16'), (True, 'John 1:16-4:1')],
+        ids=['unsupported', 'too many chapters'],
+    )
+    async def test_get_passage_not_from_chapters(
+        self,
+        bible1: Bible,
+        service_one: MockService,
+        supports_chapters: bool,
+        reference: str,
+    ) -> None:
+        manager = ServiceManager(
+            {'ServiceOne': service_one}, cache=PassageCache(chapters=True)
+        )
+        service_one.supports_chapters.return_value = supports_chapters
+        service_one.get_passage.return_value = Passage(
+            'blah', VerseRange.from_string(reference)
+        )
+
+        await manager.get_passage(bible1, VerseRange.from_string(reference))
+
+        service_one.get_passage.assert_called_once()
+        service_one.get_chapter.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_get_passage_chapters_not_supported(
+        self,
+        bible1: Bible,
+        service_one: MockService,
+    ) -> None:
+        manager = ServiceManager(
+            {'ServiceOne': service_one}, cache=PassageCache(chapters=True)
+        )
+        service_one.supports_chapters.return_value = True
+        service_one.get_chapter.side_effect = ChaptersNotSupportedError(bible1)
+        passage = Passage('blah', VerseRange.from_string('John 1:16'))
+        service_one.get_passage.return_value = passage
+
+        assert (
+            await manager.get_passage(bible1, VerseRange.from_string('John 1:16'))
+            == passage
+        )
+        service_one.get_chapter.assert_awaited_once()
+        service_one.get_passage.assert_awaited_once()
+
     @pytest.mark.asyncio
     async def test_get_passage_timeout(
         self,
@@ -161,6 +686,37 @@ class TestServiceManager(object):
 
         assert exc_info.value.bible == bible1
         assert exc_info.value.verses == VerseRange.from_string('Genesis 1:2')
+        assert exc_info.value.timeout == 0.1
+
+    @pytest.mark.asyncio
+    async def test_get_passage_adaptive_timeout(
+        self,
+        bible1: Bible,
+        service_one: MockService,
+    ) -> None:
+        async def get_passage(bible: Bible, verses: VerseRange) -> Passage:
+            await asyncio.sleep(0.02 if verses.start.verse < 10 else 0.3)
+            return Passage('blah', verses)
+
+        manager = ServiceManager(
+            {'ServiceOne': service_one},
+            timeout=1.0,
+            timeouts=AdaptiveTimeouts(floor=0.1, min_samples=3),
+        )
+        service_one.get_passage.side_effect = get_passage
+
+        for verse in range(1, 4):
+            await manager.get_passage(
+                bible1, VerseRange.from_string(f'Genesis 1:{verse}')
+            )
+
+        # Three fast lookups bring the timeout down to the floor
+        assert manager.get_stats()['ServiceOne lookup timeout ms'] == 100
+
+        with pytest.raises(ServiceLookupTimeout) as exc_info:
+            await manager.get_passage(bible1, VerseRange.from_string('Genesis 1:10'))
+
+        assert exc_info.value.timeout == 0.1
 
     @pytest.mark.asyncio
     async def test_search(
@@ -202,3 +758,4 @@ class TestServiceManager(object):
 
         assert exc_info.value.bible == bible1
         assert exc_info.value.terms == ['one', 'two', 'three']
+        assert exc_info.value.timeout == 0.1
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from erasmus.single_flight import SingleFlight
+
+
+class TestSingleFlight(object):
+    @pytest.mark.asyncio
+    async def test_coalesces_calls(self) -> None:
+        flight: SingleFlight[str, int] = SingleFlight()
+        calls = 0
+
+        async def func() -> int:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        results = await asyncio.gather(*[flight.do('key', func) for _ in range(5)])
+
+        assert results == [1, 1, 1, 1, 1]
+        assert flight.calls == 1
+        assert flight.coalesced == 4
+        assert len(flight) == 0
+
+        assert await flight.do('key', func) == 2
+
+        task = asyncio.ensure_future(flight.do('key', func))
+        await asyncio.sleep(0)
+        assert 'key' in flight
+
+        await task
+        assert 'key' not in flight
+
+    @pytest.mark.asyncio
+    async def test_exceptions_are_shared(self) -> None:
+        flight: SingleFlight[str, int] = SingleFlight()
+
+        async def func() -> int:
+            await asyncio.sleep(0.01)
+            raise ValueError('oops')
+
+        results = await asyncio.gather(
+            flight.do('key', func), flight.do('key', func), return_exceptions=True
+        )
+
+        assert all(isinstance(result, ValueError) for result in results)
+        assert flight.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter(self) -> None:
+        flight: SingleFlight[str, int] = SingleFlight()
+        started = asyncio.Event()
+
+        async def func() -> int:
+            started.set()
+            await asyncio.sleep(0.05)
+            return 42
+
+        waiter1 = asyncio.ensure_future(flight.do('key', func))
+        waiter2 = asyncio.ensure_future(flight.do('key', func))
+        await started.wait()
+
+        waiter1.cancel()
+
+        assert await waiter2 == 42
+        assert waiter1.cancelled()
+
+    @pytest.mark.asyncio
+    async def test_all_waiters_cancelled(self) -> None:
+        flight: SingleFlight[str, int] = SingleFlight()
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def func() -> int:
+            started.set()
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return 42
+
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(flight.do('key', func), 0.01)
+
+        await asyncio.wait_for(cancelled.wait(), 1)
+        assert started.is_set()
+        assert len(flight) == 0